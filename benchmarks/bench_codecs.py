@@ -0,0 +1,87 @@
+"""
+bench_codecs.py
+
+Builds one synthetic submission with random row values, packs it as plain .tar and as
+every supported compressed variant, and reports archive size and throughput (uncompressed
+MiB/s) per codec for unpack_tar (extract only) and for the full streamed pipeline
+(stream_unpack_tar + analyze_feed). schema.txt is read up front (compressed archives are
+decompressed an extra time to find it), so data is validated in-stream for every codec. zstd is included when the interpreter or the optional 'zstandard'
+package supports it.
+
+Usage:
+    python benchmarks/bench_codecs.py --size-mb 256
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_validation_plan import make_rows
+from synthetic_feed import pack_submission
+from handlers.feed_analyzer import analyze_feed
+from handlers.unpacker import NATIVE_ZSTD, zstandard, unpack_tar, stream_unpack_tar
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE_NAME = "bench.20240101.S001.V1"
+
+def build_submission(folder: str, size_bytes: int) -> None:
+    os.makedirs(folder)
+    rows = 0
+    with open(os.path.join(folder, f"{BASE_NAME}.U1.data"), "w", encoding="utf-8") as f:
+        f.write("ID;AMOUNT;REGION\n")
+        seed = 0
+        while f.tell() < size_bytes:
+            block = make_rows(100000, 0.0, seed)
+            f.write("\n".join(block) + "\n")
+            rows += len(block)
+            seed += 1
+    open(os.path.join(folder, f"{BASE_NAME}.control"), "w").close()
+    with open(os.path.join(folder, f"{BASE_NAME}.audit.xml"), "w") as f:
+        f.write(f"<Audit><File><FileName>{BASE_NAME}.U1.data</FileName><RecordCount>{rows}</RecordCount></File></Audit>")
+    shutil.copy(os.path.join(REPO_ROOT, "schema.txt"), os.path.join(folder, "schema.txt"))
+
+def timed(fn, *args) -> float:
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+def stream_and_analyze(archive: str, workspace: str) -> None:
+    submission_dir, prescanned, member_sizes = stream_unpack_tar(archive, workspace)
+    if not analyze_feed(submission_dir, prescanned=prescanned, member_sizes=member_sizes):
+        sys.exit(f"Synthetic submission unexpectedly failed validation: {submission_dir}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=256, help="Size of the synthetic data file in MiB")
+    args = parser.parse_args()
+
+    codecs = [(".tar", "none"), (".tar.gz", "gz"), (".tar.bz2", "bz2"), (".tar.xz", "xz")]
+    if NATIVE_ZSTD or zstandard is not None:
+        codecs.append((".tar.zst", "zst"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = os.path.join(tmp, "src")
+        build_submission(folder, args.size_mb * 1024 * 1024)
+        payload_mb = sum(os.path.getsize(os.path.join(folder, n)) for n in os.listdir(folder)) / (1024 * 1024)
+
+        print(f"Payload: {payload_mb:,.1f} MiB")
+        print(f"{'codec':<10}{'archive MiB':>12}{'ratio':>8}{'extract MiB/s':>15}{'stream+analyze MiB/s':>22}")
+        for suffix, compression in codecs:
+            archive = pack_submission(folder, os.path.join(tmp, BASE_NAME), compression)
+            archive_mb = os.path.getsize(archive) / (1024 * 1024)
+            workspace = os.path.join(tmp, "workspace")
+            unpack_s = timed(unpack_tar, archive, workspace)
+            shutil.rmtree(workspace)
+            stream_s = timed(stream_and_analyze, archive, workspace)
+            shutil.rmtree(workspace)
+            os.remove(archive)
+            print(f"{suffix:<10}{archive_mb:>12,.1f}{payload_mb / archive_mb:>8.1f}"
+                  f"{payload_mb / unpack_s:>15,.1f}{payload_mb / stream_s:>22,.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+bench_mft.py
+
+Measures MFT transfer throughput and failure handling offline: synthetic submissions (see
+synthetic_feed.py) are uploaded by a TransferEngine to the local stand-in server
+(services/mft_standin.py) or straight into a folder, optionally with injected faults.
+Reports MiB/s, retries and re-sent bytes, and checks every delivered file byte for byte.
+
+Usage:
+    python benchmarks/bench_mft.py --submissions 8 --rows 200000 --workers 4
+    python benchmarks/bench_mft.py --fail-rate 0.05 --drop-rate 0.05 --corrupt-rate 0.02
+"""
+
+import os
+import sys
+import time
+import shutil
+import logging
+import filecmp
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_feed import REPO_ROOT, build_submission, load_columns
+
+# Bytes per upload request (mft_transfer.CHUNK_SIZE, not imported before leaving the repo folder)
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--submissions", type=int, default=8, help="Number of submissions to upload")
+    parser.add_argument("--rows", type=int, default=200000, help="Data rows per submission")
+    parser.add_argument("--files", type=int, default=2, help="Data files per submission")
+    parser.add_argument("--transport", choices=["http", "local"], default="http", help="Stand-in server or plain folder")
+    parser.add_argument("--workers", type=int, default=4, help="Parallel uploads (and pooled connections)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Bytes per upload request")
+    parser.add_argument("--max-retries", type=int, default=8, help="Retries per file")
+    parser.add_argument("--backoff", type=float, default=0.01, help="Delay before the first retry (seconds)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Stand-in: fraction of chunks answered with 503")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Stand-in: fraction of chunks cut off mid-transfer")
+    parser.add_argument("--corrupt-rate", type=float, default=0.0, help="Stand-in: fraction of chunks stored corrupted")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stand-in: delay per request (seconds)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="lz-bench-mft-")
+    cwd = os.getcwd()
+    os.chdir(workdir)  # logs/ of the imported modules go to the scratch folder
+    from services.mft_standin import start_standin
+    from services.mft_transfer import HttpTransport, LocalTransport, TransferEngine
+    from utils import metrics
+    metrics.METRICS_ENABLED = False
+    for handler in logging.getLogger().handlers:
+        if type(handler) is logging.StreamHandler:
+            handler.setStream(open(os.devnull, "w"))  # retry warnings still go to the scratch app.log
+    server = None
+    try:
+        columns = load_columns(os.path.join(REPO_ROOT, "schema.txt"))
+        source_dirs = []
+        for i in range(args.submissions):
+            base_name = f"bench{i:04d}.20240101.S001.V1"
+            folder = os.path.join(workdir, "ready", base_name)
+            build_submission(folder, base_name, columns, args.rows, args.files, seed=args.seed + i)
+            source_dirs.append(folder)
+        total_mb = sum(
+            os.path.getsize(os.path.join(folder, name)) for folder in source_dirs for name in os.listdir(folder)
+        ) / (1024 * 1024)
+
+        target_root = os.path.join(workdir, "target")
+        if args.transport == "http":
+            server = start_standin(
+                target_root, fail_rate=args.fail_rate, drop_rate=args.drop_rate,
+                corrupt_rate=args.corrupt_rate, latency=args.latency, seed=args.seed,
+            )
+            transport = HttpTransport(server.url)
+        else:
+            transport = LocalTransport(target_root)
+
+        engine = TransferEngine(
+            transport, workers=args.workers, queue_size=args.workers * 2, chunk_size=args.chunk_size,
+            max_retries=args.max_retries, backoff=args.backoff, backoff_max=1.0,
+        )
+        start = time.perf_counter()
+        futures = [engine.submit(folder) for folder in source_dirs]
+        results = [future.result() for future in futures]
+        elapsed = time.perf_counter() - start
+        engine.close()
+
+        failed = [result for result in results if not result.ok]
+        mismatched = []
+        for folder in source_dirs:
+            delivered = os.path.join(target_root, os.path.basename(folder))
+            names = sorted(os.listdir(folder))
+            if not os.path.isdir(delivered):
+                mismatched.append(os.path.basename(folder))
+                continue
+            _, mismatch, errors = filecmp.cmpfiles(folder, delivered, names, shallow=False)
+            if mismatch or errors:
+                mismatched.append(os.path.basename(folder))
+
+        sent_mb = sum(result.bytes_sent for result in results) / (1024 * 1024)
+        print(
+            f"{args.submissions} submissions, {total_mb:,.1f} MiB via {args.transport} with {args.workers} workers: "
+            f"{elapsed:,.2f} s, {total_mb / elapsed:,.1f} MiB/s"
+        )
+        print(
+            f"Retries: {sum(result.retries for result in results)}, re-sent {max(0.0, sent_mb - total_mb):,.1f} MiB"
+            + (f", injected faults: {server.faults}" if server else "")
+        )
+        print(f"Failed transfers: {len(failed)}, content mismatches: {len(mismatched)}")
+        for result in failed:
+            print(f"FAILED {result.submission}: {result.error}")
+        if failed or mismatched:
+            sys.exit(1)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+        os.chdir(cwd)
+        shutil.rmtree(workdir)
+
+if __name__ == "__main__":
+    main()
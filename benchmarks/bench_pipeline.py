@@ -0,0 +1,215 @@
+"""
+bench_pipeline.py
+
+Benchmarks the pipeline stages on a synthetic submission (see synthetic_feed.py) and reports
+wall time, rows/s, MiB/s (uncompressed data) and peak RSS per stage:
+
+- unpack:     unpack_tar
+- validate:   validate_data_against_schema on every data file
+- analyze:    analyze_feed on the unpacked submission
+- end_to_end: process_all_tars (unpack, analyze, route) with the archive in incoming/
+
+Every stage runs in a fresh child process (spawn) with its working directory in a scratch
+folder, so peak RSS belongs to that stage alone and logs/ and cache/ never touch the repo.
+Results can be stored as a named baseline and later runs compared against it: a stage is
+flagged when its throughput drops, or its peak RSS grows, by more than --tolerance.
+Comparing exits with status 1 if any stage regressed.
+
+Usage:
+    python benchmarks/bench_pipeline.py --rows 2000000 --files 4 --save-baseline main
+    python benchmarks/bench_pipeline.py --rows 2000000 --files 4 --compare main
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import glob
+import shutil
+import argparse
+import resource
+import tempfile
+import traceback
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_feed import COMPRESSIONS, generate_feed
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_DIR = os.path.join(BENCH_DIR, "baselines")
+STAGES = ["unpack", "validate", "analyze", "end_to_end"]
+
+def _unpacked_dir(workdir: str, base_name: str) -> str:
+    return os.path.join(workdir, "workspace", base_name)
+
+def _stage_unpack(workdir: str, archive: str, base_name: str, options: dict):
+    from handlers.unpacker import unpack_tar
+    shutil.rmtree(os.path.join(workdir, "workspace"), ignore_errors=True)
+    start = time.perf_counter()
+    if not unpack_tar(archive, os.path.join(workdir, "workspace")):
+        raise RuntimeError("unpack_tar failed")
+    return time.perf_counter() - start
+
+def _stage_validate(workdir: str, archive: str, base_name: str, options: dict):
+    from services.schema_validator import load_schema, validate_data_against_schema
+    folder = _unpacked_dir(workdir, base_name)
+    start = time.perf_counter()
+    schema = load_schema(os.path.join(folder, "schema.txt"))
+    for data_file in sorted(glob.glob(os.path.join(folder, f"{base_name}.U*.data"))):
+        validate_data_against_schema(data_file, schema)
+    return time.perf_counter() - start
+
+def _stage_analyze(workdir: str, archive: str, base_name: str, options: dict):
+    from handlers import feed_analyzer
+    feed_analyzer.SCAN_WORKERS = options["scan_workers"]
+    start = time.perf_counter()
+    feed_analyzer.analyze_feed(_unpacked_dir(workdir, base_name))
+    return time.perf_counter() - start
+
+def _stage_end_to_end(workdir: str, archive: str, base_name: str, options: dict):
+    run_dir = os.path.join(workdir, "end_to_end")
+    shutil.rmtree(run_dir, ignore_errors=True)
+    os.makedirs(os.path.join(run_dir, "incoming"))
+    os.link(archive, os.path.join(run_dir, "incoming", os.path.basename(archive)))
+    os.chdir(run_dir)
+    from handlers import pipeline
+    from handlers import feed_analyzer
+    from services import validation_cache
+    feed_analyzer.SCAN_WORKERS = options["scan_workers"]
+    validation_cache.CACHE_ENABLED = False
+    start = time.perf_counter()
+    pipeline.process_all_tars(workers=options["workers"], stream=options["stream"])
+    return time.perf_counter() - start
+
+def _run_stage(stage: str, workdir: str, archive: str, base_name: str, options: dict, result_queue):
+    """Child process: runs one stage and reports (seconds, peak RSS MiB) or an error."""
+    try:
+        os.chdir(workdir)
+        from utils.logger import get_logger
+        get_logger()
+        for handler in logging.getLogger().handlers:
+            if type(handler) is logging.StreamHandler:
+                handler.setStream(open(os.devnull, "w"))  # keep the console quiet; app.log still gets everything
+        elapsed = globals()[f"_stage_{stage}"](workdir, archive, base_name, options)
+        peak_kib = max(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+        )
+        result_queue.put((elapsed, peak_kib / 1024, None))
+    except BaseException:
+        result_queue.put((None, None, traceback.format_exc()))
+
+def run_stage(stage: str, workdir: str, archive: str, base_name: str, options: dict):
+    context = multiprocessing.get_context("spawn")
+    result_queue = context.Queue()
+    child = context.Process(target=_run_stage, args=(stage, workdir, archive, base_name, options, result_queue))
+    child.start()
+    elapsed, peak_rss_mb, error = result_queue.get()
+    child.join()
+    if error:
+        sys.exit(f"Stage {stage} failed:\n{error}")
+    return elapsed, peak_rss_mb
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """Returns a list of regression descriptions."""
+    regressions = []
+    for stage, result in results.items():
+        reference = baseline["stages"].get(stage)
+        if not reference:
+            continue
+        if result["rows_per_s"] < reference["rows_per_s"] * (1 - tolerance):
+            regressions.append(
+                f"{stage}: throughput {result['rows_per_s']:,.0f} rows/s vs baseline {reference['rows_per_s']:,.0f}"
+            )
+        if result["peak_rss_mb"] > reference["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(
+                f"{stage}: peak RSS {result['peak_rss_mb']:,.1f} MiB vs baseline {reference['peak_rss_mb']:,.1f}"
+            )
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000, help="Data rows over all data files")
+    parser.add_argument("--files", type=int, default=1, help="Number of .U*.data files")
+    parser.add_argument("--columns", type=int, help="Number of columns (default: as in the schema)")
+    parser.add_argument("--schema", help="schema.txt with column names and types (default: repository example)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of invalid rows")
+    parser.add_argument("--compression", choices=sorted(COMPRESSIONS), default="none", help="Archive compression")
+    parser.add_argument("--stages", default=",".join(STAGES), help=f"Comma-separated subset of {','.join(STAGES)}")
+    parser.add_argument("--repeats", type=int, default=1, help="Best-of repetitions per stage")
+    parser.add_argument("--workers", type=int, default=1, help="--workers for the end_to_end stage")
+    parser.add_argument("--scan-workers", type=int, default=1, help="--scan-workers for analyze and end_to_end")
+    parser.add_argument("--stream-unpack", action="store_true", help="--stream-unpack for the end_to_end stage")
+    parser.add_argument("--save-baseline", metavar="NAME", help="Store the results as benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="Compare against benchmarks/baselines/NAME.json")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression (default: 0.15)")
+    args = parser.parse_args()
+
+    stages = [stage.strip() for stage in args.stages.split(",") if stage.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+    if {"validate", "analyze"} & set(stages) and "unpack" not in stages:
+        stages.insert(0, "unpack")  # validate/analyze work on the unpacked submission
+    options = {"workers": args.workers, "scan_workers": args.scan_workers, "stream": args.stream_unpack}
+    params = {
+        "rows": args.rows, "files": args.files, "columns": args.columns, "schema": args.schema,
+        "error_rate": args.error_rate, "compression": args.compression, **options,
+    }
+
+    workdir = tempfile.mkdtemp(prefix="lz-bench-")
+    try:
+        start = time.perf_counter()
+        feed = generate_feed(
+            workdir, args.rows, args.files, args.error_rate, args.compression, args.schema, args.columns
+        )
+        data_mb = feed.data_bytes / (1024 * 1024)
+        print(
+            f"Feed: {feed.rows:,} rows, {feed.files} file(s), {feed.error_rows:,} invalid, {data_mb:,.1f} MiB data, "
+            f"{os.path.getsize(feed.archive) / (1024 * 1024):,.1f} MiB {args.compression} archive "
+            f"(generated in {time.perf_counter() - start:,.1f} s)"
+        )
+
+        results = {}
+        for stage in stages:
+            runs = [run_stage(stage, workdir, feed.archive, feed.base_name, options) for _ in range(args.repeats)]
+            elapsed = min(run[0] for run in runs)
+            results[stage] = {
+                "seconds": elapsed,
+                "rows_per_s": feed.rows / elapsed,
+                "mib_per_s": data_mb / elapsed,
+                "peak_rss_mb": min(run[1] for run in runs),
+            }
+    finally:
+        shutil.rmtree(workdir)
+
+    print(f"{'stage':<12}{'wall s':>10}{'rows/s':>14}{'MiB/s':>10}{'peak RSS MiB':>14}")
+    for stage, result in results.items():
+        print(
+            f"{stage:<12}{result['seconds']:>10,.2f}{result['rows_per_s']:>14,.0f}"
+            f"{result['mib_per_s']:>10,.1f}{result['peak_rss_mb']:>14,.1f}"
+        )
+
+    if args.save_baseline:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        path = os.path.join(BASELINE_DIR, f"{args.save_baseline}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"params": params, "stages": results}, f, indent=2)
+        print(f"Baseline saved to {path}")
+
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, f"{args.compare}.json"), "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["params"] != params:
+            print(f"Warning: baseline '{args.compare}' was recorded with different parameters: {baseline['params']}")
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against baseline '{args.compare}' (tolerance {args.tolerance:.0%}).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+bench_report_query.py
+
+Measures how long a query over a day of validation reports takes (see
+services/validation_report.py). A synthetic day is written to a scratch folder with
+append_report: --submissions submissions, a fifth of them failed with --records issue
+records each (codes, files, columns and lines drawn at random). The report file is then
+queried a few ways and the file size, wall time and submissions/s are printed for each.
+
+Usage:
+    python benchmarks/bench_report_query.py --submissions 50000 --records 40
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import validation_report
+
+CODES = (
+    "type_mismatch", "not_nullable", "wrong_value_count", "invalid_date", "header_name_mismatch",
+    "record_count_mismatch", "missing_required_file",
+)
+COLUMNS = ("id", "name", "created", "amount", "status", None)
+
+def write_day(submissions: int, records: int, seed: int = 1) -> str:
+    """Appends a synthetic day of reports; returns the report file path."""
+    rng = random.Random(seed)
+    path = None
+    for n in range(submissions):
+        name = f"sender{n % 200:03d}.20240101.S{n:05d}.V1"
+        failed = n % 5 == 0
+        issues = []
+        if failed:
+            for _ in range(records):
+                data_file = f"{name}.U{rng.randint(1, 4)}.data"
+                issues.append((rng.choice(CODES), data_file, rng.randint(2, 10 ** 6), rng.choice(COLUMNS), 1))
+        path = validation_report.append_report(name, not failed, len(issues), issues)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--submissions", type=int, default=50000, help="Submissions in the day")
+    parser.add_argument("--records", type=int, default=40, help="Issue records per failed submission")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="lz-bench-report-")
+    try:
+        validation_report.REPORT_DIR = workdir
+        start = time.perf_counter()
+        path = write_day(args.submissions, args.records)
+        written = time.perf_counter() - start
+        size = os.path.getsize(path)
+        print(f"wrote {args.submissions:,} submissions in {written:.2f} s "
+              f"({size / 2 ** 20:.1f} MiB, {size / args.submissions:.0f} bytes/submission)")
+
+        queries = [
+            ("by code", dict(by=("code",))),
+            ("by code,file", dict(by=("code", "file"))),
+            ("by submission, failed only", dict(by=("submission",), failed_only=True)),
+            ("type_mismatch by column", dict(by=("column",), code="type_mismatch")),
+            ("one sender by code", dict(by=("code",), submission="sender010.*")),
+        ]
+        for label, kwargs in queries:
+            start = time.perf_counter()
+            counts, scanned, _ = validation_report.query_reports([path], **kwargs)
+            elapsed = time.perf_counter() - start
+            print(f"  {label:30s} {elapsed:6.2f} s  {args.submissions / elapsed:10,.0f} submissions read/s  "
+                  f"{scanned:,} matched, {len(counts):,} groups")
+    finally:
+        shutil.rmtree(workdir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+bench_startup.py
+
+Measures the cost of a one-shot run with nothing to do: main.py is started repeatedly in a
+scratch folder with an empty incoming/ and the median wall time is reported next to a bare
+interpreter start. One more run with `python -X importtime` lists the modules it imported,
+largest cumulative import time first. With --with-archive an empty (invalid) archive is
+dropped into incoming/, so the run loads the pipeline as well.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 20
+    python benchmarks/bench_startup.py --with-archive
+"""
+
+import os
+import sys
+import time
+import shutil
+import tarfile
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _wall(command, cwd: str, env: dict) -> float:
+    start = time.perf_counter()
+    subprocess.run(command, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+def _top_level_imports(stderr: str):
+    """(cumulative microseconds, module) of the top-level entries of -X importtime output."""
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not name.startswith("  "):  # nested imports are indented further
+            imports.append((int(cumulative), name.strip()))
+    return imports
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20, help="Timed runs per command")
+    parser.add_argument("--top", type=int, default=10, help="Imports listed")
+    parser.add_argument("--with-archive", action="store_true", help="Put an empty archive into incoming/")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="lz-bench-startup-")
+    try:
+        os.makedirs(os.path.join(workdir, "incoming"))
+        if args.with_archive:
+            with tarfile.open(os.path.join(workdir, "incoming", "empty.20240101.S001.V1.tar"), "w"):
+                pass
+        env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+        main_py = os.path.join(REPO_ROOT, "main.py")
+
+        bare = statistics.median(_wall([sys.executable, "-c", "pass"], workdir, env) for _ in range(args.runs))
+        run = statistics.median(_wall([sys.executable, main_py], workdir, env) for _ in range(args.runs))
+        profile = subprocess.run(
+            [sys.executable, "-X", "importtime", main_py], cwd=workdir, env=env, capture_output=True, text=True
+        )
+        imports = sorted(_top_level_imports(profile.stderr), reverse=True)
+
+        print(f"main.py with {'one archive' if args.with_archive else 'an empty incoming/'}: {run * 1000:.1f} ms "
+              f"median wall (bare interpreter {bare * 1000:.1f} ms, {args.runs} runs)")
+        print(f"-X importtime: {len(imports)} top-level imports, {sum(us for us, _ in imports) / 1000:.1f} ms cumulative")
+        for us, name in imports[:args.top]:
+            print(f"  {us / 1000:8.1f} ms  {name}")
+    finally:
+        shutil.rmtree(workdir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+bench_streaming_validation.py
+
+Measures peak memory (RSS) and throughput of validate_data_against_schema on a large
+synthetic .U1.data file built from the example schema.txt. Validation runs in a child
+process so the reported peak RSS belongs to the validator alone, not to the generator.
+
+Usage:
+    python benchmarks/bench_streaming_validation.py --size-mb 5120
+"""
+
+import os
+import sys
+import time
+import argparse
+import resource
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.schema_validator import load_schema, validate_data_against_schema
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_ROWS = ["123;456.78;EU\n", "456;1000.00;\n", "789;12,50;US\n", "1011;0.99;NA\n"]
+
+def write_synthetic_file(path: str, size_bytes: int) -> int:
+    """
+    Writes a valid data file of roughly size_bytes and returns the number of data rows.
+    """
+    block = "".join(SAMPLE_ROWS * 4096).encode("utf-8")
+    rows_per_block = len(SAMPLE_ROWS) * 4096
+    rows = 0
+    with open(path, "wb") as f:
+        f.write(b"ID;AMOUNT;REGION\n")
+        while f.tell() < size_bytes:
+            f.write(block)
+            rows += rows_per_block
+    return rows
+
+def _validate(data_file: str, schema_path: str, result_queue) -> None:
+    start = time.perf_counter()
+    errors = validate_data_against_schema(data_file, load_schema(schema_path))
+    result_queue.put((time.perf_counter() - start, len(errors)))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=5120, help="Size of the synthetic data file in MiB")
+    parser.add_argument("--dir", default=tempfile.gettempdir(), help="Directory for the synthetic file")
+    parser.add_argument("--keep", action="store_true", help="Keep the synthetic file after the run")
+    args = parser.parse_args()
+
+    data_file = os.path.join(args.dir, "bench.20240101.S001.V1.U1.data")
+    print(f"Generating {args.size_mb} MiB synthetic file at {data_file} ...")
+    rows = write_synthetic_file(data_file, args.size_mb * 1024 * 1024)
+    size_mb = os.path.getsize(data_file) / (1024 * 1024)
+
+    try:
+        result_queue = multiprocessing.Queue()
+        worker = multiprocessing.Process(
+            target=_validate, args=(data_file, os.path.join(REPO_ROOT, "schema.txt"), result_queue)
+        )
+        worker.start()
+        elapsed, error_count = result_queue.get()
+        worker.join()
+        peak_rss_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+    finally:
+        if not args.keep:
+            os.remove(data_file)
+
+    print(f"File size:      {size_mb:,.1f} MiB ({rows:,} rows)")
+    print(f"Errors found:   {error_count}")
+    print(f"Wall time:      {elapsed:,.2f} s")
+    print(f"Throughput:     {rows / elapsed:,.0f} rows/s, {size_mb / elapsed:,.1f} MiB/s")
+    print(f"Peak RSS:       {peak_rss_mb:,.1f} MiB")
+
+if __name__ == "__main__":
+    main()
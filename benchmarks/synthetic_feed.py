@@ -0,0 +1,273 @@
+"""
+synthetic_feed.py
+
+Generates synthetic feed submissions for benchmarks: a .tar (optionally compressed) with
+audit.xml, an empty control file, schema.txt and one or more .U*.data files.
+
+Column names, nullability and types come from a schema.txt (default: the example one in the
+repository root). With --columns N the schema's columns are repeated until there are N of
+them. A fraction of the rows (--error-rate) is made invalid: a value of the wrong type, an
+empty non-nullable value or a wrong number of values.
+
+Usage:
+    python benchmarks/synthetic_feed.py --rows 1000000 --files 4 --error-rate 0.01 --compression gz --out incoming
+"""
+
+import os
+import sys
+import json
+import random
+import shutil
+import tarfile
+import argparse
+import tempfile
+import importlib.util
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASE_NAME = "bench.20240101.S001.V1"
+
+# Archive suffix and tarfile mode per --compression value ("zst" is handled separately)
+COMPRESSIONS = {
+    "none": (".tar", "w"),
+    "gz": (".tar.gz", "w:gz"),
+    "bz2": (".tar.bz2", "w:bz2"),
+    "xz": (".tar.xz", "w:xz"),
+    "zst": (".tar.zst", None),
+}
+
+# Rows generated per block; each column is sampled for a whole block at once
+BLOCK_ROWS = 50000
+
+# Distinct values sampled per column
+POOL_SIZE = 4096
+
+# Values that fail each type check (strings never fail, except when empty and not nullable)
+INVALID_VALUES = {
+    "long": ["abc", "12.5", "-7"],
+    "decimal": ["x1", "abc", "1.2.3x"],
+    "boolean": ["maybe", "yes", "2"],
+    "date": ["01/02/2024", "2024-1-1", "today"],
+}
+
+@dataclass
+class SyntheticFeed:
+    """
+    A generated submission.
+
+    Attributes:
+        archive: Path of the generated archive
+        base_name: Submission base name
+        rows: Data rows over all data files (excluding headers)
+        error_rows: Rows made invalid
+        data_bytes: Uncompressed size of all data files
+        files: Number of data files
+    """
+    archive: str
+    base_name: str
+    rows: int
+    error_rows: int
+    data_bytes: int
+    files: int
+
+def load_columns(schema_path: str, columns: Optional[int] = None) -> List[Dict]:
+    """
+    Reads column definitions from schema_path, repeated (with numbered names) up to `columns`.
+    """
+    with open(schema_path, "r", encoding="utf-8") as f:
+        base = json.load(f)
+    if not columns:
+        return base
+    result = []
+    for i in range(columns):
+        col_def = dict(base[i % len(base)])
+        if i >= len(base):
+            col_def["name"] = f"{col_def['name']}_{i // len(base)}"
+        result.append(col_def)
+    return result
+
+def _value_pool(col_def: Dict, rng: random.Random) -> List[str]:
+    type_name = col_def.get("type")
+    if type_name == "long":
+        pool = [str(rng.randint(0, 10**9)) for _ in range(POOL_SIZE)]
+    elif type_name == "decimal":
+        pool = [f"{rng.randint(0, 99999)}{rng.choice('.,')}{rng.randint(0, 99):02d}" for _ in range(POOL_SIZE)]
+    elif type_name == "boolean":
+        pool = [rng.choice(["true", "false", "1", "0", "TRUE"]) for _ in range(POOL_SIZE)]
+    elif type_name == "date":
+        pool = [f"{rng.randint(2000, 2030)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}" for _ in range(POOL_SIZE)]
+    else:
+        letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+        pool = ["".join(rng.choices(letters, k=rng.randint(2, 12))) for _ in range(POOL_SIZE)]
+    if col_def.get("nullable", True):
+        pool[: POOL_SIZE // 10] = [""] * (POOL_SIZE // 10)
+    return pool
+
+def _invalid_row(columns: List[Dict], pools: List[List[str]], rng: random.Random) -> str:
+    values = [rng.choice(pool) for pool in pools]
+    breakable = [
+        i for i, col_def in enumerate(columns)
+        if col_def.get("type") in INVALID_VALUES or not col_def.get("nullable", True)
+    ]
+    if not breakable or rng.random() < 0.2:
+        values.pop() if len(values) > 1 else values.append("extra")
+        return ";".join(values)
+    i = rng.choice(breakable)
+    type_name = columns[i].get("type")
+    if type_name in INVALID_VALUES and (columns[i].get("nullable", True) or rng.random() < 0.7):
+        values[i] = rng.choice(INVALID_VALUES[type_name])
+    else:
+        values[i] = ""
+    return ";".join(values)
+
+def write_data_file(path: str, columns: List[Dict], rows: int, error_rate: float, rng: random.Random) -> int:
+    """
+    Writes a data file with a header and `rows` rows; returns the number of invalid rows.
+    """
+    pools = [_value_pool(col_def, rng) for col_def in columns]
+    error_rows = 0
+    with open(path, "w", encoding="utf-8", newline="\n") as f:
+        f.write(";".join(col_def["name"] for col_def in columns) + "\n")
+        remaining = rows
+        while remaining > 0:
+            count = min(BLOCK_ROWS, remaining)
+            block = [";".join(values) for values in zip(*(rng.choices(pool, k=count) for pool in pools))]
+            if error_rate > 0:
+                for i in range(count):
+                    if rng.random() < error_rate:
+                        block[i] = _invalid_row(columns, pools, rng)
+                        error_rows += 1
+            f.write("\n".join(block))
+            f.write("\n")
+            remaining -= count
+    return error_rows
+
+def build_submission(
+    folder: str,
+    base_name: str,
+    columns: List[Dict],
+    rows: int,
+    files: int = 1,
+    error_rate: float = 0.0,
+    seed: int = 0,
+) -> Tuple[int, int]:
+    """
+    Writes an unpacked submission into folder (created if needed).
+
+    Returns:
+        Tuple of (data rows written, invalid rows)
+    """
+    os.makedirs(folder, exist_ok=True)
+    rng = random.Random(seed)
+    audit_entries = []
+    error_rows = 0
+    for index in range(files):
+        file_rows = rows // files + (1 if index < rows % files else 0)
+        file_name = f"{base_name}.U{index + 1}.data"
+        error_rows += write_data_file(os.path.join(folder, file_name), columns, file_rows, error_rate, rng)
+        audit_entries.append(f"<File><FileName>{file_name}</FileName><RecordCount>{file_rows}</RecordCount></File>")
+
+    with open(os.path.join(folder, f"{base_name}.audit.xml"), "w", encoding="utf-8") as f:
+        f.write(f"<Audit><SubmissionBaseName>{base_name}</SubmissionBaseName>{''.join(audit_entries)}</Audit>")
+    open(os.path.join(folder, f"{base_name}.control"), "w").close()
+    with open(os.path.join(folder, "schema.txt"), "w", encoding="utf-8") as f:
+        json.dump(columns, f, indent=2)
+    return rows, error_rows
+
+def pack_submission(folder: str, archive_base: str, compression: str = "none") -> str:
+    """
+    Packs the files of a submission folder into archive_base + the compression's suffix.
+
+    Returns:
+        Path of the archive
+    """
+    suffix, mode = COMPRESSIONS[compression]
+    archive = archive_base + suffix
+    target = archive + ".tmp" if mode is None else archive
+    with tarfile.open(target, mode or "w") as tar:
+        for name in sorted(os.listdir(folder)):
+            tar.add(os.path.join(folder, name), arcname=name)
+    if mode is None:
+        if "zst" in tarfile.TarFile.OPEN_METH:
+            with tarfile.open(archive, "w:zst") as out, tarfile.open(target) as src:
+                for member in src:
+                    out.addfile(member, src.extractfile(member))
+        elif importlib.util.find_spec("zstandard") is not None:
+            import zstandard
+            with open(target, "rb") as src, open(archive, "wb") as dst:
+                zstandard.ZstdCompressor().copy_stream(src, dst)
+        else:
+            os.remove(target)
+            raise RuntimeError("zstd needs Python 3.14+ or the 'zstandard' package")
+        os.remove(target)
+    return archive
+
+def generate_feed(
+    out_dir: str,
+    rows: int,
+    files: int = 1,
+    error_rate: float = 0.0,
+    compression: str = "none",
+    schema_path: Optional[str] = None,
+    columns: Optional[int] = None,
+    base_name: str = DEFAULT_BASE_NAME,
+    seed: int = 0,
+) -> SyntheticFeed:
+    """
+    Generates a submission archive in out_dir.
+
+    Args:
+        out_dir: Folder receiving the archive (e.g. incoming/)
+        rows: Data rows over all data files
+        files: Number of .U*.data files
+        error_rate: Fraction of invalid rows
+        compression: One of COMPRESSIONS
+        schema_path: schema.txt providing column names and types (default: repository example)
+        columns: Number of columns (default: as in the schema)
+        base_name: Submission base name
+        seed: Random seed; equal parameters and seed give identical feeds
+
+    Returns:
+        SyntheticFeed describing the archive
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    column_defs = load_columns(schema_path or os.path.join(REPO_ROOT, "schema.txt"), columns)
+    staging = tempfile.mkdtemp(dir=out_dir, prefix=".synthetic-")
+    try:
+        folder = os.path.join(staging, base_name)
+        rows, error_rows = build_submission(folder, base_name, column_defs, rows, files, error_rate, seed)
+        data_bytes = sum(
+            os.path.getsize(os.path.join(folder, name)) for name in os.listdir(folder) if name.endswith(".data")
+        )
+        archive = pack_submission(folder, os.path.join(out_dir, base_name), compression)
+    finally:
+        shutil.rmtree(staging)
+    return SyntheticFeed(archive, base_name, rows, error_rows, data_bytes, files)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000, help="Data rows over all data files")
+    parser.add_argument("--files", type=int, default=1, help="Number of .U*.data files")
+    parser.add_argument("--columns", type=int, help="Number of columns (default: as in the schema)")
+    parser.add_argument("--schema", help="schema.txt with column names and types (default: repository example)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of invalid rows")
+    parser.add_argument("--compression", choices=sorted(COMPRESSIONS), default="none", help="Archive compression")
+    parser.add_argument("--name", default=DEFAULT_BASE_NAME, help="Submission base name")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--out", default="incoming", help="Output folder (default: incoming)")
+    args = parser.parse_args()
+
+    feed = generate_feed(
+        args.out, args.rows, args.files, args.error_rate, args.compression,
+        args.schema, args.columns, args.name, args.seed,
+    )
+    print(
+        f"{feed.archive}: {feed.rows:,} rows in {feed.files} file(s), {feed.error_rows:,} invalid, "
+        f"{feed.data_bytes / (1024 * 1024):,.1f} MiB of data, {os.path.getsize(feed.archive) / (1024 * 1024):,.1f} MiB archive"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,111 @@ audit_parser.py
 Parses the .audit.xml file in a feed submission.
 Extracts the base name, sequence number, version, and expected files with record counts.
 Used during validation to verify audit metadata vs. actual file presence and size.
+
+The file is read in a single streaming pass (iterparse) that yields both the
+well-formedness verdict and the file list. Each <File> element is dropped from the tree
+once its entry has been recorded, so audits listing tens of thousands of files never
+hold the whole document in memory.
 """
 
 import os
 import xml.etree.ElementTree as ET
-from typing import Dict, List, Tuple
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+class AuditFile:
+    """
+    One <File> entry of audit.xml.
+
+    Attributes:
+        file_name: FileName text, stripped of surrounding whitespace
+        record_count: RecordCount as an integer
+    """
+    __slots__ = ("file_name", "record_count")
+
+    def __init__(self, file_name: str, record_count: int):
+        self.file_name = file_name
+        self.record_count = record_count
+
+    def __repr__(self) -> str:
+        return f"AuditFile({self.file_name!r}, {self.record_count})"
+
+@dataclass
+class AuditScan:
+    """
+    Outcome of a single pass over audit.xml.
 
-def parse_audit_xml(audit_path: str) -> Tuple[str, str, str, List[Dict[str, str]]]:
+    Attributes:
+        well_formed: Whether the whole file parsed as XML
+        base_name: SubmissionBaseName text ("" if absent)
+        sequence_number: SubmissionSequenceNumber text ("" if absent)
+        version: SubmissionVersion text ("" if absent)
+        files: <File> entries anywhere below the root, in document order
+        error: ParseError if not well-formed, otherwise the first error raised while reading
+            the entries (e.g. a non-integer RecordCount), if any
+    """
+    well_formed: bool = True
+    base_name: str = ""
+    sequence_number: str = ""
+    version: str = ""
+    files: List[AuditFile] = field(default_factory=list)
+    error: Optional[Exception] = None
+
+def scan_audit_xml(audit_path: str) -> AuditScan:
+    """
+    Parses audit.xml once, streaming, and collects its verdict, metadata and file entries.
+
+    Args:
+        audit_path: Path to the .audit.xml file
+
+    Returns:
+        AuditScan; XML and content errors are stored in its error attribute
+
+    Raises:
+        FileNotFoundError: If audit.xml file does not exist
+    """
+    if not os.path.exists(audit_path):
+        raise FileNotFoundError(f"Audit XML file not found: {audit_path}")
+
+    scan = AuditScan()
+    metadata = {"SubmissionBaseName": None, "SubmissionSequenceNumber": None, "SubmissionVersion": None}
+    path = []  # open elements, root first
+    open_files = []  # indexes in scan.files of the <File> elements still open
+    try:
+        for event, elem in ET.iterparse(audit_path, events=("start", "end")):
+            if event == "start":
+                path.append(elem)
+                if elem.tag == "File" and len(path) > 1:
+                    open_files.append(len(scan.files))
+                    scan.files.append(None)  # placeholder keeps entries in document order
+                continue
+
+            path.pop()
+            if len(path) == 1 and elem.tag in metadata and metadata[elem.tag] is None:
+                metadata[elem.tag] = elem.text or ""
+            elif elem.tag == "File" and path:
+                try:
+                    entry = AuditFile(
+                        elem.findtext("FileName", default="").strip(),
+                        int(elem.findtext("RecordCount", default="0")),
+                    )
+                except Exception as e:
+                    entry = e  # reported below if no earlier entry failed
+                scan.files[open_files.pop()] = entry
+                path[-1].remove(elem)  # the entry is recorded; free the element and its children
+    except ET.ParseError as e:
+        scan.well_formed = False
+        scan.error = e
+
+    scan.base_name = metadata["SubmissionBaseName"] or ""
+    scan.sequence_number = metadata["SubmissionSequenceNumber"] or ""
+    scan.version = metadata["SubmissionVersion"] or ""
+    if scan.well_formed:
+        scan.error = next((entry for entry in scan.files if isinstance(entry, Exception)), None)
+    scan.files = [entry for entry in scan.files if isinstance(entry, AuditFile)]
+    return scan
+
+def parse_audit_xml(audit_path: str) -> Tuple[str, str, str, List[AuditFile]]:
     """
     Parses the audit.xml file and extracts submission metadata and file info.
 
@@ -22,31 +120,16 @@ def parse_audit_xml(audit_path: str) -> Tuple[str, str, str, List[Dict[str, str]
             - base name (str)
             - sequence number (str)
             - version (str)
-            - list of file info dictionaries, each with:
+            - list of AuditFile entries, each with:
                 * file_name (str)
                 * record_count (int)
 
     Raises:
         FileNotFoundError: If audit.xml file does not exist
         ET.ParseError: If XML is malformed
+        ValueError: If a RecordCount is not an integer
     """
-    if not os.path.exists(audit_path):
-        raise FileNotFoundError(f"Audit XML file not found: {audit_path}")
-
-    tree = ET.parse(audit_path)
-    root = tree.getroot()
-
-    submission_base_name = root.findtext("SubmissionBaseName", default="")
-    sequence_number = root.findtext("SubmissionSequenceNumber", default="")
-    version = root.findtext("SubmissionVersion", default="")
-
-    file_info_list = []
-    for file_elem in root.findall(".//File"):
-        file_name = file_elem.findtext("FileName", default="")
-        record_count = file_elem.findtext("RecordCount", default="0")
-        file_info_list.append({
-            "file_name": file_name.strip(),
-            "record_count": int(record_count)
-        })
-
-    return submission_base_name, sequence_number, version, file_info_list
+    scan = scan_audit_xml(audit_path)
+    if scan.error is not None:
+        raise scan.error
+    return scan.base_name, scan.sequence_number, scan.version, scan.files
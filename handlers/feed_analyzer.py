@@ -3,17 +3,25 @@ feed_analyzer.py
 
 Validates the contents of an unpacked submission folder for HDR/TransArch feeds.
 Checks for required files, structural consistency, audit.xml correctness, schema/data alignment,
-and applies basic auto-fixes (if enabled). Logs summary results in plain log and JSONL format.
+and applies basic auto-fixes (if enabled). Logs summary results in plain log and JSONL format,
+and appends a structured record of every issue (code, file, line, column, count) to the daily
+validation report (see services/validation_report.py).
 """
 
 import os
 import glob
-import xml.etree.ElementTree as ET
-from audit_parser import parse_audit_xml
+from typing import Dict, List, Optional, Tuple
+from handlers.audit_parser import AuditScan, scan_audit_xml
+from services import error_accumulator
 from services.auto_fixer import fix_submission
-from services.schema_validator import load_schema, validate_data_against_schema
+from services.data_scanner import DataFileScan, scan_data_file
+from services.schema_registry import load_plan
+from services.schema_validator import ValidationPlan
+from services.validation_cache import get_cached_verdict, store_verdict
+from services.validation_report import IssueRecord, append_report
 from utils.logger import get_logger
 from utils.grafana_logger import log_event
+from utils.metrics import stage
 
 # Initialize logger
 logger = get_logger()
@@ -21,101 +29,330 @@ logger = get_logger()
 # Enable or disable auto-fix functionality
 AUTO_FIX_ENABLED = True
 
-def analyze_feed(submission_path: str) -> bool:
+# Processes used to scan a single large data file in parallel (1 = serial scan)
+SCAN_WORKERS = 1
+
+# Issue codes of the structural checks in validation reports (data file errors use the
+# schema_validator codes, e.g. type_mismatch)
+MISSING_REQUIRED_FILE = "missing_required_file"
+NO_DATA_FILES = "no_data_files"
+CONTROL_NOT_EMPTY = "control_not_empty"
+AUDIT_NOT_WELL_FORMED = "audit_not_well_formed"
+AUDIT_LISTED_FILE_MISSING = "audit_listed_file_missing"
+RECORD_COUNT_MISMATCH = "record_count_mismatch"
+AUDIT_CONTENT_ERROR = "audit_content_error"
+SCHEMA_ERROR = "schema_error"
+SCHEMA_MISSING = "schema_missing"
+
+def analyze_feed(
+    submission_path: str,
+    prescanned: Optional[Dict[str, DataFileScan]] = None,
+    cache_key: Optional[str] = None,
+    member_sizes: Optional[Dict[str, int]] = None,
+) -> bool:
     """
     Performs full validation of a feed submission folder.
 
     Args:
         submission_path: Path to the unpacked submission folder
+        prescanned: Optional data file scans made while unpacking (see stream_unpack_tar),
+            keyed by normalised path; reused instead of reading those files again
+        cache_key: Optional validation cache key of the submission archive (see
+            validation_cache.submission_key). A cached verdict is reported without
+            validating; otherwise the new verdict is cached unless an auto-fix changed files.
+        member_sizes: Optional sizes from the archive's tar headers (see stream_unpack_tar),
+            keyed by normalised path; used instead of the unpacked files' sizes
 
     Returns:
         True if all validations pass (after possible fixes), False otherwise
     """
     base_name = os.path.basename(submission_path)
-    log_path = os.path.join(submission_path, "feed_analysis.log")
-    issues = []
 
-    # Check if required files (audit.xml and control) are present
+    if cache_key:
+        cached = get_cached_verdict(cache_key)
+        if cached is not None:
+            _, issues, issue_count, records = cached
+            logger.info(f"[{base_name}] Identical submission validated before; reusing cached verdict.")
+            return report_verdict(submission_path, issues, issue_count, records)
+
+    checks = _SubmissionChecks(submission_path, prescanned, member_sizes)
+    issues = checks.collect_issues()
+    fixed_any = False
+
+    # Attempt auto-fix if enabled and issues exist; only results depending on changed files are recomputed
+    while issues and AUTO_FIX_ENABLED:
+        scans = checks.data_scans()
+        with stage(base_name, "auto_fix") as timing:
+            changed = fix_submission(submission_path, base_name, scans)
+            timing.bytes = sum(os.path.getsize(path) for path in changed)
+        if not changed:
+            break
+        logger.info(f"[{base_name}] Auto-fix applied. Retrying validation...")
+        fixed_any = True
+        checks.invalidate(changed)
+        issues = checks.collect_issues()
+
+    issue_count = len(issues) + checks.unlisted_errors
+    if cache_key and not fixed_any:
+        store_verdict(cache_key, not issues, issues, issue_count, checks.records)
+    return report_verdict(submission_path, issues, issue_count, checks.records)
+
+class _SubmissionChecks:
+    """
+    Validation checks of one unpacked submission.
+
+    Results derived from a single file (control file size, audit.xml well-formedness and
+    contents, the loaded schema, data file scans) are kept per file, so after an auto-fix
+    collect_issues() only redoes the work that depends on the changed files. Data file scans
+    also depend on schema.txt. The directory layout is read once: fixes only rewrite files.
+    Data files that were scanned while unpacking but not written (see stream_unpack_tar)
+    count as present.
+
+    Args:
+        submission_path: Path to the unpacked submission folder
+        prescanned: Optional data file scans made while unpacking, keyed by normalised path
+        member_sizes: Optional tar header sizes of the unpacked files, keyed by normalised path
+    """
+
     REQUIRED_EXTENSIONS = [".audit.xml", ".control"]
-    for ext in REQUIRED_EXTENSIONS:
-        pattern = os.path.join(submission_path, f"{base_name}{ext}")
-        if not glob.glob(pattern):
-            issues.append(f"Missing required file with extension '{ext}' matching base name.")
-
-    # Check if at least one .data file is present
-    data_files = glob.glob(os.path.join(submission_path, f"{base_name}.U*.data"))
-    if not data_files:
-        issues.append("No data files (.U*.data) found.")
-
-    # Validate that control file is present and empty
-    control_path = os.path.join(submission_path, f"{base_name}.control")
-    if os.path.exists(control_path) and os.path.getsize(control_path) != 0:
-        issues.append(f"Control file '{control_path}' must be exactly 0 bytes.")
-
-    # Check if audit.xml is well-formed
-    audit_path = os.path.join(submission_path, f"{base_name}.audit.xml")
-    if os.path.exists(audit_path):
-        try:
-            ET.parse(audit_path)
-        except ET.ParseError:
-            issues.append(f"Audit XML '{audit_path}' is not well-formed.")
-
-    # Validate audit.xml contents and match with physical files
-    if os.path.exists(audit_path) and not issues:
-        try:
-            _, _, _, audit_files = parse_audit_xml(audit_path)
-            for item in audit_files:
-                expected_path = os.path.join(submission_path, item["file_name"])
-                if not os.path.exists(expected_path):
-                    issues.append(f"File listed in audit.xml not found: {item['file_name']}")
-                else:
-                    with open(expected_path, "r", encoding="utf-8") as f:
-                        line_count = sum(1 for _ in f) - 1  # exclude header line
-                        if line_count != item["record_count"]:
-                            issues.append(
-                                f"Record count mismatch in {item['file_name']}: expected {item['record_count']}, found {line_count}"
+
+    def __init__(
+        self,
+        submission_path: str,
+        prescanned: Optional[Dict[str, DataFileScan]] = None,
+        member_sizes: Optional[Dict[str, int]] = None,
+    ):
+        self.submission_path = submission_path
+        self.base_name = base_name = os.path.basename(submission_path)
+        self.prescanned = dict(prescanned or {})
+        self.member_sizes = dict(member_sizes or {})
+        self._results = {}  # (check, normalised path) -> result
+        self.unlisted_errors = 0  # errors counted in data file summaries, beyond their listed lines
+        self.records: List[IssueRecord] = []  # structured form of the issues, for the validation report
+
+        # Check if required files (audit.xml and control) are present
+        self.missing_extensions = [
+            ext for ext in self.REQUIRED_EXTENSIONS
+            if not glob.glob(os.path.join(submission_path, f"{base_name}{ext}"))
+        ]
+        self.data_files = glob.glob(os.path.join(submission_path, f"{base_name}.U*.data"))
+        on_disk = {os.path.normpath(path) for path in self.data_files}
+        self.data_files += sorted(path for path in self.prescanned if path not in on_disk)
+        self.control_path = os.path.join(submission_path, f"{base_name}.control")
+        self.audit_path = os.path.join(submission_path, f"{base_name}.audit.xml")
+        self.schema_path = os.path.join(submission_path, "schema.txt")
+        self.has_audit = os.path.exists(self.audit_path)
+        self.has_schema = os.path.exists(self.schema_path)
+
+    def _cached(self, check: str, path: str, compute):
+        key = (check, os.path.normpath(path))
+        if key not in self._results:
+            self._results[key] = compute()
+        return self._results[key]
+
+    def invalidate(self, changed_paths: List[str]):
+        """Drops every result that depends on one of the changed files."""
+        changed = {os.path.normpath(path) for path in changed_paths}
+        if os.path.normpath(self.schema_path) in changed:
+            changed.update(os.path.normpath(path) for path in self.data_files)
+        for key in [key for key in self._results if key[1] in changed]:
+            del self._results[key]
+        for path in changed:
+            self.prescanned.pop(path, None)
+            self.member_sizes.pop(path, None)
+
+    def schema(self) -> Tuple[Optional[ValidationPlan], Optional[Exception]]:
+        """Loaded schema.txt (or None) and the error raised while loading it, if any."""
+        def load():
+            if not self.has_schema:
+                return None, None
+            try:
+                with stage(self.base_name, "schema_load", bytes=os.path.getsize(self.schema_path)):
+                    return load_plan(self.schema_path), None
+            except Exception as e:
+                return None, e
+        return self._cached("schema", self.schema_path, load)
+
+    def scan(self, path: str) -> DataFileScan:
+        """Single pass over a data file: record count, first line and schema errors."""
+        def compute():
+            schema, _ = self.schema()
+            scan = self.prescanned.get(os.path.normpath(path))
+            if scan is None or (schema is not None and not scan.schema_checked):
+                scan = self._timed_scan(path, schema)
+            return scan
+        return self._cached("scan", path, compute)
+
+    def _timed_scan(self, path: str, schema: Optional[ValidationPlan] = None) -> DataFileScan:
+        """scan_data_file as a "schema_validation" stage, or "record_count" without a schema."""
+        name = "record_count" if schema is None else "schema_validation"
+        with stage(self.base_name, name) as timing:
+            scan = scan_data_file(path, schema, workers=SCAN_WORKERS)
+            timing.rows = scan.line_count
+            if not scan.error:
+                timing.bytes = os.path.getsize(path)
+        return scan
+
+    def data_scans(self) -> Dict[str, DataFileScan]:
+        """Scans of all .U*.data files, keyed by normalised path."""
+        return {os.path.normpath(path): self.scan(path) for path in self.data_files}
+
+    def _present(self, path: str) -> bool:
+        return os.path.exists(path) or os.path.normpath(path) in self.prescanned
+
+    def _control_not_empty(self) -> bool:
+        size = self.member_sizes.get(os.path.normpath(self.control_path))
+        if size is None:
+            return os.path.exists(self.control_path) and os.path.getsize(self.control_path) != 0
+        return size != 0
+
+    def _audit(self) -> AuditScan:
+        """Single streaming parse of audit.xml: well-formedness and file entries."""
+        with stage(self.base_name, "audit_parse", bytes=os.path.getsize(self.audit_path)) as timing:
+            audit = scan_audit_xml(self.audit_path)
+            timing.rows = len(audit.files)
+        return audit
+
+    def collect_issues(self) -> List[str]:
+        """
+        Runs all checks, reusing results whose files did not change, and returns the issues
+        found. Their structured form is left in records.
+        """
+        issues = []
+        records = []
+        self.unlisted_errors = 0
+
+        def issue(message: str, code: str, file_name: str):
+            issues.append(message)
+            records.append((code, file_name, None, None, 1))
+
+        for ext in self.missing_extensions:
+            issue(f"Missing required file with extension '{ext}' matching base name.", MISSING_REQUIRED_FILE, f"{self.base_name}{ext}")
+
+        # Check if at least one .data file is present
+        if not self.data_files:
+            issue("No data files (.U*.data) found.", NO_DATA_FILES, f"{self.base_name}.U*.data")
+
+        # Validate that control file is present and empty
+        if self._cached("control", self.control_path, self._control_not_empty):
+            issue(f"Control file '{self.control_path}' must be exactly 0 bytes.", CONTROL_NOT_EMPTY, os.path.basename(self.control_path))
+
+        # Check if audit.xml is well-formed (the same pass reads its file entries)
+        audit_name = os.path.basename(self.audit_path)
+        audit = self._cached("audit", self.audit_path, self._audit) if self.has_audit else None
+        if audit is not None and not audit.well_formed:
+            issue(f"Audit XML '{self.audit_path}' is not well-formed.", AUDIT_NOT_WELL_FORMED, audit_name)
+
+        # Single pass per data file: record count, first line and schema errors
+        schema, schema_error = self.schema()
+        scans = self.data_scans()
+
+        # Validate audit.xml contents and match with physical files
+        if self.has_audit and not issues:
+            failing_file = audit_name
+            try:
+                if audit.error:
+                    raise audit.error
+                for item in audit.files:
+                    expected_path = os.path.join(self.submission_path, item.file_name)
+                    if not self._present(expected_path):
+                        issue(f"File listed in audit.xml not found: {item.file_name}", AUDIT_LISTED_FILE_MISSING, item.file_name)
+                    else:
+                        failing_file = item.file_name
+                        scan = self._cached("scan", expected_path, lambda: self._timed_scan(expected_path))
+                        if scan.error:
+                            raise scan.error
+                        failing_file = audit_name
+                        line_count = scan.record_count  # exclude header line
+                        if line_count != item.record_count:
+                            issue(
+                                f"Record count mismatch in {item.file_name}: expected {item.record_count}, found {line_count}",
+                                RECORD_COUNT_MISMATCH, item.file_name,
                             )
-        except Exception as e:
-            issues.append(f"Error parsing audit.xml contents: {e}")
-
-    # Validate schema.txt against data files
-    schema_path = os.path.join(submission_path, "schema.txt")
-    if os.path.exists(schema_path):
-        try:
-            schema = load_schema(schema_path)
-            for data_file in data_files:
-                validation_errors = validate_data_against_schema(data_file, schema)
-                issues.extend(validation_errors)
-        except Exception as e:
-            issues.append(f"Error validating schema: {e}")
-    else:
-        issues.append("schema.txt not found in submission.")
-
-    # Attempt auto-fix if enabled and issues exist
-    if issues and AUTO_FIX_ENABLED:
-        fixed = fix_submission(submission_path, base_name)
-        if fixed:
-            logger.info(f"[{base_name}] Auto-fix applied. Retrying validation...")
-            return analyze_feed(submission_path)
-
-    # Final decision and logging
-    with open(log_path, "w") as log_file:
-        if not issues:
-            log_file.write("Validation PASSED.\n")
-            logger.info(f"[{base_name}] Validation PASSED.")
-            log_event("validation_passed", base_name, "structure_check", "All checks passed")
-            return True
+            except Exception as e:
+                issue(f"Error parsing audit.xml contents: {e}", AUDIT_CONTENT_ERROR, failing_file)
+
+        # Validate schema.txt against data files
+        if self.has_schema:
+            failing_file = "schema.txt"
+            try:
+                if schema_error:
+                    raise schema_error
+                for data_file in self.data_files:
+                    failing_file = os.path.basename(data_file)
+                    scan = scans[os.path.normpath(data_file)]
+                    if scan.error:
+                        raise scan.error
+                    errors = scan.errors
+                    issues.extend(errors)
+                    if scan.accumulator is not None:
+                        self.unlisted_errors += scan.accumulator.total - len(errors)
+                        records.extend(
+                            (code, failing_file, line_no, column, count)
+                            for code, line_no, column, count in scan.accumulator.records()
+                        )
+            except Exception as e:
+                issue(f"Error validating schema: {e}", SCHEMA_ERROR, failing_file)
         else:
-            log_file.write("Validation FAILED:\n")
-            for issue in issues:
-                log_file.write(f"- {issue}\n")
-                logger.warning(f"[{base_name}] {issue}")
-            log_event(
-                event="validation_failed",
-                submission=base_name,
-                event_type="schema_validation",
-                detail=f"{len(issues)} issues found: " + "; ".join(issues[:3]),
-                critical=True,
-                recommended_action="Check feed_analysis.log in rejected folder for full list of errors."
-            )
-            return False
+            issue("schema.txt not found in submission.", SCHEMA_MISSING, "schema.txt")
+
+        self.records = records
+        return issues
+
+def report_verdict(
+    submission_path: str,
+    issues: List[str],
+    issue_count: Optional[int] = None,
+    records: Optional[List[IssueRecord]] = None,
+) -> bool:
+    """
+    Writes feed_analysis.log, logs the final decision for a submission and appends it to
+    the validation report.
+
+    Args:
+        submission_path: Path to the unpacked submission folder
+        issues: Validation issues found (empty if the submission passed)
+        issue_count: Total number of issues, if more were counted than listed (default: len(issues))
+        records: Structured issues for the validation report (default: none written)
+
+    Returns:
+        True if there are no issues, False otherwise
+    """
+    base_name = os.path.basename(submission_path)
+    log_path = os.path.join(submission_path, "feed_analysis.log")
+    if issue_count is None:
+        issue_count = len(issues)
+    with stage(base_name, "reporting", rows=issue_count):
+        if records is not None:
+            append_report(base_name, not issues, issue_count, records)
+
+        # Final decision and logging
+        with open(log_path, "w") as log_file:
+            if not issues:
+                log_file.write("Validation PASSED.\n")
+                logger.info(f"[{base_name}] Validation PASSED.")
+                log_event("validation_passed", base_name, "structure_check", "All checks passed")
+                return True
+            else:
+                log_file.write("Validation FAILED:\n")
+                for issue in issues:
+                    log_file.write(f"- {issue}\n")
+                    logger.warning(f"[{base_name}] {issue}")
+                if issue_count == len(issues):
+                    action = "Check feed_analysis.log in rejected folder for full list of errors."
+                else:
+                    # Data file errors beyond the example caps (or after a fail-fast stop) are only counted
+                    action = (
+                        f"Check feed_analysis.log in rejected folder. The list is truncated: it shows at most "
+                        f"{error_accumulator.MAX_EXAMPLES_PER_CATEGORY} examples per error type and column (only "
+                        f"the first error with fail-fast), so fix every row with a listed error type."
+                    )
+                log_event(
+                    event="validation_failed",
+                    submission=base_name,
+                    event_type="schema_validation",
+                    detail=f"{issue_count} issues found: " + "; ".join(issues[:3]),
+                    critical=True,
+                    recommended_action=action
+                )
+                return False
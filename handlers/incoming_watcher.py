@@ -0,0 +1,197 @@
+"""
+incoming_watcher.py
+
+Detects submission archives that have completely arrived in the incoming folder, for the
+long-running watch mode of main.py.
+
+Two implementations share one interface (poll(timeout) -> list of ready file names):
+- InotifyWatcher: Linux inotify via ctypes. A file is ready on IN_CLOSE_WRITE (the sender
+  finished writing) or IN_MOVED_TO (atomically renamed into the folder).
+- PollingWatcher: portable fallback based on os.scandir. A file is ready once its size and
+  mtime are unchanged between two consecutive scans.
+
+Files already present at startup go through the size-stable check in both cases. Each
+(name, size, mtime) is reported once; re-dropping a changed file reports it again.
+"""
+
+import os
+import select
+import struct
+import ctypes
+import ctypes.util
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger()
+
+# Seconds between directory scans (polling fallback and startup stability checks)
+POLL_INTERVAL = 0.25
+
+# inotify constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+FileSignature = Tuple[int, int]  # (size, mtime_ns)
+
+def _signature(path: str) -> Optional[FileSignature]:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+class PollingWatcher:
+    """
+    Portable watcher: reports files whose size and mtime are stable across two scans.
+
+    Args:
+        directory: Folder to watch
+        accept: Predicate on file names (e.g. is_submission_archive)
+    """
+
+    def __init__(self, directory: str, accept: Callable[[str], bool]):
+        self.directory = directory
+        self.accept = accept
+        self._last_seen: Dict[str, FileSignature] = {}
+        self._reported: Dict[str, FileSignature] = {}
+
+    def poll(self, timeout: float = POLL_INTERVAL) -> List[str]:
+        """Waits up to timeout seconds, then returns newly completed file names."""
+        if timeout > 0:
+            select.select([], [], [], timeout)
+        return self.check_stable(self._scan())
+
+    def check_stable(self, names: Iterable[str]) -> List[str]:
+        """
+        Returns the names whose signature did not change since the previous call and
+        that have not been reported with that signature yet.
+        """
+        ready = []
+        current = {}
+        for name in names:
+            signature = _signature(os.path.join(self.directory, name))
+            if signature is None:
+                continue
+            current[name] = signature
+            if self._last_seen.get(name) == signature and self._reported.get(name) != signature:
+                self._reported[name] = signature
+                ready.append(name)
+        self._last_seen = current
+        return ready
+
+    def forget(self, name: str):
+        """Drops state for a deleted or moved-away file."""
+        self._last_seen.pop(name, None)
+        self._reported.pop(name, None)
+
+    def mark_reported(self, name: str) -> bool:
+        """Records name as reported; returns False if it was already reported unchanged."""
+        signature = _signature(os.path.join(self.directory, name))
+        if signature is None or self._reported.get(name) == signature:
+            return False
+        self._reported[name] = signature
+        return True
+
+    def _scan(self) -> List[str]:
+        with os.scandir(self.directory) as entries:
+            names = [entry.name for entry in entries if entry.is_file() and self.accept(entry.name)]
+        for name in set(self._reported) - set(names):
+            self._reported.pop(name, None)
+        return names
+
+    def close(self):
+        pass
+
+class InotifyWatcher(PollingWatcher):
+    """
+    inotify-based watcher (Linux). Falls back to a full rescan on queue overflow.
+
+    Raises:
+        OSError: If inotify is unavailable; callers then use PollingWatcher
+    """
+
+    def __init__(self, directory: str, accept: Callable[[str], bool]):
+        super().__init__(directory, accept)
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+        if self._libc.inotify_add_watch(self._fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+        # Files that existed before the watch started may still be growing
+        self._unsettled: Set[str] = set(self._scan())
+
+    def poll(self, timeout: float = POLL_INTERVAL) -> List[str]:
+        """Waits up to timeout seconds for events, then returns newly completed file names."""
+        if self._unsettled:
+            timeout = min(timeout, POLL_INTERVAL)
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+
+        ready = []
+        if readable:
+            ready.extend(self._read_events())
+        if self._unsettled:
+            stable = self.check_stable(self._unsettled)
+            self._unsettled.difference_update(stable)
+            self._unsettled.intersection_update(self._last_seen)  # drop files that disappeared
+            ready.extend(stable)
+        return ready
+
+    def _read_events(self) -> List[str]:
+        ready = []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return ready
+
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                logger.warning(f"inotify queue overflow on {self.directory}; rescanning.")
+                self._unsettled.update(self._scan())
+            elif mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                raise OSError(f"Watched directory {self.directory} was removed or moved")
+            elif not name or not self.accept(name):
+                continue
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                self.forget(name)
+                self._unsettled.discard(name)
+            elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                self._unsettled.discard(name)
+                if self.mark_reported(name):
+                    ready.append(name)
+        return ready
+
+    def close(self):
+        os.close(self._fd)
+
+def create_watcher(directory: str, accept: Callable[[str], bool]) -> PollingWatcher:
+    """
+    Returns an InotifyWatcher where inotify is available, otherwise a PollingWatcher.
+    """
+    try:
+        watcher = InotifyWatcher(directory, accept)
+        logger.info(f"Watching {directory} with inotify.")
+        return watcher
+    except (OSError, AttributeError) as e:
+        logger.info(f"inotify unavailable ({e}); polling {directory} every {POLL_INTERVAL}s.")
+        return PollingWatcher(directory, accept)
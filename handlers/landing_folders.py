@@ -0,0 +1,63 @@
+"""
+landing_folders.py
+
+Folder layout of the landing zone and the naming rules of submission archives.
+Kept free of heavy imports, so the CLI can check incoming/ for work without loading the
+validation pipeline (see main.py and handlers/pipeline.py).
+"""
+
+import os
+from typing import List
+from utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger()
+
+# Define input/output directories
+INCOMING_DIR = "./incoming"
+REJECTED_DIR = "./rejected"
+READY_DIR = "./ready_for_mft"
+
+# Accepted submission archive suffixes (longest first so .tar.gz wins over .gz)
+SUBMISSION_SUFFIXES = (".tar.bz2", ".tar.zst", ".tar.gz", ".tar.xz", ".tbz2", ".tzst", ".tgz", ".txz", ".tar")
+
+def is_submission_archive(file_name: str) -> bool:
+    """
+    Returns True if the file name has one of the accepted archive suffixes.
+    """
+    return file_name.endswith(SUBMISSION_SUFFIXES)
+
+def extract_submission_base_name(tar_path: str) -> str:
+    """
+    Extract the base name of the submission from the TAR file name.
+    Assumes file format: <base_name>.tar (or a compressed variant, e.g. <base_name>.tar.gz)
+    """
+    base = os.path.basename(tar_path)
+    for suffix in SUBMISSION_SUFFIXES:
+        if base.endswith(suffix):
+            return base[:-len(suffix)]
+    return base
+
+def list_submission_archives(incoming_dir: str) -> List[str]:
+    """
+    Lists the submission archives in a folder. An archive that would unpack into the same
+    workspace folder as one listed before it (e.g. X.tar and X.tar.gz) is skipped and logged.
+
+    Args:
+        incoming_dir: Folder to list (must exist)
+
+    Returns:
+        Archive file names, in directory order
+    """
+    tar_files = []
+    submission_names = set()
+    for f in os.listdir(incoming_dir):
+        if not is_submission_archive(f):
+            continue
+        submission_name = extract_submission_base_name(f)
+        if submission_name in submission_names:
+            logger.error(f"Skipping {f}: another archive for submission {submission_name} is already queued.")
+            continue
+        submission_names.add(submission_name)
+        tar_files.append(f)
+    return tar_files
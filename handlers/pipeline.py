@@ -0,0 +1,303 @@
+"""
+pipeline.py
+
+The validation pipeline behind main.py: unpacks and validates submissions (serially or in a
+process pool), routes them to ready_for_mft/ or rejected/, hands accepted ones to MFT, and
+runs the --watch daemon loop. Imported by the CLI only once there is work to do, since it
+loads every handler and service (tarfile, XML parsing, multiprocessing, the MFT client).
+"""
+
+import os
+import queue
+import signal
+import functools
+import threading
+import multiprocessing
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Iterable, Iterator, List, Tuple
+from handlers.landing_folders import (
+    INCOMING_DIR, READY_DIR, REJECTED_DIR, extract_submission_base_name, is_submission_archive, list_submission_archives
+)
+from handlers.unpacker import unpack_tar, stream_unpack_tar
+from handlers import feed_analyzer
+from handlers.feed_analyzer import analyze_feed
+from handlers.incoming_watcher import POLL_INTERVAL, create_watcher
+from handlers.submission_router import publish_submission
+from services import error_accumulator, schema_registry, validation_cache, validation_report
+from services.mft_sender import send_to_mft, wait_for_transfer, wait_for_transfers
+from utils.logger import get_logger, start_log_listener, configure_worker_logging
+from utils import metrics
+from utils.grafana_logger import EventQueueListener, set_event_queue
+
+# Initialize the application logger
+logger = get_logger()
+
+# Maximum number of detected arrivals waiting for a worker in watch mode
+WATCH_QUEUE_SIZE = 256
+
+def process_submission(tar_path: str, stream: bool = False) -> Tuple[str, bool]:
+    """
+    Unpacks and validates a single submission. Safe to run in a worker process:
+    it only touches the submission's own workspace folder.
+
+    Args:
+        tar_path: Path to the .tar archive
+        stream: Validate data files while unpacking instead of reading them back afterwards
+
+    Returns:
+        Tuple of (unpacked submission folder or "" if unpacking failed, validation result)
+    """
+    logger.info(f"Processing TAR file: {os.path.basename(tar_path)}")
+    submission_name = extract_submission_base_name(os.path.basename(tar_path))
+    with metrics.profile_submission(submission_name):
+        archive_bytes = os.path.getsize(tar_path) if os.path.exists(tar_path) else 0
+
+        cache_key = None
+        if validation_cache.CACHE_ENABLED:
+            try:
+                with metrics.stage(submission_name, "hash", bytes=archive_bytes):
+                    cache_key = validation_cache.submission_key(tar_path, submission_name)
+            except OSError as e:
+                logger.warning(f"Could not hash {tar_path} for the validation cache: {e}")
+
+        # Step 1: Unpack the feed submission (no in-stream validation if a verdict is cached)
+        if stream and not (cache_key and validation_cache.has_cached_verdict(cache_key)):
+            with metrics.stage(submission_name, "stream_unpack", bytes=archive_bytes) as timing:
+                submission_dir, prescanned, member_sizes = stream_unpack_tar(tar_path)
+                timing.rows = sum(scan.line_count for scan in prescanned.values())
+        else:
+            with metrics.stage(submission_name, "unpack", bytes=archive_bytes):
+                submission_dir, prescanned, member_sizes = unpack_tar(tar_path), None, None
+        if not submission_dir:
+            return "", False
+
+        # Step 2: Validate the feed
+        return submission_dir, analyze_feed(
+            submission_dir, prescanned=prescanned, cache_key=cache_key, member_sizes=member_sizes,
+        )
+
+def _init_worker(
+    log_queue, event_queue, scan_workers, cache_enabled, report_enabled, fail_fast, profile_dir, registry_dir,
+    ignore_sigint=False,
+):
+    """Pool initializer: send logs and Grafana events to the parent process."""
+    if ignore_sigint:
+        # Ctrl+C reaches the whole process group; the parent decides how to shut down
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+    configure_worker_logging(log_queue)
+    set_event_queue(event_queue)
+    feed_analyzer.SCAN_WORKERS = scan_workers
+    validation_cache.CACHE_ENABLED = cache_enabled
+    validation_report.REPORT_ENABLED = report_enabled
+    error_accumulator.FAIL_FAST = fail_fast
+    metrics.PROFILE_DIR = profile_dir
+    schema_registry.REGISTRY_DIR = registry_dir
+    schema_registry.warm_registry()  # no-op for schemas inherited from the parent
+
+@contextmanager
+def worker_pool(workers: int, ignore_sigint: bool = False) -> Iterator[ProcessPoolExecutor]:
+    """
+    Process pool for process_submission. Log records and Grafana events from the workers
+    are written by listeners in this process, so app.log and the JSONL file have a single writer.
+
+    Args:
+        workers: Number of worker processes
+        ignore_sigint: Make workers ignore SIGINT so in-flight submissions survive Ctrl+C
+    """
+    log_queue = multiprocessing.Queue()
+    event_queue = multiprocessing.Queue()
+    log_listener = start_log_listener(log_queue)
+    event_listener = EventQueueListener(event_queue)
+    event_listener.start()
+    try:
+        initargs = (
+            log_queue, event_queue, feed_analyzer.SCAN_WORKERS, validation_cache.CACHE_ENABLED,
+            validation_report.REPORT_ENABLED, error_accumulator.FAIL_FAST, metrics.PROFILE_DIR,
+            schema_registry.REGISTRY_DIR, ignore_sigint,
+        )
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=initargs) as pool:
+            yield pool
+    finally:
+        log_listener.stop()
+        event_listener.stop()
+
+def _process_in_pool(tar_paths: List[str], workers: int, stream: bool) -> Iterable[Tuple[str, bool]]:
+    """
+    Runs process_submission for all archives in a process pool and yields the results
+    in input order.
+    """
+    with worker_pool(workers) as pool:
+        yield from pool.map(functools.partial(process_submission, stream=stream), tar_paths)
+
+def route_submission(tar_name: str, submission_dir: str, success: bool):
+    """
+    Moves a validated submission to ready_for_mft/ (and hands it to MFT) or rejected/
+    atomically (see submission_router).
+
+    Args:
+        tar_name: File name of the archive (for logging)
+        submission_dir: Unpacked submission folder, or "" if unpacking failed
+        success: Validation result
+    """
+    if not submission_dir:
+        logger.error(f"Unpacking failed for {tar_name}")
+        metrics.write_prometheus_file()
+        return
+
+    # Step 3: Route based on result
+    submission_name = os.path.basename(submission_dir)
+    if success:
+        # An upload of an earlier submission with this name still reads ready_for_mft/<name>
+        wait_for_transfer(submission_name)
+    with metrics.stage(submission_name, "route", bytes=_folder_size(submission_dir)):
+        final_path = publish_submission(submission_dir, READY_DIR if success else REJECTED_DIR)
+    if success:
+        send_to_mft(final_path)  # simulated, or queued for a background upload (see mft_sender)
+    metrics.write_prometheus_file()
+
+def _folder_size(folder: str) -> int:
+    """Total size of the files directly inside folder (submissions are flat)."""
+    with os.scandir(folder) as it:
+        return sum(entry.stat().st_size for entry in it if entry.is_file())
+
+def process_all_tars(workers: int = 1, stream: bool = False):
+    """
+    Process all .tar files (plain or compressed) in the incoming directory.
+    For each file:
+    - unpack it
+    - analyze the feed
+    - move to ready or rejected
+    - log results
+
+    Args:
+        workers: Number of processes used to unpack and validate submissions (1 = serial)
+        stream: Validate data files while unpacking (see stream_unpack_tar)
+    """
+    if not os.path.exists(INCOMING_DIR):
+        logger.error(f"Incoming directory '{INCOMING_DIR}' does not exist.")
+        return
+
+    tar_files = list_submission_archives(INCOMING_DIR)
+    if not tar_files:
+        logger.info("No .tar files found in incoming directory.")
+        return
+
+    tar_paths = [os.path.join(INCOMING_DIR, tar_name) for tar_name in tar_files]
+    if workers > 1 and len(tar_paths) > 1:
+        results = _process_in_pool(tar_paths, min(workers, len(tar_paths)), stream)
+    else:
+        results = map(functools.partial(process_submission, stream=stream), tar_paths)
+
+    for tar_name, (submission_dir, success) in zip(tar_files, results):
+        route_submission(tar_name, submission_dir, success)
+    wait_for_transfers()
+    metrics.write_prometheus_file()
+
+def watch_incoming(workers: int = 1, stream: bool = False, queue_size: int = WATCH_QUEUE_SIZE):
+    """
+    Runs as a daemon: processes every archive that completely arrives in the incoming
+    directory (including those already there at startup) until SIGTERM or SIGINT.
+
+    A watcher thread feeds completed arrivals into a bounded queue; this thread hands them
+    to the worker pool (or processes them inline when workers == 1) and routes each result
+    as soon as it is ready. On shutdown, submissions already being processed are finished
+    and routed, and queued MFT uploads completed; queued arrivals stay in incoming/ for the
+    next start.
+
+    Args:
+        workers: Number of processes used to unpack and validate submissions (1 = inline)
+        stream: Validate data files while unpacking (see stream_unpack_tar)
+        queue_size: Maximum number of detected arrivals waiting for a worker
+    """
+    if not os.path.exists(INCOMING_DIR):
+        logger.error(f"Incoming directory '{INCOMING_DIR}' does not exist.")
+        return
+
+    stop = threading.Event()
+
+    def _request_stop(signum, frame):
+        logger.info(f"Received {signal.Signals(signum).name}; finishing in-flight submissions...")
+        stop.set()
+
+    previous_handlers = {signum: signal.signal(signum, _request_stop) for signum in (signal.SIGTERM, signal.SIGINT)}
+    work_queue = queue.Queue(maxsize=queue_size)
+    watcher = create_watcher(INCOMING_DIR, is_submission_archive)
+
+    def _watch():
+        try:
+            while not stop.is_set():
+                for tar_name in watcher.poll():
+                    while not stop.is_set():
+                        try:
+                            work_queue.put(tar_name, timeout=POLL_INTERVAL)
+                            break
+                        except queue.Full:
+                            continue
+        except Exception as e:
+            logger.exception(f"Watching {INCOMING_DIR} failed: {e}")
+            stop.set()
+
+    watch_thread = threading.Thread(target=_watch, name="incoming-watcher", daemon=True)
+    watch_thread.start()
+    logger.info(f"Watching {INCOMING_DIR} for submissions (workers={workers}). Send SIGTERM to stop.")
+
+    process = functools.partial(process_submission, stream=stream)
+    in_flight = {}       # future -> tar name
+    active = set()       # submission names being processed (they share a workspace folder)
+    deferred = deque()   # arrivals whose submission name is currently active
+
+    def _next_archive(timeout: float):
+        for _ in range(len(deferred)):
+            tar_name = deferred.popleft()
+            if extract_submission_base_name(tar_name) not in active:
+                return tar_name
+            deferred.append(tar_name)
+        try:
+            tar_name = work_queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if extract_submission_base_name(tar_name) in active:
+            deferred.append(tar_name)
+            return None
+        return tar_name
+
+    try:
+        with (worker_pool(workers, ignore_sigint=True) if workers > 1 else nullcontext()) as pool:
+            while not stop.is_set() or in_flight:
+                if pool is None:
+                    tar_name = _next_archive(POLL_INTERVAL)
+                    if tar_name and not stop.is_set():
+                        try:
+                            route_submission(tar_name, *process(os.path.join(INCOMING_DIR, tar_name)))
+                        except Exception as e:
+                            logger.exception(f"Processing {tar_name} failed: {e}")
+                    continue
+
+                # Keep every worker busy, then route whatever finishes first
+                while not stop.is_set() and len(in_flight) < workers:
+                    tar_name = _next_archive(0 if in_flight else POLL_INTERVAL)
+                    if not tar_name:
+                        break
+                    active.add(extract_submission_base_name(tar_name))
+                    in_flight[pool.submit(process, os.path.join(INCOMING_DIR, tar_name))] = tar_name
+
+                if in_flight:
+                    done, _ = wait(in_flight, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        tar_name = in_flight.pop(future)
+                        active.discard(extract_submission_base_name(tar_name))
+                        try:
+                            route_submission(tar_name, *future.result())
+                        except Exception as e:
+                            logger.exception(f"Processing {tar_name} failed: {e}")
+    finally:
+        stop.set()
+        watch_thread.join()
+        watcher.close()
+        wait_for_transfers()
+        metrics.write_prometheus_file()
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+        logger.info("Watch mode stopped.")
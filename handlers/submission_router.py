@@ -0,0 +1,265 @@
+"""
+submission_router.py
+
+Moves validated submissions from the workspace into their output folder (ready_for_mft/ or
+rejected/) so that a submission is either published completely or not at all.
+
+On one filesystem a submission is published with a single os.rename of its folder. When the
+workspace and the output folder are on different filesystems (detected up front from st_dev,
+or from EXDEV when rename refuses, e.g. across bind mounts of one device), the files are
+copied into <output>/.staging/ with utils/file_copy.py (copy_file_range, falling back to
+sendfile, then to a buffered copy where the kernel or filesystem does not support it), synced to disk and then
+renamed into place; the workspace folder is deleted afterwards. An earlier submission with the
+same name is swapped out and deleted rather than merged with the new one.
+
+Each routing is recorded in a journal (<output>/.staging/<submission>.route.json) until it is
+complete, and recover_routings() finishes or rolls back routings interrupted by a crash:
+- copying:   the staged copy may be incomplete; it is deleted (the submission is re-routed
+             when its archive is processed again)
+- staged:    the staged copy is complete; it is published, then cleaned up as below
+- published: the submission is in place; the displaced older copy and, after a copy,
+             the workspace folder are deleted
+"""
+
+import os
+import json
+import errno
+import shutil
+import tempfile
+from typing import Dict, Optional
+from utils.file_copy import copy_stream
+from utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger()
+
+# Folder inside each output folder holding staged copies, displaced submissions and journals
+STAGING_DIR_NAME = ".staging"
+
+def is_same_filesystem(path_a: str, path_b: str) -> bool:
+    """
+    Returns True if both existing paths are on the same device, i.e. a rename between
+    them does not have to copy data.
+    """
+    return os.stat(path_a).st_dev == os.stat(path_b).st_dev
+
+def publish_submission(submission_dir: str, target_root: str) -> str:
+    """
+    Moves a submission folder to <target_root>/<submission name> atomically, replacing an
+    earlier submission of the same name.
+
+    Args:
+        submission_dir: Submission folder in the workspace
+        target_root: Output folder (created if missing)
+
+    Returns:
+        Path of the published submission folder
+    """
+    submission_dir = os.path.abspath(submission_dir)
+    target_root = os.path.abspath(target_root)
+    submission_name = os.path.basename(submission_dir)
+    staging_dir = os.path.join(target_root, STAGING_DIR_NAME)
+    os.makedirs(staging_dir, exist_ok=True)
+
+    journal_path = os.path.join(staging_dir, f"{submission_name}.route.json")
+    if os.path.exists(journal_path):
+        # Interrupted earlier and not recovered at startup (library use); settle it first
+        _recover(journal_path)
+
+    journal = {
+        "source": submission_dir,
+        "final": os.path.join(target_root, submission_name),
+        "old": os.path.join(staging_dir, f"{submission_name}.old"),
+    }
+
+    renamed = False
+    if is_same_filesystem(submission_dir, target_root):
+        journal.update(staged=submission_dir, state="staged")
+        _write_journal(journal_path, journal)
+        try:
+            _swap_in(journal)
+            renamed = True
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+
+    if not renamed:
+        logger.info(f"[{submission_name}] {target_root} is on another filesystem than the workspace; copying")
+        journal.update(staged=os.path.join(staging_dir, f"{submission_name}.new"), state="copying")
+        _write_journal(journal_path, journal)
+        _remove_path(journal["staged"])
+        copy_tree(submission_dir, journal["staged"])
+        journal["state"] = "staged"
+        _write_journal(journal_path, journal)
+        _swap_in(journal)
+
+    journal["state"] = "published"
+    _write_journal(journal_path, journal)
+    _finish(journal_path, journal)
+    return journal["final"]
+
+def recover_routings(*target_roots: str) -> int:
+    """
+    Finishes or rolls back routings interrupted by a crash (see the module docstring).
+    Run at startup, before any submission is processed.
+
+    Args:
+        target_roots: Output folders to check
+
+    Returns:
+        Number of interrupted routings found
+    """
+    recovered = 0
+    for target_root in target_roots:
+        staging_dir = os.path.join(target_root, STAGING_DIR_NAME)
+        if not os.path.isdir(staging_dir):
+            continue
+        for name in sorted(os.listdir(staging_dir)):
+            if name.endswith(".route.json"):
+                _recover(os.path.join(staging_dir, name))
+                recovered += 1
+        _remove_empty_dir(staging_dir)
+    return recovered
+
+def copy_tree(source: str, target: str):
+    """
+    Copies a folder (files, subfolders and symlinks) with copy_file and syncs every
+    copied file and folder to disk. target must not exist.
+    """
+    os.makedirs(target)
+    with os.scandir(source) as it:
+        for entry in it:
+            target_path = os.path.join(target, entry.name)
+            if entry.is_symlink():
+                os.symlink(os.readlink(entry.path), target_path)
+            elif entry.is_dir():
+                copy_tree(entry.path, target_path)
+            else:
+                copy_file(entry.path, target_path)
+    shutil.copystat(source, target)
+    _fsync_dir(target)
+
+def copy_file(source: str, target: str):
+    """
+    Copies a file with utils.file_copy.copy_stream (copy_file_range, sendfile or a buffered
+    copy). Permissions and timestamps are copied and the data is synced to disk.
+    """
+    with open(source, "rb", buffering=0) as src, open(target, "wb", buffering=0) as dst:
+        copy_stream(src, dst)
+        os.fsync(dst.fileno())
+    shutil.copystat(source, target)
+
+def _swap_in(journal: Dict[str, str]):
+    """
+    Renames the staged folder to its final path. An existing submission of the same name is
+    first moved aside to the journal's "old" path, and moved back if the rename fails.
+    """
+    staged, final, old = journal["staged"], journal["final"], journal["old"]
+    displaced = False
+    if os.path.lexists(final):
+        _remove_path(old)
+        os.rename(final, old)
+        displaced = True
+    try:
+        os.rename(staged, final)
+    except OSError:
+        if displaced:
+            os.rename(old, final)
+        raise
+    _fsync_dir(os.path.dirname(final))
+
+def _finish(journal_path: str, journal: Dict[str, str]):
+    """Deletes what a published routing left behind, then its journal."""
+    _remove_path(journal["old"])
+    if journal["staged"] != journal["source"]:
+        _remove_path(journal["source"])
+    os.remove(journal_path)
+    _remove_empty_dir(os.path.dirname(journal_path))
+
+def _recover(journal_path: str):
+    """Finishes or rolls back the routing recorded in journal_path."""
+    journal = _read_journal(journal_path)
+    if journal is None:
+        logger.warning(f"Discarding unreadable routing journal {journal_path}")
+        os.remove(journal_path)
+        return
+
+    submission_name = os.path.basename(journal["final"])
+    state = journal["state"]
+    if state == "copying":
+        _remove_path(journal["staged"])
+        if not os.path.lexists(journal["final"]) and os.path.lexists(journal["old"]):
+            os.rename(journal["old"], journal["final"])
+        os.remove(journal_path)
+        logger.warning(
+            f"[{submission_name}] Rolled back interrupted copy to {os.path.dirname(journal['final'])}; "
+            f"the submission stays in {journal['source']}"
+        )
+        return
+
+    if state == "staged":
+        if os.path.lexists(journal["staged"]):
+            _swap_in(journal)
+        elif not os.path.lexists(journal["final"]) and os.path.lexists(journal["old"]):
+            # Neither the staged copy nor a published one: keep the previous submission
+            os.rename(journal["old"], journal["final"])
+            os.remove(journal_path)
+            logger.error(f"[{submission_name}] Interrupted routing lost its staged copy; restored the previous one")
+            return
+        journal["state"] = "published"
+        _write_journal(journal_path, journal)
+
+    _finish(journal_path, journal)
+    logger.warning(f"[{submission_name}] Completed interrupted routing to {journal['final']}")
+
+def _write_journal(journal_path: str, journal: Dict[str, str]):
+    """Replaces the journal atomically and durably (temp file, fsync, rename, directory fsync)."""
+    directory = os.path.dirname(journal_path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(journal, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, journal_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    _fsync_dir(directory)
+
+def _read_journal(journal_path: str) -> Optional[Dict[str, str]]:
+    try:
+        with open(journal_path, "r", encoding="utf-8") as f:
+            journal = json.load(f)
+    except (OSError, ValueError):
+        return None
+    required = ("source", "final", "old", "staged", "state")
+    if not isinstance(journal, dict) or any(not isinstance(journal.get(key), str) for key in required):
+        return None
+    return journal
+
+def _remove_path(path: str):
+    """Deletes a folder tree, file or symlink if it exists."""
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+def _remove_empty_dir(path: str):
+    try:
+        os.rmdir(path)
+    except OSError:
+        pass  # still in use (or already gone)
+
+def _fsync_dir(path: str):
+    """Makes renames and new entries in a folder durable (no-op where folders cannot be opened)."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -3,30 +3,100 @@ unpacker.py
 
 Responsible for unpacking incoming .tar archive submissions into a working directory.
 Each .tar file is expected to contain one feed submission folder, which will be unpacked
-under workspace/<submission_name>/ for further validation and processing.
+under workspace/<submission_name>/ for further validation and processing. A folder left
+there by an earlier run is deleted first, so unpacking always starts from an empty folder.
+
+Compressed archives (.tar.gz/.tgz, .tar.bz2/.tbz2, .tar.xz/.txz, .tar.zst/.tzst) are
+decompressed on the fly while members are read; nothing is decompressed to disk first.
+zstd needs Python 3.14+ (native tarfile support) or the optional 'zstandard' package.
+
+stream_unpack_tar() is a streaming alternative: members are read sequentially through
+tarfile's stream mode and each data file is schema-validated while its bytes are written,
+so the analyzer does not have to read the unpacked data files back from disk (compressed
+archives are decompressed once more beforehand to find schema.txt, see
+COMPRESSED_SCHEMA_PREPASS). A data file is not written at all once its validation finds an error auto-fix cannot repair: the
+submission is rejected anyway, and rejected/ then holds it without that file.
 """
 
 import os
+import shutil
+import fnmatch
 import tarfile
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Dict, Iterator, Optional, Tuple
+from handlers import feed_analyzer
+from handlers.landing_folders import extract_submission_base_name
+from services.data_scanner import DataFileScan, scan_chunks
+from services.schema_registry import plan_from_bytes
+from services.schema_validator import READ_CHUNK_SIZE, ValidationPlan, iter_chunks
 from utils.logger import get_logger
 
+try:
+    import zstandard  # optional, only needed for .tar.zst before Python 3.14
+except ImportError:
+    zstandard = None
+
 # Initialize logger
 logger = get_logger()
 
-def extract_submission_base_name(tar_path: str) -> str:
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# Python 3.14+ tarfile reads zstd natively
+NATIVE_ZSTD = "zst" in tarfile.TarFile.OPEN_METH
+
+# Decompress compressed archives an extra time to read schema.txt before streaming (see
+# _read_schema_member). False saves that CPU time; their data members are then validated
+# from disk after unpacking, and written even when the submission will be rejected.
+COMPRESSED_SCHEMA_PREPASS = True
+
+@contextmanager
+def open_submission_tar(tar_path: str) -> Iterator[tarfile.TarFile]:
+    """
+    Opens a (possibly compressed) submission archive in sequential stream mode, so
+    members must be read in archive order. The compression is detected from the file
+    contents, not the suffix.
+
+    Args:
+        tar_path: Path to the archive
+
+    Yields:
+        Open TarFile
+    """
+    with open(tar_path, "rb") as raw:
+        is_zstd = raw.read(len(ZSTD_MAGIC)) == ZSTD_MAGIC
+        raw.seek(0)
+        if is_zstd and not NATIVE_ZSTD:
+            if zstandard is None:
+                raise tarfile.CompressionError(
+                    "zstd-compressed submission requires Python 3.14+ or the 'zstandard' package"
+                )
+            with zstandard.ZstdDecompressor().stream_reader(raw) as reader:
+                with tarfile.open(fileobj=reader, mode="r|", copybufsize=READ_CHUNK_SIZE) as tar:
+                    yield tar
+        else:
+            # Large copy buffers: tarfile's default 16 KiB reads re-slice the decompression buffer each time
+            with tarfile.open(fileobj=raw, mode="r|*", copybufsize=READ_CHUNK_SIZE) as tar:
+                yield tar
+
+def _prepare_destination(dest_dir: str):
     """
-    Extract the base name of the submission from the TAR file name.
-    Assumes file format: <base_name>.tar
+    Creates an empty unpack folder. A folder left by an earlier run (e.g. a crash before
+    routing) is deleted first, so its files cannot leak into the new submission.
     """
-    base = os.path.basename(tar_path)
-    return base[:-4] if base.endswith(".tar") else base
+    if os.path.lexists(dest_dir):
+        logger.warning(f"Removing stale workspace folder {dest_dir} before unpacking")
+        if os.path.isdir(dest_dir) and not os.path.islink(dest_dir):
+            shutil.rmtree(dest_dir)
+        else:
+            os.remove(dest_dir)
+    os.makedirs(dest_dir)
 
 def unpack_tar(tar_path: str, destination_root: str = "./workspace") -> str:
     """
-    Unpacks a .tar file into a subdirectory under the workspace directory.
+    Unpacks a .tar file (or compressed variant) into a subdirectory under the workspace directory.
 
     Args:
-        tar_path: Path to the .tar archive to unpack
+        tar_path: Path to the archive to unpack
         destination_root: Root folder for unpacked contents (default: ./workspace)
 
     Returns:
@@ -39,14 +109,145 @@ def unpack_tar(tar_path: str, destination_root: str = "./workspace") -> str:
     # Derive target folder name based on the tar file name
     submission_name = extract_submission_base_name(tar_path)
     dest_dir = os.path.join(destination_root, submission_name)
-    os.makedirs(dest_dir, exist_ok=True)
+    _prepare_destination(dest_dir)
 
     try:
-        # Open and extract the contents of the tarball
-        with tarfile.open(tar_path, "r") as tar:
-            tar.extractall(path=dest_dir)
+        # Extract members in archive order so compressed input is decompressed in one pass
+        with open_submission_tar(tar_path) as tar:
+            for member in tar:
+                tar.extract(member, path=dest_dir)
         logger.info(f"Successfully unpacked {tar_path} to {dest_dir}")
         return dest_dir
     except Exception as e:
         logger.exception(f"Failed to unpack {tar_path}: {e}")
         return ""
+
+def _read_schema_member(tar_path: str) -> Optional[ValidationPlan]:
+    """
+    Loads schema.txt before streaming, so data members can be validated in-stream even when
+    they precede schema.txt in the archive (the usual alphabetical order). In an uncompressed
+    tar only member headers are read to locate it. A compressed archive is decompressed up to
+    schema.txt without writing anything (unless COMPRESSED_SCHEMA_PREPASS is off): a second
+    decompression pass, traded for not reading the unpacked data back from disk.
+
+    Returns:
+        Compiled schema, or None if the archive has no schema.txt, the schema cannot be
+        parsed (the analyzer reports those cases itself) or the prepass is off
+    """
+    try:
+        try:
+            with tarfile.open(tar_path, "r:") as tar:
+                member = tar.getmember("schema.txt")
+                with tar.extractfile(member) as f:
+                    return plan_from_bytes(f.read())
+        except tarfile.ReadError:  # compressed; members can only be reached in order
+            if not COMPRESSED_SCHEMA_PREPASS:
+                return None
+            with open_submission_tar(tar_path) as tar:
+                for member in tar:
+                    if member.isfile() and os.path.normpath(member.name) == "schema.txt":
+                        with tar.extractfile(member) as f:
+                            return plan_from_bytes(f.read())
+            return None
+    except Exception:
+        return None
+
+def _rejects_submission(scan: DataFileScan) -> bool:
+    """
+    Whether a (possibly unfinished) scan has already found a problem auto-fix cannot repair,
+    so the submission will be rejected whatever the rest of the file holds. The only fix
+    applied to data files is adding a missing header (see auto_fixer).
+    """
+    if scan.error is not None:
+        return True
+    if scan.accumulator is None or not scan.accumulator.total:
+        return False
+    return not (feed_analyzer.AUTO_FIX_ENABLED and scan.header_missing)
+
+def _tee_chunks(source: BinaryIO, target_path: str, keep: Callable[[], bool]) -> Iterator[bytes]:
+    """
+    Yields chunks read from source, writing each one to target_path first while keep()
+    returns True. Once it returns False the partly written file is deleted and the
+    remaining chunks are only yielded.
+    """
+    target = open(target_path, "wb")
+    try:
+        for chunk in iter_chunks(source):
+            if target is not None and not keep():
+                target.close()
+                os.remove(target_path)
+                target = None
+            if target is not None:
+                target.write(chunk)
+            yield chunk
+    finally:
+        if target is not None:
+            target.close()
+
+def stream_unpack_tar(
+    tar_path: str, destination_root: str = "./workspace",
+) -> Tuple[str, Dict[str, DataFileScan], Dict[str, int]]:
+    """
+    Unpacks a .tar file (or compressed variant) in stream mode, validating data members
+    while they are written.
+
+    Data members (<base_name>.U*.data) are scanned against schema.txt as their bytes pass
+    through; all other members are extracted as-is. Writing a data member stops, and what
+    was written of it is deleted, as soon as its scan finds an error auto-fix cannot repair
+    (see _rejects_submission); its scan is still returned. A data member is only scanned
+    without a schema (count and first line) when the schema was not available up front, in
+    which case the analyzer validates it from disk as before.
+
+    Args:
+        tar_path: Path to the .tar archive to unpack
+        destination_root: Root folder for unpacked contents (default: ./workspace)
+
+    Returns:
+        Tuple of (full path to the unpacked directory or "" on failure,
+        scans keyed by normalised data file path for analyze_feed(prescanned=...),
+        tar header sizes of the file members keyed by normalised path for
+        analyze_feed(member_sizes=...))
+    """
+    if not os.path.exists(tar_path):
+        logger.error(f"TAR file does not exist: {tar_path}")
+        return "", {}, {}
+
+    submission_name = extract_submission_base_name(tar_path)
+    dest_dir = os.path.join(destination_root, submission_name)
+    _prepare_destination(dest_dir)
+    data_pattern = f"{submission_name}.U*.data"
+
+    try:
+        schema = _read_schema_member(tar_path)
+        scans = {}
+        sizes = {}
+        with open_submission_tar(tar_path) as tar:
+            for member in tar:
+                name = os.path.normpath(member.name)
+                target_path = os.path.join(dest_dir, name)
+                if member.isfile():
+                    sizes[os.path.normpath(target_path)] = member.size
+                if not (member.isfile() and os.path.dirname(name) == "" and fnmatch.fnmatchcase(name, data_pattern)):
+                    tar.extract(member, path=dest_dir)
+                    continue
+
+                scan = DataFileScan(path=target_path)
+                with tar.extractfile(member) as source:
+                    chunks = _tee_chunks(source, target_path, lambda: not _rejects_submission(scan))
+                    scan_chunks(target_path, chunks, schema, scan=scan)
+                    for _ in chunks:  # finish the member if the scan stopped on a decode error
+                        pass
+                if os.path.exists(target_path) and _rejects_submission(scan):
+                    os.remove(target_path)  # errors in the last lines, found after the last chunk
+                if os.path.exists(target_path):
+                    os.chmod(target_path, member.mode)
+                    os.utime(target_path, (member.mtime, member.mtime))
+                else:
+                    logger.info(f"Not unpacking {name}: it fails validation, so the submission will be rejected")
+                scans[os.path.normpath(target_path)] = scan
+
+        logger.info(f"Successfully stream-unpacked {tar_path} to {dest_dir}")
+        return dest_dir, scans, sizes
+    except Exception as e:
+        logger.exception(f"Failed to unpack {tar_path}: {e}")
+        return "", {}, {}
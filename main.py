@@ -1,72 +1,137 @@
 """
 main.py
 
-Entry point for the Landing Zone Feed Validator.
-This script scans the incoming folder for .tar feed submissions, unpacks each,
+Entry point for the Landing Zone Feed Validator (the pipeline itself is handlers/pipeline.py).
+This script scans the incoming folder for .tar feed submissions (optionally compressed:
+.tar.gz, .tar.bz2, .tar.xz, .tar.zst and their short forms), unpacks each,
 validates structure and content, applies auto-fixes if enabled, and routes them
 to either ready_for_mft/ or rejected/ folders based on validation results.
 Logs high-level events for Grafana and ServiceNow integration.
-"""
 
-import os
-import shutil
-from unpacker import unpack_tar
-from handlers.feed_analyzer import analyze_feed
-from services.mft_sender import send_to_mft
-from utils.logger import get_logger
+Submissions can be unpacked and validated in parallel with --workers N; routing and
+MFT hand-off always happen in this (parent) process, in the same order as a serial run.
+With --mft-target, accepted submissions are uploaded by background threads while the
+next feeds are validated; the run waits for queued uploads before exiting.
+Large data files can additionally be validated chunk-parallel with --scan-workers N.
+With --stream-unpack, data files are validated while they are unpacked from the tar.
+Compiled schemas are shared by all submissions with the same schema.txt (see
+services/schema_registry.py); --schema-registry DIR keeps them across restarts.
+Every verdict is also appended to a compact daily report of issue records in reports/
+(see services/validation_report.py, which can query it); --no-report turns this off.
 
-# Initialize the application logger
-logger = get_logger()
+Every stage of every submission is timed (see utils/metrics.py): durations, bytes and rows
+go to the Grafana JSONL stream and logs/pipeline_metrics.prom; --profile DIR additionally
+writes a cProfile dump per submission.
 
-# Define input/output directories
-INCOMING_DIR = "./incoming"
-REJECTED_DIR = "./rejected"
-READY_DIR = "./ready_for_mft"
+Submissions are published to ready_for_mft/ and rejected/ atomically (rename, or a staged
+copy across filesystems; see handlers/submission_router.py), and routings interrupted by a
+crash are finished or rolled back at startup.
 
-# Ensure required directories exist
-os.makedirs(REJECTED_DIR, exist_ok=True)
-os.makedirs(READY_DIR, exist_ok=True)
+With --watch the validator runs as a daemon: completed arrivals in incoming/ are detected
+(inotify or stat polling), queued in a bounded work queue and processed as they land,
+until SIGTERM/SIGINT requests a graceful shutdown.
 
-def process_all_tars():
-    """
-    Process all .tar files in the incoming directory.
-    For each file:
-    - unpack it
-    - analyze the feed
-    - move to ready or rejected
-    - log results
-    """
-    if not os.path.exists(INCOMING_DIR):
-        logger.error(f"Incoming directory '{INCOMING_DIR}' does not exist.")
-        return
+The one-shot CLI is built for frequent (e.g. cron) runs: only the standard library basics,
+argument parsing and logging are loaded until an archive is found in incoming/, so a run
+with nothing to do exits in a few milliseconds. The pipeline, with all handlers, services
+and their imports, is loaded after that check (and always in watch mode).
+"""
 
-    tar_files = [f for f in os.listdir(INCOMING_DIR) if f.endswith(".tar")]
+import os
+import argparse
+from handlers.landing_folders import INCOMING_DIR, READY_DIR, REJECTED_DIR, is_submission_archive
+from utils.logger import get_logger
 
-    if not tar_files:
-        logger.info("No .tar files found in incoming directory.")
-        return
+# Initialize the application logger
+logger = get_logger()
 
-    for tar_name in tar_files:
-        tar_path = os.path.join(INCOMING_DIR, tar_name)
-        logger.info(f"Processing TAR file: {tar_name}")
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Validate and route .tar feed submissions from incoming/.")
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Number of submissions unpacked and validated in parallel (default: 1, serial)"
+    )
+    parser.add_argument(
+        "--scan-workers", type=int, default=1,
+        help="Processes used to validate one large .data file in parallel byte ranges (default: 1, serial)"
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="Run as a daemon that processes archives as they arrive in incoming/ (stop with SIGTERM)"
+    )
+    parser.add_argument(
+        "--fail-fast", action="store_true",
+        help="Stop validating a data file at its first error (the feed is rejected either way)"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Always re-validate, ignoring verdicts cached for identical archives"
+    )
+    parser.add_argument(
+        "--no-report", action="store_true",
+        help="Do not append verdicts to the daily validation report in reports/"
+    )
+    parser.add_argument(
+        "--stream-unpack", action="store_true",
+        help="Validate data files while streaming them out of the tar instead of reading them back"
+    )
+    parser.add_argument(
+        "--profile", metavar="DIR",
+        help="Write a cProfile dump per submission (<submission>.prof) into DIR"
+    )
+    parser.add_argument(
+        "--schema-registry", metavar="DIR",
+        help="Persist compiled schemas in DIR so restarts start with them warm (default: in memory only)"
+    )
+    parser.add_argument(
+        "--mft-target", metavar="DIR_OR_URL",
+        help="Upload accepted submissions to this folder or http(s):// endpoint in the background "
+             "(default: simulate the MFT transfer)"
+    )
+    parser.add_argument(
+        "--mft-workers", type=int,
+        help="Parallel MFT uploads with --mft-target (default: 4)"
+    )
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.scan_workers < 1:
+        parser.error("--scan-workers must be at least 1")
+    if args.mft_workers is not None and args.mft_workers < 1:
+        parser.error("--mft-workers must be at least 1")
+    return args
 
-        # Step 1: Unpack the feed submission
-        submission_dir = unpack_tar(tar_path)
-        if not submission_dir:
-            logger.error(f"Unpacking failed for {tar_name}")
-            continue
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.watch:
+        # Look for work before loading the pipeline, so a run over an empty incoming/ is cheap
+        if not os.path.exists(INCOMING_DIR):
+            logger.error(f"Incoming directory '{INCOMING_DIR}' does not exist.")
+            return
+        if not any(is_submission_archive(f) for f in os.listdir(INCOMING_DIR)):
+            logger.info("No .tar files found in incoming directory.")
+            return
 
-        # Step 2: Validate the feed
-        success = analyze_feed(submission_dir)
+    from handlers import feed_analyzer, pipeline
+    from handlers.submission_router import recover_routings
+    from services import error_accumulator, mft_sender, schema_registry, validation_cache, validation_report
+    from utils import metrics
 
-        # Step 3: Route based on result
-        if success:
-            final_path = os.path.join(READY_DIR, os.path.basename(submission_dir))
-            shutil.move(submission_dir, final_path)
-            send_to_mft(final_path)  # Optional step: simulate MFT transfer
-        else:
-            rejected_path = os.path.join(REJECTED_DIR, os.path.basename(submission_dir))
-            shutil.move(submission_dir, rejected_path)
+    feed_analyzer.SCAN_WORKERS = args.scan_workers
+    validation_cache.CACHE_ENABLED = not args.no_cache
+    validation_report.REPORT_ENABLED = not args.no_report
+    error_accumulator.FAIL_FAST = args.fail_fast
+    metrics.PROFILE_DIR = args.profile
+    mft_sender.MFT_TARGET = args.mft_target
+    if args.mft_workers is not None:
+        mft_sender.MFT_WORKERS = args.mft_workers
+    schema_registry.REGISTRY_DIR = args.schema_registry
+    recover_routings(READY_DIR, REJECTED_DIR)
+    schema_registry.warm_registry()
+    if args.watch:
+        pipeline.watch_incoming(workers=args.workers, stream=args.stream_unpack)
+    else:
+        pipeline.process_all_tars(workers=args.workers, stream=args.stream_unpack)
 
 if __name__ == "__main__":
-    process_all_tars()
+    main()
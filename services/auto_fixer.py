@@ -7,28 +7,41 @@ Examples include:
 - Adding missing headers to .data files
 
 Used when AUTO_FIX_ENABLED is enabled in the analyzer.
+
+Files are never loaded into memory: a header is added by writing it to a temp file in the
+same folder, block-copying the original bytes behind it (utils/file_copy.py: copy_file_range /
+sendfile where the OS supports them) and atomically renaming the temp file over the original.
 """
 
 import os
+import re
 import glob
+import shutil
+import tempfile
+from typing import Dict, List, Optional
+from services.data_scanner import DataFileScan, scan_first_line
+from services.schema_validator import READ_CHUNK_SIZE
+from utils.file_copy import copy_stream
 from utils.logger import get_logger
 from utils.grafana_logger import log_event
 
 # Initialize logger
 logger = get_logger()
 
-def fix_submission(submission_path: str, base_name: str) -> bool:
+def fix_submission(submission_path: str, base_name: str, scans: Optional[Dict[str, DataFileScan]] = None) -> List[str]:
     """
     Applies basic auto-fixes to a feed submission directory.
 
     Args:
         submission_path: Path to unpacked submission folder
         base_name: Base name used for identifying files in the submission
+        scans: Optional scan results from the analyzer, keyed by normalised data file path.
+            When given, header detection reuses them instead of reading the files again.
 
     Returns:
-        True if any fixes were applied, False if nothing changed
+        Paths of the files that were changed (empty, i.e. falsy, if nothing changed)
     """
-    fixed = False
+    fixed = []
 
     # --- Fix 1: Control file must be 0 bytes ---
     control_path = os.path.join(submission_path, f"{base_name}.control")
@@ -39,25 +52,47 @@ def fix_submission(submission_path: str, base_name: str) -> bool:
                 f.write("")
             logger.info(f"[{base_name}] Fixed: control file was not empty.")
             log_event("autofix_applied", base_name, "control_file_fix", "Reset control file to 0 bytes")
-            fixed = True
+            fixed.append(control_path)
 
     # --- Fix 2: Add header to .U*.data files if missing ---
     data_files = glob.glob(os.path.join(submission_path, f"{base_name}.U*.data"))
     for file_path in data_files:
-        with open(file_path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
+        scan = (scans or {}).get(os.path.normpath(file_path)) or scan_first_line(file_path)
 
         # Simple heuristic: no letters in the first line likely means missing header
-        if lines and not any(char.isalpha() for char in lines[0]):
-            num_cols = len(lines[0].split(";"))
-            header = ";".join([f"COL{i+1}" for i in range(num_cols)]) + "\n"
-            lines.insert(0, header)
-
-            with open(file_path, "w", encoding="utf-8") as f:
-                f.writelines(lines)
+        if not scan.error and scan.header_missing:
+            num_cols = len(scan.first_line.split(";"))
+            header = ";".join([f"COL{i+1}" for i in range(num_cols)])
+            prepend_line(file_path, header)
 
             logger.info(f"[{base_name}] Fixed: added missing header to {os.path.basename(file_path)}")
             log_event("autofix_applied", base_name, "header_fix", f"Header added to {os.path.basename(file_path)}")
-            fixed = True
+            fixed.append(file_path)
 
     return fixed
+
+# First line ending in a file, as recognised by a text-mode read
+LINE_ENDING = re.compile(rb"\r\n|\r|\n")
+
+def prepend_line(file_path: str, line: str):
+    """
+    Inserts a line at the start of a file without loading the file into memory.
+    The line gets the same line ending as the file's first line (\n if it has none);
+    the original bytes are copied unchanged.
+
+    Args:
+        file_path: File to modify
+        line: Text of the new first line, without line ending
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path) or ".", prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb", buffering=0) as dst, open(file_path, "rb", buffering=0) as src:
+            head = src.read(READ_CHUNK_SIZE)
+            ending = LINE_ENDING.search(head)
+            dst.write(line.encode("utf-8") + (ending.group() if ending else b"\n") + head)
+            copy_stream(src, dst)
+        shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
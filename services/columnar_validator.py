@@ -0,0 +1,254 @@
+"""
+columnar_validator.py
+
+Optional NumPy backend for schema row validation.
+
+Rows are collected into blocks and each block is validated column by column on its raw
+bytes: the block is encoded once, the delimiter and newline positions give a (rows x columns)
+table of cell offsets, and the bytes of each typed column are gathered into a small
+(rows x width) matrix on which nullability and a conservative per-type test are evaluated
+for the whole column at once. Only typed columns are gathered; string columns cost nothing
+beyond their offsets. Each cell the vectorized test rejects is re-checked with the regular
+per-type checker, and failing cells are mapped back to line numbers.
+
+Rows whose exact semantics bytes cannot capture cheaply (non-ASCII characters, leading or
+trailing whitespace, empty rows) are validated by the pure-Python path, so problems are
+yielded in exactly the order and with exactly the messages of
+schema_validator.iter_python_row_problems. Without NumPy installed, supports() is False and
+the pure-Python path is always used.
+"""
+
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+from services.schema_validator import (
+    NOT_NULLABLE, TYPE_MISMATCH, WRONG_VALUE_COUNT, ValidationPlan, iter_python_row_problems
+)
+
+try:
+    import numpy as np  # optional, see supports()
+except ImportError:
+    np = None
+
+# Maximum rows per vectorized block ...
+BLOCK_ROWS = 65536
+# ... and maximum characters, which bounds the per-byte arrays (a few bytes per character)
+BLOCK_CHARS = 512 * 1024
+
+# Column types the vectorized checks speed up; schemas without any of them gain nothing
+NUMERIC_TYPES = frozenset(["long", "decimal"])
+
+# Zero bytes after each encoded block, so fixed-width reads past the last value stay in bounds
+_PADDING = 24
+
+# Characters str.strip() removes that are ASCII (rows starting or ending with one take the Python path)
+ASCII_WHITESPACE = b" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f"
+
+# Per-cell problem kinds in a block's problem matrix
+_OK, _NULL, _TYPE = 0, 1, 2
+
+def supports(plan: ValidationPlan, delimiter: str, numeric_only: bool = True) -> bool:
+    """
+    Whether the columnar backend can validate rows of this schema.
+
+    Args:
+        plan: Compiled schema
+        delimiter: Column delimiter; must be a single ASCII character other than a quote
+        numeric_only: Also require at least one long or decimal column
+
+    Returns:
+        True if NumPy is installed and the schema/delimiter are supported
+    """
+    if np is None or len(delimiter) != 1 or not delimiter.isascii() or delimiter in '"\n\0' or not plan.checks:
+        return False
+    return not numeric_only or any(type_name in NUMERIC_TYPES for _, _, _, type_name in plan.checks)
+
+def iter_columnar_row_problems(lines: Iterable[str], plan: ValidationPlan, delimiter: str = ";", start: int = 2) -> Iterator[Tuple[int, str, Optional[str], str]]:
+    """
+    Drop-in replacement for iter_python_row_problems (see there) validating rows in blocks.
+    Requires supports(plan, delimiter, numeric_only=False).
+    """
+    for block_start, block in _iter_blocks(lines, start):
+        yield from _block_problems(block, plan, delimiter, block_start)
+
+def _iter_blocks(lines: Iterable[str], start: int) -> Iterator[Tuple[int, List[str]]]:
+    """
+    Groups lines into blocks of at most BLOCK_ROWS rows and roughly BLOCK_CHARS characters
+    (the row count is sized from the previous block's average line length).
+    """
+    lines = iter(lines)
+    rows = min(BLOCK_ROWS, 1024)
+    while True:
+        block = list(islice(lines, rows))
+        if not block:
+            return
+        yield start, block
+        start += len(block)
+        rows = max(1, min(BLOCK_ROWS, BLOCK_CHARS * len(block) // (sum(map(len, block)) or 1)))
+
+def _byte_table(characters: bytes):
+    table = np.zeros(256, dtype=bool)
+    table[list(characters)] = True
+    return table
+
+def _in_range(chars, low: str, high: str):
+    """Per-byte test low <= byte <= high (one subtraction thanks to uint8 wrap-around)."""
+    return (chars - np.uint8(ord(low))) <= ord(high) - ord(low)
+
+# Bytes of each 8-byte word, SWAR style (ASCII input, so no byte has its high bit set)
+_ONES = 0x0101010101010101
+_HIGH = 0x8080808080808080
+_LOW7 = 0x7F7F7F7F7F7F7F7F
+
+def _non_digit_flags(words):
+    """High bit set in every byte of the words that is not an ASCII digit."""
+    shifted = words ^ np.uint64(0x30 * _ONES)
+    return (((shifted & np.uint64(_LOW7)) + np.uint64(0x76 * _ONES)) | shifted) & np.uint64(_HIGH)
+
+def _separator_flags(words):
+    """High bit set in every byte of the words that is '.' or ',' (they differ in bit 1 only)."""
+    zeroed = (words | np.uint64(0x02 * _ONES)) ^ np.uint64(0x2E * _ONES)
+    return ~(((zeroed & np.uint64(_LOW7)) + np.uint64(_LOW7)) | zeroed | np.uint64(_LOW7))
+
+def _numeric_fast_valid(words, type_name: str, starts, lengths):
+    """
+    long/decimal test on values of up to 16 bytes, read as two little-endian words each.
+    Longer values are left to the checker.
+    """
+    if type_name == "decimal":
+        # float(value.replace(",", ".")): optional leading sign, digits with at most one separator
+        first = words[starts] & np.uint64(0xFF)
+        signed = (first == ord("+")) | (first == ord("-"))
+        starts, lengths = starts + signed, lengths - signed
+    masks = _LENGTH_MASKS[np.minimum(lengths, 8)], _LENGTH_MASKS[np.clip(lengths - 8, 0, 8)]
+    halves = words[starts], words[starts + 8]
+    non_digits = [_non_digit_flags(half) & mask for half, mask in zip(halves, masks)]
+    if type_name == "long":
+        return (lengths <= 16) & ((non_digits[0] | non_digits[1]) == 0)
+    separators = [_separator_flags(half) & mask for half, mask in zip(halves, masks)]
+    one = np.uint64(1)
+    return (
+        (lengths <= 16)
+        & (lengths > (non_digits[0] != 0) + (non_digits[1] != 0))  # at least one digit
+        & (non_digits[0] == separators[0]) & (non_digits[1] == separators[1])
+        & ((non_digits[0] & (non_digits[0] - one)) == 0) & ((non_digits[1] & (non_digits[1] - one)) == 0)
+        & ((non_digits[0] == 0) | (non_digits[1] == 0))
+    )
+
+# Little-endian masks selecting the first 0..8 bytes of a word
+_LENGTH_MASKS = np.array([(1 << (8 * n)) - 1 for n in range(9)], dtype=np.uint64) if np is not None else None
+
+def _fast_valid(data, words, type_name: str, starts, lengths):
+    """
+    Vectorized per-type test on non-empty, quote-stripped ASCII values given by their start
+    offsets and lengths in data. Only ever accepts values the type's checker accepts too;
+    rejected values are re-checked by the checker.
+
+    Args:
+        data: Block bytes followed by at least 16 padding bytes
+        words: Little-endian uint64 read at every byte offset of data
+        type_name: Column type
+        starts: Value start offsets
+        lengths: Value lengths
+    """
+    if type_name == "string":
+        return np.ones(len(starts), dtype=bool)
+    if type_name in ("long", "decimal"):
+        return _numeric_fast_valid(words, type_name, starts, lengths)
+    if type_name == "boolean":
+        chars = data[starts[:, None] + np.arange(5)]
+        lowered = chars | 0x20  # ASCII letters only match their lower-case form after this
+        return (
+            ((lengths == 1) & ((chars[:, 0] == ord("0")) | (chars[:, 0] == ord("1"))))
+            | ((lengths == 4) & (lowered[:, :4] == np.frombuffer(b"true", dtype=np.uint8)).all(axis=1))
+            | ((lengths == 5) & (lowered == np.frombuffer(b"false", dtype=np.uint8)).all(axis=1))
+        )
+    if type_name == "date":
+        # YYYY-MM-DD prefix (DATE_PATTERN.match)
+        chars = data[starts[:, None] + np.arange(10)]
+        return (
+            (lengths >= 10)
+            & _in_range(chars[:, [0, 1, 2, 3, 5, 6, 8, 9]], "0", "9").all(axis=1)
+            & (chars[:, 4] == ord("-")) & (chars[:, 7] == ord("-"))
+        )
+    return np.zeros(len(starts), dtype=bool)  # unknown type: every non-empty value fails
+
+def _block_problems(block_lines: List[str], plan: ValidationPlan, delimiter: str, start: int) -> Iterator[Tuple[int, str, Optional[str], str]]:
+    width = len(plan)
+    buffer = ("\n".join(block_lines) + "\n").encode("utf-8", "surrogatepass")
+    padded = buffer + bytes(_PADDING)
+    data = np.frombuffer(padded, dtype=np.uint8)
+    words = np.ndarray((len(padded) - 7,), dtype="<u8", buffer=padded, strides=(1,))
+
+    # Every cell ends at a delimiter or a newline; every row at a newline
+    separators = np.flatnonzero((data == ord(delimiter)) | (data == ord("\n")))
+    row_last = np.flatnonzero(data[separators] == ord("\n"))  # index of each row's newline in separators
+    if len(row_last) != len(block_lines):  # lines containing "\n" (never produced by iter_lines)
+        yield from iter_python_row_problems(block_lines, plan, delimiter, start)
+        return
+    row_first = np.concatenate(([0], row_last[:-1] + 1))
+    row_ends = separators[row_last]
+    row_starts = np.concatenate(([0], row_ends[:-1] + 1))
+
+    # Rows the byte view cannot handle exactly (str.strip() would change them, or non-ASCII) go to the Python path
+    whitespace = _byte_table(ASCII_WHITESPACE)
+    fallback = (row_ends == row_starts) | whitespace[data[row_starts]] | whitespace[data[row_ends - 1]]
+    non_ascii = np.flatnonzero(data >= 0x80)
+    if len(non_ascii):
+        fallback[np.searchsorted(row_ends, non_ascii)] = True
+    wrong_count = ~fallback & (row_last - row_first + 1 != width)
+    rows = np.flatnonzero(~fallback & ~wrong_count)
+
+    # Cell offsets (rows x columns), then value.strip('"') by moving past leading and trailing quotes
+    cell_index = row_first[rows][:, None] + np.arange(width)
+    ends = separators[cell_index]
+    starts = np.concatenate(([-1], separators))[cell_index] + 1
+    if buffer.find(b'"') >= 0:
+        while True:
+            quoted = (starts < ends) & (data[starts] == ord('"'))
+            if not quoted.any():
+                break
+            starts += quoted
+        while True:
+            quoted = (starts < ends) & (data[ends - 1] == ord('"'))
+            if not quoted.any():
+                break
+            ends -= quoted
+    lengths = ends - starts
+    starts, ends, lengths = starts.T.copy(), ends.T.copy(), lengths.T.copy()  # column-major: one contiguous row per column
+
+    problems = np.zeros((len(rows), width), dtype=np.uint8)
+    for j, (_, nullable, checker, type_name) in enumerate(plan.checks):
+        empty = lengths[j] == 0
+        if not nullable:
+            problems[empty, j] = _NULL
+        if checker is None:
+            continue
+        suspects = ~empty & ~_fast_valid(data, words, type_name, starts[j], lengths[j])
+        for i in np.flatnonzero(suspects).tolist():
+            if not checker(buffer[starts[j, i]:ends[j, i]].decode("ascii")):
+                problems[i, j] = _TYPE
+
+    # Merge all problems in (line, column) order; Python-path rows keep their own order
+    events = [(int(row), -1, 0) for row in np.flatnonzero(wrong_count).tolist()]
+    problem_rows, problem_columns = np.nonzero(problems)
+    events.extend((int(rows[i]), j, i) for i, j in zip(problem_rows.tolist(), problem_columns.tolist()))
+    fallback_problems = {}
+    for row in np.flatnonzero(fallback).tolist():
+        found = list(iter_python_row_problems((block_lines[row],), plan, delimiter, start + row))
+        if found:
+            fallback_problems[row] = found
+            events.append((row, -1, 0))
+    events.sort()
+
+    for row, j, i in events:
+        if row in fallback_problems:
+            yield from fallback_problems[row]
+        elif j < 0:
+            yield start + row, WRONG_VALUE_COUNT, None, "Wrong number of values."
+        else:
+            name, _, _, type_name = plan.checks[j]
+            if problems[i, j] == _NULL:
+                yield start + row, NOT_NULLABLE, name, f"Column {name} is not nullable but is empty."
+            else:
+                value = buffer[starts[j, i]:ends[j, i]].decode("ascii")
+                yield start + row, TYPE_MISMATCH, name, f"Value '{value}' in column {name} does not match type '{type_name}'."
@@ -0,0 +1,330 @@
+"""
+data_scanner.py
+
+Reads each .U*.data file exactly once and derives everything the pipeline needs from
+that single pass:
+- Physical line count (for the audit.xml record count check)
+- First line (for the missing-header heuristic used by the auto-fixer)
+- Schema validation errors (when a schema is supplied)
+
+The resulting DataFileScan is shared by the feed_analyzer and the auto_fixer so a
+feed normally costs one read per data file.
+
+Lines that are not validated (all of them without a schema, the rest of a file once
+validation stops early) are counted at byte level by LineCounter instead of being decoded
+and split, which is several times faster on large files.
+
+Large files can be scanned chunk-parallel: the file is split into newline-aligned
+byte ranges which are validated in separate processes, and the per-range results are
+merged back into file order with absolute line numbers.
+"""
+
+import os
+import codecs
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+from services.error_accumulator import ErrorAccumulator
+from services.schema_registry import plan_for_columns
+from services.schema_validator import (
+    EMPTY_FILE, READ_CHUNK_SIZE, accumulate_errors, accumulate_row_errors, check_header, compile_schema,
+    iter_chunks, iter_lines
+)
+
+# Files smaller than this are always scanned serially, even when workers > 1
+PARALLEL_SCAN_MIN_BYTES = 256 * 1024 * 1024
+
+# Byte ranges per worker; more, smaller ranges balance uneven error density better
+RANGES_PER_WORKER = 4
+
+class LineCounter:
+    """
+    Counts the lines of raw UTF-8 byte chunks exactly like iter_lines splits them (\\n,
+    \\r\\n and a lone \\r end a line; a last line without line ending counts as well)
+    using bytes.count instead of decoding and splitting. Chunks passed to feed() are still
+    checked to be valid UTF-8, so a file iter_lines fails on fails here with the same error;
+    pure ASCII chunks skip that check.
+
+    Attributes:
+        utf8_decoder: UTF-8 decoder state; shared with iter_lines for chunks it decodes
+        line_endings: Line endings counted so far
+        last_byte: Last byte counted (b"" before the first chunk)
+    """
+
+    def __init__(self):
+        self.utf8_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.line_endings = 0
+        self.last_byte = b""
+
+    def count(self, chunk: bytes):
+        """Counts the line endings of the next chunk without checking its encoding."""
+        if not chunk:
+            return
+        endings = chunk.count(b"\n")
+        if b"\r" in chunk:
+            endings += chunk.count(b"\r") - chunk.count(b"\r\n")
+        if self.last_byte == b"\r" and chunk[:1] == b"\n":
+            endings -= 1  # \r\n split across two chunks, already counted at the \r
+        self.line_endings += endings
+        self.last_byte = chunk[-1:]
+
+    def feed(self, chunk: bytes):
+        """Checks that the next chunk continues valid UTF-8 and counts its line endings."""
+        if not chunk.isascii() or self.utf8_decoder.getstate()[0]:
+            self.utf8_decoder.decode(chunk)
+        self.count(chunk)
+
+    def passthrough(self, chunks: Iterable[bytes]) -> Iterator[bytes]:
+        """Yields chunks unchanged after counting them, for a consumer that decodes them itself."""
+        for chunk in chunks:
+            self.count(chunk)
+            yield chunk
+
+    def finish(self) -> int:
+        """
+        Returns the number of lines, after checking that the bytes did not end inside
+        a UTF-8 sequence (raises UnicodeDecodeError like iter_lines would).
+        """
+        self.utf8_decoder.decode(b"", final=True)
+        return self.line_endings + (self.last_byte not in (b"", b"\n", b"\r"))
+
+@dataclass
+class DataFileScan:
+    """
+    Outcome of a single pass over one data file.
+
+    Attributes:
+        path: Path of the scanned file
+        line_count: Number of lines, counted like iterating over the file in text mode
+        first_line: First line without its line ending (None for an empty file)
+        accumulator: Schema validation errors (None when no schema was supplied)
+        error: Exception raised while reading the file, if any
+        schema_checked: Whether the rows were validated against a schema
+    """
+    path: str
+    line_count: int = 0
+    first_line: Optional[str] = None
+    accumulator: Optional[ErrorAccumulator] = None
+    error: Optional[Exception] = None
+    schema_checked: bool = False
+
+    @property
+    def errors(self) -> List[str]:
+        """Schema validation error messages (bounded, see error_accumulator)."""
+        return self.accumulator.messages() if self.accumulator is not None else []
+
+    @property
+    def record_count(self) -> int:
+        """Number of data records, i.e. lines excluding the header line."""
+        return self.line_count - 1
+
+    @property
+    def header_missing(self) -> bool:
+        """Simple heuristic: no letters in the first line likely means missing header."""
+        return self.first_line is not None and not any(char.isalpha() for char in self.first_line)
+
+def scan_data_file(data_file: str, schema: Optional[List[Dict]] = None, delimiter: str = ";", workers: int = 1) -> DataFileScan:
+    """
+    Scans a data file once, collecting its line count, first line and schema errors.
+
+    Args:
+        data_file: Path to the data file
+        schema: Parsed schema definition, or None to skip schema validation
+        delimiter: Column delimiter in the data file (default: ;)
+        workers: Processes used to validate files of at least PARALLEL_SCAN_MIN_BYTES (1 = serial);
+            without a schema the byte-level count is faster than starting workers
+
+    Returns:
+        DataFileScan with the collected results. Read/decode failures are stored in
+        the error attribute instead of being raised.
+    """
+    if workers > 1 and schema is not None:
+        try:
+            if os.path.getsize(data_file) >= PARALLEL_SCAN_MIN_BYTES:
+                scan = _scan_parallel(data_file, schema, delimiter, workers)
+                if scan is not None:
+                    return scan
+        except Exception as e:
+            return DataFileScan(path=data_file, error=e, schema_checked=schema is not None)
+
+    try:
+        with open(data_file, "rb", buffering=0) as f:
+            return scan_chunks(data_file, iter_chunks(f), schema, delimiter)
+    except Exception as e:
+        return DataFileScan(path=data_file, error=e, schema_checked=schema is not None)
+
+def scan_first_line(data_file: str) -> DataFileScan:
+    """
+    Reads only the first line of a data file (e.g. for header detection); line_count
+    and errors are left unset.
+
+    Returns:
+        DataFileScan with first_line set; failures are stored in the error attribute
+    """
+    scan = DataFileScan(path=data_file)
+    try:
+        with open(data_file, "rb", buffering=0) as f:
+            scan.first_line = next(iter_lines(iter_chunks(f)), None)
+    except Exception as e:
+        scan.error = e
+    return scan
+
+def scan_chunks(
+    data_file: str, chunks: Iterable[bytes], schema: Optional[List[Dict]] = None, delimiter: str = ";",
+    scan: Optional[DataFileScan] = None,
+) -> DataFileScan:
+    """
+    Scans a data file delivered as raw byte chunks (from disk or e.g. a tar member stream).
+    The chunk iterator is not closed, so a caller teeing the bytes elsewhere can drain
+    it after a read/decode failure.
+
+    Args:
+        data_file: Path of the data file (used in error messages)
+        chunks: Raw byte chunks in file order
+        schema: Parsed schema definition, or None to skip schema validation
+        delimiter: Column delimiter in the data file (default: ;)
+        scan: Empty DataFileScan to fill in, so the caller producing the chunks can watch
+            the first line and errors while the scan runs (default: a new one)
+
+    Returns:
+        DataFileScan with the collected results; failures are stored in the error attribute
+    """
+    if scan is None:
+        scan = DataFileScan(path=data_file)
+    scan.schema_checked = schema is not None
+    if schema is not None:
+        scan.accumulator = ErrorAccumulator(data_file)
+
+    counter = LineCounter()
+    chunks = iter(chunks)
+    try:
+        lines = iter_lines(counter.passthrough(chunks), counter.utf8_decoder)
+        first_line = next(lines, None)
+        if first_line is None:
+            if scan.accumulator is not None:
+                scan.accumulator.add(EMPTY_FILE, "File is empty.")
+            return scan
+
+        scan.first_line = first_line
+        if schema is not None:
+            accumulate_errors(first_line, lines, schema, scan.accumulator, delimiter)
+
+        # Count the bytes not decoded for validation (everything after the first chunk without
+        # a schema, the rest of the file after a header mismatch or fail-fast)
+        for chunk in chunks:
+            counter.feed(chunk)
+        scan.line_count = counter.finish()
+    except Exception as e:
+        scan.error = e
+
+    return scan
+
+def iter_range_chunks(stream: BinaryIO, start: int, end: int, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yields byte chunks covering stream[start:end].
+    """
+    stream.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = stream.read(min(chunk_size, remaining))
+        if not chunk:
+            return
+        remaining -= len(chunk)
+        yield chunk
+
+def split_ranges(data_file: str, start: int, end: int, parts: int) -> List[Tuple[int, int]]:
+    """
+    Splits data_file[start:end] into up to `parts` byte ranges that each begin right
+    after a newline byte. Lines are never split, and because b"\\n" cannot occur inside
+    a UTF-8 sequence or between \\r and \\n, each range decodes to exactly the lines a
+    serial read would produce for that part of the file.
+
+    Returns:
+        List of (start, end) byte offsets in file order
+    """
+    bounds = [start]
+    with open(data_file, "rb", buffering=0) as f:
+        for i in range(1, parts):
+            position = _next_line_start(f, max(bounds[-1], start + (end - start) * i // parts), end)
+            if bounds[-1] < position < end:
+                bounds.append(position)
+    bounds.append(end)
+    return list(zip(bounds, bounds[1:]))
+
+def _next_line_start(stream: BinaryIO, position: int, end: int) -> int:
+    """
+    Offset right after the first newline byte at or after position (end if there is none
+    before end). Reads READ_CHUNK_SIZE blocks, so a file without \n (e.g. lone \r line
+    endings) is searched in bounded memory.
+    """
+    for chunk in iter_range_chunks(stream, position, end):
+        newline = chunk.find(b"\n")
+        if newline >= 0:
+            return position + newline + 1
+        position += len(chunk)
+    return end
+
+def _scan_range(data_file: str, start: int, end: int, columns: Optional[List[Dict]], delimiter: str, fail_fast: bool) -> Tuple[int, Optional[ErrorAccumulator]]:
+    """
+    Worker: counts and validates the lines in one byte range.
+
+    Returns:
+        Tuple of (lines in range, errors with line numbers relative to the range start (1-based),
+        or None if rows are not validated)
+    """
+    counter = LineCounter()
+    accumulator = None
+    with open(data_file, "rb", buffering=0) as f:
+        chunks = iter_range_chunks(f, start, end)
+        if columns is not None:
+            accumulator = ErrorAccumulator(data_file, fail_fast=fail_fast)
+            rows = iter_lines(counter.passthrough(chunks), counter.utf8_decoder)
+            accumulate_row_errors(rows, plan_for_columns(columns), accumulator, delimiter, start=1)
+        for chunk in chunks:
+            counter.feed(chunk)
+    return counter.finish(), accumulator
+
+def _scan_parallel(data_file: str, schema: Optional[List[Dict]], delimiter: str, workers: int) -> Optional[DataFileScan]:
+    """
+    Chunk-parallel variant of scan_data_file. Returns None when the file cannot be
+    split safely (e.g. the header ends in a lone \\r, or no \\n within READ_CHUNK_SIZE bytes)
+    or a range is not valid UTF-8, so the caller scans serially (which reports decode
+    errors at the same positions as any other serial scan).
+    """
+    with open(data_file, "rb") as f:
+        header_bytes = f.readline(READ_CHUNK_SIZE)
+    if not header_bytes.endswith(b"\n"):
+        return None
+    header_lines = list(iter_lines([header_bytes]))
+    if len(header_lines) != 1:
+        return None
+
+    scan = DataFileScan(path=data_file, line_count=1, first_line=header_lines[0], schema_checked=schema is not None)
+    columns = None
+    if schema is not None:
+        plan = compile_schema(schema)
+        scan.accumulator = ErrorAccumulator(data_file)
+        header_errors, rows_checkable = check_header(scan.first_line, plan, delimiter)
+        for code, column, message in header_errors:
+            scan.accumulator.add(code, message, column=column)
+        columns = plan.columns if rows_checkable and not scan.accumulator.stopped else None
+
+    fail_fast = scan.accumulator is not None and scan.accumulator.fail_fast
+    ranges = split_ranges(data_file, len(header_bytes), os.path.getsize(data_file), workers * RANGES_PER_WORKER)
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        results = pool.map(
+            _scan_range,
+            [data_file] * len(ranges), [start for start, _ in ranges], [end for _, end in ranges],
+            [columns] * len(ranges), [delimiter] * len(ranges), [fail_fast] * len(ranges),
+        )
+        # Ranges come back in file order; shift relative line numbers by the lines before each range.
+        # With fail-fast every range stops at its own first error; only the first one is kept
+        try:
+            for line_count, range_errors in results:
+                if range_errors is not None and not scan.accumulator.stopped:
+                    scan.accumulator.merge(range_errors, line_offset=scan.line_count)
+                scan.line_count += line_count
+        except UnicodeDecodeError:
+            return None
+
+    return scan
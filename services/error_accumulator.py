@@ -0,0 +1,149 @@
+"""
+error_accumulator.py
+
+Bounded collection of validation errors for one data file.
+
+Errors are grouped into categories of (error code, column). Every error is counted, but
+only the first examples are kept, limited per category, per column, per error code and per
+file, so a completely broken feed costs the same memory and log volume as a slightly broken
+one. Categories with unlisted errors are summarised with their counts.
+
+With fail_fast, the accumulator reports `stopped` after the first error: the file is then
+certainly rejected and callers can stop validating it.
+"""
+
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Examples kept per (error code, column) category
+MAX_EXAMPLES_PER_CATEGORY = 10
+
+# Examples kept per column, over all error codes
+MAX_EXAMPLES_PER_COLUMN = 50
+
+# Examples kept per error code, over all columns
+MAX_EXAMPLES_PER_TYPE = 100
+
+# Examples kept per data file
+MAX_EXAMPLES_PER_FILE = 200
+
+# Stop validating a data file at its first error
+FAIL_FAST = False
+
+Category = Tuple[str, Optional[str]]  # (error code, column name or None)
+Example = Tuple[Optional[int], str, Optional[str], str]  # (line number or None, code, column, message)
+Record = Tuple[str, Optional[int], Optional[str], int]  # (code, line number or None, column, count)
+
+def limits_signature() -> str:
+    """Current limits as a string, for cache keys of results that depend on them."""
+    return (
+        f"{MAX_EXAMPLES_PER_CATEGORY}/{MAX_EXAMPLES_PER_COLUMN}/{MAX_EXAMPLES_PER_TYPE}/"
+        f"{MAX_EXAMPLES_PER_FILE}/{int(FAIL_FAST)}"
+    )
+
+class ErrorAccumulator:
+    """
+    Counts errors per category and keeps the first examples within the configured caps.
+    Limits default to the module settings at construction time.
+
+    Args:
+        data_file: Path of the data file (used to render messages)
+        fail_fast: Report `stopped` after the first error
+    """
+
+    def __init__(self, data_file: str, fail_fast: Optional[bool] = None):
+        self.data_file = data_file
+        self.fail_fast = FAIL_FAST if fail_fast is None else fail_fast
+        self.max_per_category = MAX_EXAMPLES_PER_CATEGORY
+        self.max_per_column = MAX_EXAMPLES_PER_COLUMN
+        self.max_per_type = MAX_EXAMPLES_PER_TYPE
+        self.max_per_file = MAX_EXAMPLES_PER_FILE
+        self.counts: Dict[Category, int] = {}  # first-seen order
+        self.examples: List[Example] = []
+        self._shown: Counter = Counter()
+        self._shown_per_column: Counter = Counter()
+        self._shown_per_type: Counter = Counter()
+
+    @property
+    def total(self) -> int:
+        """Number of errors recorded, listed or not."""
+        return sum(self.counts.values())
+
+    @property
+    def stopped(self) -> bool:
+        """True once fail-fast mode has seen an error."""
+        return self.fail_fast and self.total > 0
+
+    def add(self, code: str, message: str, line_no: Optional[int] = None, column: Optional[str] = None):
+        """
+        Records one error.
+
+        Args:
+            code: Error code (e.g. schema_validator.TYPE_MISMATCH)
+            message: Description without file/line prefix
+            line_no: Line number, or None for file-level errors
+            column: Column name, or None if the error is not tied to a column
+        """
+        category = (code, column)
+        count = self.counts.get(category, 0)
+        self.counts[category] = count + 1
+        # The caps only ever fill up, so a category that reached its own cap (or was refused
+        # an example earlier) can skip the checks below
+        if count >= self.max_per_category:
+            return
+        if (
+            self._shown[category] == count
+            and (column is None or self._shown_per_column[column] < self.max_per_column)
+            and self._shown_per_type[code] < self.max_per_type
+            and len(self.examples) < self.max_per_file
+        ):
+            self.examples.append((line_no, code, column, message))
+            self._shown[category] += 1
+            self._shown_per_column[column] += 1
+            self._shown_per_type[code] += 1
+
+    def merge(self, other: "ErrorAccumulator", line_offset: int = 0):
+        """
+        Adds the errors of another accumulator (e.g. from a later byte range of the same file).
+
+        Args:
+            other: Accumulator whose errors all come after the ones already recorded
+            line_offset: Added to the line numbers of other's examples
+        """
+        for line_no, code, column, message in other.examples:
+            self.add(code, message, None if line_no is None else line_no + line_offset, column)
+        for category, count in other.counts.items():
+            unlisted = count - other._shown[category]
+            if unlisted:
+                self.counts[category] = self.counts.get(category, 0) + unlisted
+
+    def records(self) -> List[Record]:
+        """
+        Structured form of messages() for reports: one record per kept example (count 1),
+        then one per category with unlisted errors (no line number, count of the unlisted
+        errors), so the counts add up to total.
+        """
+        records = [(code, line_no, column, 1) for line_no, code, column, _ in self.examples]
+        for (code, column), count in self.counts.items():
+            unlisted = count - self._shown[(code, column)]
+            if unlisted:
+                records.append((code, None, column, unlisted))
+        return records
+
+    def messages(self) -> List[str]:
+        """
+        Renders the kept examples in the order they were added, followed by one summary
+        line per category with unlisted errors.
+        """
+        rendered = [
+            f"{self.data_file}: {message}" if line_no is None else f"{self.data_file}, line {line_no}: {message}"
+            for line_no, _, _, message in self.examples
+        ]
+        for (code, column), count in self.counts.items():
+            unlisted = count - self._shown[(code, column)]
+            if unlisted:
+                where = f" in column {column}" if column is not None else ""
+                rendered.append(f"{self.data_file}: {unlisted:,} more '{code}' errors{where} not listed ({count:,} in total).")
+        if self.stopped:
+            rendered.append(f"{self.data_file}: Validation stopped at the first error (fail-fast).")
+        return rendered
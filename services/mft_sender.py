@@ -1,37 +1,129 @@
 """
 mft_sender.py
 
-This module simulates the action of sending a validated feed submission
-to an external system via MFT (Managed File Transfer). In production,
-this function can be replaced with actual MFT integration logic (e.g., API call,
-command-line transfer, queue-based trigger, etc.).
+Hands validated feed submissions to MFT (Managed File Transfer).
 
-Currently logs the action and emits a Grafana-compatible event.
+Without MFT_TARGET the transfer is only simulated: the action is logged and a
+Grafana-compatible event emitted. With MFT_TARGET set (a folder such as a mounted share,
+or an http(s):// endpoint; see mft_transfer and the offline stand-in mft_standin),
+send_to_mft() queues the submission for a background TransferEngine and returns at once;
+the outcome is reported later as an mft_sent or mft_failed event. Call
+wait_for_transfers() before exiting so queued uploads are finished.
+
+Uploads read the submission folder in ready_for_mft/ when a worker gets to them, so a
+resubmission of the same name must not replace that folder before then: call
+wait_for_transfer() with its name before routing it.
 """
 
 import os
+import threading
+from concurrent.futures import wait
+from typing import Optional
+from services.mft_transfer import TransferEngine, TransferResult, create_transport
 from utils.logger import get_logger
 from utils.grafana_logger import log_event
+from utils.metrics import stage
 
 # Initialize logger
 logger = get_logger()
 
+# Upload target: None (simulate), a folder or an http(s):// URL of the resumable upload endpoint
+MFT_TARGET = None
+
+# Submissions uploaded in parallel (also the number of pooled connections)
+MFT_WORKERS = 4
+
+# Submissions waiting for an upload slot before send_to_mft() blocks the caller
+MFT_QUEUE_SIZE = 16
+
+# Retries per file, and the delay before the first one (doubling up to MFT_BACKOFF_MAX_SECONDS)
+MFT_MAX_RETRIES = 5
+MFT_BACKOFF_SECONDS = 1.0
+MFT_BACKOFF_MAX_SECONDS = 60.0
+
+# Background engine, started by the first queued submission
+_engine: Optional[TransferEngine] = None
+_engine_lock = threading.Lock()
+
 def send_to_mft(submission_dir: str) -> bool:
     """
-    Simulates the upload of a validated submission folder to MFT.
+    Hands a validated submission folder to MFT: simulated without MFT_TARGET, otherwise
+    queued for upload (blocking while MFT_QUEUE_SIZE submissions are already waiting).
 
     Args:
         submission_dir: Path to the validated submission directory
 
     Returns:
-        True to indicate simulated success
+        True once the transfer is simulated or queued
     """
     submission_name = os.path.basename(submission_dir)
 
-    # In production: replace this with real MFT transfer logic
-    logger.info(f"[MFT] Simulating upload of {submission_name}...")
+    if not MFT_TARGET:
+        with stage(submission_name, "mft_send"):
+            logger.info(f"[MFT] Simulating upload of {submission_name}...")
 
-    # Log Grafana-compatible event
-    log_event("mft_sent", submission_name, "mft_transfer", "Simulated successful MFT transfer")
+            # Log Grafana-compatible event
+            log_event("mft_sent", submission_name, "mft_transfer", "Simulated successful MFT transfer")
+        return True
 
+    _get_engine().submit(submission_dir)
+    logger.info(f"[MFT] Queued {submission_name} for upload to {MFT_TARGET}")
     return True
+
+def _get_engine() -> TransferEngine:
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = TransferEngine(
+                create_transport(MFT_TARGET),
+                workers=MFT_WORKERS,
+                queue_size=MFT_QUEUE_SIZE,
+                max_retries=MFT_MAX_RETRIES,
+                backoff=MFT_BACKOFF_SECONDS,
+                backoff_max=MFT_BACKOFF_MAX_SECONDS,
+                on_done=_report_transfer,
+            )
+        return _engine
+
+def _report_transfer(result: TransferResult):
+    """Logs the outcome of a background upload and emits its Grafana event."""
+    if result.ok:
+        retries = f", {result.retries} retries" if result.retries else ""
+        detail = (
+            f"Uploaded {result.files} files ({result.bytes:,} bytes) to {MFT_TARGET} in "
+            f"{result.seconds:.1f} s{retries}; checksums verified"
+        )
+        logger.info(f"[MFT] {result.submission}: {detail}")
+        log_event("mft_sent", result.submission, "mft_transfer", detail)
+    else:
+        detail = f"Upload to {MFT_TARGET} failed after {result.retries} retries: {result.error}"
+        logger.error(f"[MFT] {result.submission}: {detail}")
+        log_event(
+            event="mft_failed",
+            submission=result.submission,
+            event_type="mft_transfer",
+            detail=detail,
+            critical=True,
+            recommended_action="Check the MFT target; the submission is still in ready_for_mft/ and can be re-sent."
+        )
+
+def wait_for_transfer(submission_name: str):
+    """
+    Blocks until queued or running uploads of a submission are finished (no-op if there
+    are none), so its folder in ready_for_mft/ can be replaced.
+    """
+    with _engine_lock:
+        engine = _engine
+    futures = engine.pending(submission_name) if engine is not None else []
+    if futures:
+        logger.info(f"[MFT] Waiting for the pending upload of {submission_name} before replacing it")
+        wait(futures)
+
+def wait_for_transfers():
+    """Finishes all queued uploads and stops the background engine (no-op if none was started)."""
+    global _engine
+    with _engine_lock:
+        engine, _engine = _engine, None
+    if engine is not None:
+        logger.info("[MFT] Waiting for queued uploads to finish...")
+        engine.close()
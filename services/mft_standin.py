@@ -0,0 +1,221 @@
+"""
+mft_standin.py
+
+Local stand-in for the MFT endpoint, for testing transfers offline. Serves the resumable
+upload protocol of HttpTransport (see mft_transfer) and stores the files in a local folder
+with the layout of LocalTransport: <root>/.partial/<submission>/<file> while uploading,
+<root>/<submission>/<file> once verified.
+
+Faults can be injected to exercise retries and resume:
+- fail_rate:    answer an upload request with 503 without storing anything
+- drop_rate:    store half of the chunk, then drop the connection without answering
+- corrupt_rate: flip a bit of a stored chunk (detected by the checksum on completion)
+- latency:      delay every request (seconds)
+
+Usage:
+    python -m services.mft_standin --root ./mft_outbox --port 8765 --fail-rate 0.05
+    python main.py --mft-target http://127.0.0.1:8765
+"""
+
+import os
+import time
+import random
+import argparse
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+from services.mft_transfer import ChecksumMismatch, LocalConnection, TransferError
+
+class StandInServer(ThreadingHTTPServer):
+    """
+    HTTP server storing uploads under root, with optional fault injection.
+
+    Args:
+        address: (host, port) to listen on; port 0 picks a free port
+        root: Folder receiving the uploads
+        fail_rate: Fraction of PATCH requests answered with 503
+        drop_rate: Fraction of PATCH requests cut off after storing half of the chunk
+        corrupt_rate: Fraction of PATCH requests whose stored chunk is corrupted
+        latency: Delay added to every request (seconds)
+        seed: Random seed for the fault injection
+    """
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: Tuple[str, int],
+        root: str,
+        fail_rate: float = 0.0,
+        drop_rate: float = 0.0,
+        corrupt_rate: float = 0.0,
+        latency: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(address, UploadHandler)
+        self.storage = LocalConnection(root)
+        self.fail_rate = fail_rate
+        self.drop_rate = drop_rate
+        self.corrupt_rate = corrupt_rate
+        self.latency = latency
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self._path_locks: Dict[str, threading.Lock] = {}
+        self._path_locks_lock = threading.Lock()
+        self.faults = {"failed": 0, "dropped": 0, "corrupted": 0}
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def path_lock(self, remote_path: str) -> threading.Lock:
+        """Lock serialising requests for one file."""
+        with self._path_locks_lock:
+            return self._path_locks.setdefault(remote_path, threading.Lock())
+
+    def roll(self, rate: float, fault: str) -> bool:
+        """Randomly decides whether to inject a fault, counting injected ones."""
+        if rate <= 0:
+            return False
+        with self.random_lock:
+            hit = self.random.random() < rate
+            if hit:
+                self.faults[fault] += 1
+        return hit
+
+class UploadHandler(BaseHTTPRequestHandler):
+    """Request handler of StandInServer (HTTP/1.1, keep-alive)."""
+    protocol_version = "HTTP/1.1"
+    server: StandInServer
+
+    def log_message(self, format, *args):
+        pass  # keep the console quiet; failures surface on the client side
+
+    def _remote_path(self) -> Optional[str]:
+        path = urllib.parse.urlsplit(self.path).path
+        if not path.startswith("/files/"):
+            self._respond(404)
+            return None
+        return urllib.parse.unquote(path[len("/files/"):])
+
+    def _respond(self, status: int, headers: Optional[Dict[str, str]] = None, close: bool = False):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", "0")
+        if close:
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        self.end_headers()
+
+    def _handle(self, action):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        remote_path = self._remote_path()
+        if remote_path is None:
+            return
+        try:
+            with self.server.path_lock(remote_path):
+                action(remote_path)
+        except ChecksumMismatch:
+            self._respond(422)
+        except TransferError as e:
+            # Offset conflicts can be resolved by the client (HEAD, then resume); invalid paths cannot
+            self._respond(409 if e.retryable else 400, close=True)
+
+    def do_HEAD(self):
+        def action(remote_path):
+            offset = self.server.storage.offset(remote_path)
+            partial = os.path.exists(self.server.storage.partial_path(remote_path))
+            self._respond(200 if partial else 404, {"Upload-Offset": str(offset)})
+        self._handle(action)
+
+    def do_PATCH(self):
+        def action(remote_path):
+            length = int(self.headers.get("Content-Length", "0"))
+            offset = int(self.headers.get("Upload-Offset", "-1"))
+            if self.server.roll(self.server.fail_rate, "failed"):
+                self._respond(503, close=True)  # body left unread, so the connection cannot be reused
+                return
+            if self.server.roll(self.server.drop_rate, "dropped"):
+                data = self.rfile.read(length // 2)
+                if self.server.storage.offset(remote_path) == offset:
+                    self.server.storage.write(remote_path, offset, data)
+                self.close_connection = True
+                return
+            data = self.rfile.read(length)
+            if len(data) != length:
+                self.close_connection = True
+                return
+            if data and self.server.roll(self.server.corrupt_rate, "corrupted"):
+                data = bytes([data[0] ^ 0x01]) + data[1:]
+            new_offset = self.server.storage.write(remote_path, offset, data)
+            self._respond(204, {"Upload-Offset": str(new_offset)})
+        self._handle(action)
+
+    def do_POST(self):
+        def action(remote_path):
+            if urllib.parse.urlsplit(self.path).query != "complete":
+                self._respond(400, close=True)
+                return
+            checksum = self.headers.get("Upload-Checksum", "")
+            algorithm, _, digest = checksum.partition(" ")
+            if algorithm != "sha256":
+                self._respond(400, close=True)
+                return
+            self.server.storage.complete(remote_path, int(self.headers.get("Upload-Length", "-1")), digest)
+            self._respond(201)
+        self._handle(action)
+
+    def do_DELETE(self):
+        def action(remote_path):
+            existed = os.path.exists(self.server.storage.partial_path(remote_path))
+            self.server.storage.abort(remote_path)
+            self._respond(204 if existed else 404)
+        self._handle(action)
+
+def start_standin(root: str, host: str = "127.0.0.1", port: int = 0, **faults) -> StandInServer:
+    """
+    Starts a StandInServer in a background thread (stop it with shutdown()).
+
+    Args:
+        root: Folder receiving the uploads
+        host: Interface to listen on
+        port: Port (0 = any free port; see the server's url attribute)
+        faults: fail_rate, drop_rate, corrupt_rate, latency and seed (see StandInServer)
+
+    Returns:
+        The running server
+    """
+    server = StandInServer((host, port), root, **faults)
+    threading.Thread(target=server.serve_forever, name="mft-standin", daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", default="./mft_outbox", help="Folder receiving the uploads (default: ./mft_outbox)")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on (default: 8765)")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of chunks answered with 503")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="Fraction of chunks cut off mid-transfer")
+    parser.add_argument("--corrupt-rate", type=float, default=0.0, help="Fraction of chunks stored corrupted")
+    parser.add_argument("--latency", type=float, default=0.0, help="Delay per request (seconds)")
+    parser.add_argument("--seed", type=int, help="Random seed for fault injection")
+    args = parser.parse_args()
+
+    server = StandInServer(
+        (args.host, args.port), args.root, args.fail_rate, args.drop_rate, args.corrupt_rate, args.latency, args.seed
+    )
+    print(f"MFT stand-in listening on {server.url}, storing uploads in {os.path.abspath(args.root)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Injected faults: {server.faults}")
+
+if __name__ == "__main__":
+    main()
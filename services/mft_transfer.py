@@ -0,0 +1,522 @@
+"""
+mft_transfer.py
+
+Background transfer engine for validated submissions (used by mft_sender).
+
+Submissions wait in a bounded queue and are uploaded by a few worker threads, so routing
+the next feed never waits for a transfer. Each file is streamed in chunks over a connection
+borrowed from a pool of reusable connections. After a failure the worker backs off
+(exponentially, with jitter), asks the target how many bytes of the file it already holds
+and resumes from there. A file only counts as delivered once the target has verified its
+SHA-256 checksum.
+
+Transports are pluggable: any subclass of Transport and Connection implementing their
+abstract methods can be used. Included:
+- LocalTransport: a folder, e.g. a mounted MFT share
+- HttpTransport: the resumable HTTP upload protocol served by mft_standin
+"""
+
+import os
+import abc
+import time
+import queue
+import random
+import hashlib
+import threading
+import http.client
+import urllib.parse
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional
+from utils.logger import get_logger
+from utils.metrics import stage
+
+# Initialize logger
+logger = get_logger()
+
+# Bytes sent per upload request
+CHUNK_SIZE = 8 * 1024 * 1024
+
+# Read size when hashing a local file
+HASH_READ_SIZE = 1024 * 1024
+
+# Folder (below the target root) holding files whose upload has not been verified yet
+PARTIAL_DIR = ".partial"
+
+class TransferError(Exception):
+    """
+    Upload failure reported by a transport. Failures with retryable=False (e.g. the target
+    rejected the request) end the transfer; all others are retried.
+    """
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+class ChecksumMismatch(TransferError):
+    """The target received a file whose size or SHA-256 differs from the source (retryable)."""
+
+class Connection(abc.ABC):
+    """
+    One open connection to a transfer target. Files are addressed by remote paths of the
+    form "<submission>/<file name>". Methods raise OSError or TransferError on failure.
+    """
+
+    @abc.abstractmethod
+    def offset(self, remote_path: str) -> int:
+        """Bytes of remote_path the target already holds from an unfinished upload (0 if none)."""
+
+    @abc.abstractmethod
+    def write(self, remote_path: str, offset: int, data: bytes) -> int:
+        """Appends data at offset (which must equal the current offset); returns the new offset."""
+
+    @abc.abstractmethod
+    def complete(self, remote_path: str, size: int, sha256: str):
+        """
+        Finishes an upload: the target checks size and SHA-256 (hex) and publishes the file.
+        On a mismatch the partial upload is discarded and ChecksumMismatch raised.
+        """
+
+    @abc.abstractmethod
+    def abort(self, remote_path: str):
+        """Discards an unfinished upload of remote_path."""
+
+    def close(self):
+        """Releases the connection."""
+
+class Transport(abc.ABC):
+    """Factory of connections to one transfer target."""
+
+    @abc.abstractmethod
+    def connect(self) -> Connection:
+        """Opens a new connection to the target."""
+
+def _sha256_of(f: BinaryIO, size: int):
+    """Hash object of the first `size` bytes of an open file."""
+    hasher = hashlib.sha256()
+    f.seek(0)
+    remaining = size
+    while remaining > 0:
+        data = f.read(min(HASH_READ_SIZE, remaining))
+        if not data:
+            break
+        hasher.update(data)
+        remaining -= len(data)
+    return hasher
+
+def _checked_remote_path(remote_path: str) -> str:
+    """Rejects remote paths that would leave the target root."""
+    parts = remote_path.split("/")
+    if not remote_path or remote_path.startswith("/") or any(part in ("", ".", "..") for part in parts) or "\\" in remote_path:
+        raise TransferError(f"Invalid remote path: {remote_path!r}", retryable=False)
+    return remote_path
+
+class LocalTransport(Transport):
+    """
+    Uploads into a folder: files are written to <root>/.partial/<submission>/ and only moved
+    to <root>/<submission>/ once their size and checksum have been verified.
+
+    Args:
+        root: Target folder
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def connect(self) -> Connection:
+        return LocalConnection(self.root)
+
+    def __repr__(self) -> str:
+        return f"LocalTransport({self.root!r})"
+
+class LocalConnection(Connection):
+    """Connection of a LocalTransport (also the storage behind the mft_standin server)."""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def partial_path(self, remote_path: str) -> str:
+        """Where the unfinished upload of remote_path is stored."""
+        return os.path.join(self.root, PARTIAL_DIR, _checked_remote_path(remote_path))
+
+    def offset(self, remote_path: str) -> int:
+        try:
+            return os.path.getsize(self.partial_path(remote_path))
+        except FileNotFoundError:
+            return 0
+
+    def write(self, remote_path: str, offset: int, data: bytes) -> int:
+        partial_path = self.partial_path(remote_path)
+        current = self.offset(remote_path)
+        if current != offset:
+            raise TransferError(f"{remote_path}: upload offset {offset} does not match {current}")
+        os.makedirs(os.path.dirname(partial_path), exist_ok=True)
+        with open(partial_path, "ab") as f:
+            f.write(data)
+        return offset + len(data)
+
+    def complete(self, remote_path: str, size: int, sha256: str):
+        partial_path = self.partial_path(remote_path)
+        try:
+            with open(partial_path, "rb") as f:
+                actual_size = os.fstat(f.fileno()).st_size
+                actual = _sha256_of(f, actual_size).hexdigest() if actual_size == size else None
+        except FileNotFoundError:
+            raise TransferError(f"{remote_path}: nothing uploaded to complete")
+        if actual != sha256:
+            os.remove(partial_path)
+            raise ChecksumMismatch(f"{remote_path}: size or checksum mismatch after upload, restarting")
+        final_path = os.path.join(self.root, remote_path)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(partial_path, final_path)
+        try:
+            os.rmdir(os.path.dirname(partial_path))  # the submission's last pending file
+        except OSError:
+            pass
+
+    def abort(self, remote_path: str):
+        try:
+            os.remove(self.partial_path(remote_path))
+        except FileNotFoundError:
+            pass
+
+class HttpTransport(Transport):
+    """
+    Uploads over HTTP(S) with the resumable protocol of mft_standin:
+    - HEAD   <base>/files/<remote path>            -> Upload-Offset of an unfinished upload
+    - PATCH  <base>/files/<remote path>            -> appends the body at Upload-Offset
+    - POST   <base>/files/<remote path>?complete   -> verifies Upload-Length and Upload-Checksum
+    - DELETE <base>/files/<remote path>            -> discards an unfinished upload
+
+    Args:
+        base_url: http:// or https:// URL of the target
+        timeout: Socket timeout per request (seconds)
+    """
+
+    def __init__(self, base_url: str, timeout: float = 60.0):
+        parsed = urllib.parse.urlsplit(base_url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            raise ValueError(f"Unsupported MFT URL: {base_url}")
+        self.base_url = base_url
+        self.scheme = parsed.scheme
+        self.host = parsed.hostname
+        self.port = parsed.port
+        self.prefix = parsed.path.rstrip("/")
+        self.timeout = timeout
+
+    def connect(self) -> Connection:
+        return HttpConnection(self)
+
+    def __repr__(self) -> str:
+        return f"HttpTransport({self.base_url!r})"
+
+class HttpConnection(Connection):
+    """Keep-alive connection of an HttpTransport."""
+
+    def __init__(self, transport: HttpTransport):
+        connection_class = http.client.HTTPSConnection if transport.scheme == "https" else http.client.HTTPConnection
+        self.transport = transport
+        self.conn = connection_class(transport.host, transport.port, timeout=transport.timeout)
+
+    def _request(self, method: str, remote_path: str, query: str = "", body: Optional[bytes] = None, headers: Optional[dict] = None) -> http.client.HTTPResponse:
+        url = f"{self.transport.prefix}/files/{urllib.parse.quote(_checked_remote_path(remote_path))}{query}"
+        self.conn.request(method, url, body=body, headers=headers or {})
+        response = self.conn.getresponse()
+        response.read()  # drain the body so the connection can be reused
+        return response
+
+    @staticmethod
+    def _check(response: http.client.HTTPResponse, method: str, remote_path: str, *expected: int):
+        if response.status in expected:
+            return
+        # Server errors, timeouts, throttling, offset conflicts and checksum mismatches are transient
+        retryable = response.status >= 500 or response.status in (408, 409, 422, 429)
+        raise TransferError(f"{method} {remote_path}: HTTP {response.status} {response.reason}", retryable=retryable)
+
+    def offset(self, remote_path: str) -> int:
+        response = self._request("HEAD", remote_path)
+        if response.status == 404:
+            return 0
+        self._check(response, "HEAD", remote_path, 200)
+        return int(response.getheader("Upload-Offset", "0"))
+
+    def write(self, remote_path: str, offset: int, data: bytes) -> int:
+        response = self._request("PATCH", remote_path, body=data, headers={
+            "Upload-Offset": str(offset),
+            "Content-Type": "application/offset+octet-stream",
+        })
+        self._check(response, "PATCH", remote_path, 204)
+        return int(response.getheader("Upload-Offset", str(offset + len(data))))
+
+    def complete(self, remote_path: str, size: int, sha256: str):
+        response = self._request("POST", remote_path, query="?complete", headers={
+            "Upload-Length": str(size),
+            "Upload-Checksum": f"sha256 {sha256}",
+            "Content-Length": "0",
+        })
+        if response.status == 422:  # the target discarded the upload (see LocalConnection.complete)
+            raise ChecksumMismatch(f"{remote_path}: size or checksum mismatch after upload, restarting")
+        self._check(response, "POST", remote_path, 201)
+
+    def abort(self, remote_path: str):
+        response = self._request("DELETE", remote_path)
+        self._check(response, "DELETE", remote_path, 204, 404)
+
+    def close(self):
+        self.conn.close()
+
+def create_transport(target: str) -> Transport:
+    """HttpTransport for http(s):// URLs, LocalTransport for anything else (a folder)."""
+    if target.startswith(("http://", "https://")):
+        return HttpTransport(target)
+    return LocalTransport(target)
+
+class ConnectionPool:
+    """
+    Reusable connections to one transport, at most `size` of them in use at a time.
+    A connection whose use raised is closed instead of being returned to the pool.
+
+    Args:
+        transport: Transport creating the connections
+        size: Maximum number of connections in use at once
+    """
+
+    def __init__(self, transport: Transport, size: int):
+        self.transport = transport
+        self._idle: List[Connection] = []
+        self._idle_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self) -> Iterator[Connection]:
+        """Borrows an idle connection (or opens a new one) for the enclosed block."""
+        with self._slots:
+            with self._idle_lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                conn = self.transport.connect()
+            try:
+                yield conn
+            except BaseException:
+                conn.close()
+                raise
+            with self._idle_lock:
+                self._idle.append(conn)
+
+    def close(self):
+        """Closes all idle connections."""
+        with self._idle_lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+@dataclass
+class TransferResult:
+    """
+    Outcome of uploading one submission.
+
+    Attributes:
+        submission: Submission base name
+        files: Files delivered and verified
+        bytes: Size of the delivered files
+        bytes_sent: Bytes sent, including chunks sent again after failures
+        retries: Failed attempts that were retried
+        seconds: Wall time of the upload
+        error: Exception that ended the transfer, if it failed
+    """
+    submission: str
+    files: int = 0
+    bytes: int = 0
+    bytes_sent: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+    error: Optional[Exception] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+class TransferEngine:
+    """
+    Uploads submission folders in background threads.
+
+    Args:
+        transport: Target of the uploads
+        workers: Parallel uploads (one submission each); also the connection pool size
+        queue_size: Submissions waiting for a worker before submit() blocks
+        chunk_size: Bytes per upload request
+        max_retries: Retries per file before the submission's transfer fails
+        backoff: Delay before the first retry (seconds); doubles per retry
+        backoff_max: Upper bound of the retry delay (seconds)
+        on_done: Called with each TransferResult from the worker thread that produced it
+    """
+
+    def __init__(
+        self,
+        transport: Transport,
+        workers: int = 4,
+        queue_size: int = 16,
+        chunk_size: int = CHUNK_SIZE,
+        max_retries: int = 5,
+        backoff: float = 1.0,
+        backoff_max: float = 60.0,
+        on_done: Optional[Callable[[TransferResult], None]] = None,
+    ):
+        self.transport = transport
+        self.pool = ConnectionPool(transport, workers)
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.on_done = on_done
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._closing = threading.Event()
+        self._pending: Dict[str, List[Future]] = {}  # submission name -> queued or running uploads
+        self._pending_lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"mft-upload-{i + 1}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, submission_dir: str) -> "Future[TransferResult]":
+        """
+        Queues a submission folder for upload, blocking while the queue is full.
+
+        Returns:
+            Future resolving to the TransferResult (failures are results, not exceptions)
+        """
+        if self._closing.is_set():
+            raise RuntimeError("TransferEngine is closed")
+        submission_name = os.path.basename(os.path.normpath(submission_dir))
+        future = Future()
+        with self._pending_lock:
+            self._pending.setdefault(submission_name, []).append(future)
+        future.add_done_callback(lambda done: self._forget(submission_name, done))
+        self._queue.put((submission_dir, future))
+        return future
+
+    def pending(self, submission_name: str) -> List[Future]:
+        """
+        Futures of the uploads of a submission that are queued or running, i.e. may still
+        read its folder (empty if none).
+        """
+        with self._pending_lock:
+            return list(self._pending.get(submission_name, ()))
+
+    def _forget(self, submission_name: str, future: Future):
+        with self._pending_lock:
+            futures = self._pending.get(submission_name, [])
+            if future in futures:
+                futures.remove(future)
+            if not futures:
+                self._pending.pop(submission_name, None)
+
+    def close(self, cancel_pending: bool = False):
+        """
+        Stops the workers after the queued submissions are uploaded (or, with cancel_pending,
+        after the uploads in progress, cancelling the rest and cutting retry delays short).
+        """
+        if cancel_pending:
+            self._closing.set()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._closing.set()
+        self.pool.close()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            submission_dir, future = item
+            if self._closing.is_set():
+                future.cancel()
+            if not future.set_running_or_notify_cancel():
+                continue
+            result = self.upload_submission(submission_dir)
+            future.set_result(result)
+            if self.on_done is not None:
+                try:
+                    self.on_done(result)
+                except Exception as e:
+                    logger.exception(f"[MFT] Transfer callback failed for {result.submission}: {e}")
+
+    def upload_submission(self, submission_dir: str) -> TransferResult:
+        """Uploads every file of a (flat) submission folder; runs in the calling thread."""
+        submission_name = os.path.basename(os.path.normpath(submission_dir))
+        result = TransferResult(submission_name)
+        start = time.perf_counter()
+        with stage(submission_name, "mft_send") as timing:
+            try:
+                with os.scandir(submission_dir) as it:
+                    entries = sorted((entry for entry in it if entry.is_file()), key=lambda entry: entry.name)
+                for entry in entries:
+                    self._upload_file(entry.path, f"{submission_name}/{entry.name}", result)
+            except Exception as e:
+                result.error = e
+            timing.bytes = result.bytes_sent
+            timing.rows = result.files
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def _upload_file(self, path: str, remote_path: str, result: TransferResult):
+        """
+        Uploads one file with resume and retries. Only consecutive failures without progress
+        count against max_retries: a failure after the target accepted more of the file than it
+        held at the previous failure starts the count again. Checksum restarts (the target
+        discards the upload) are counted separately and never reset, also up to max_retries.
+        Raises once retries are exhausted.
+        """
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            hasher, hashed = hashlib.sha256(), 0
+            attempt = restarts = 0
+            offset = failed_at = 0  # bytes the target holds: last known, and at the previous failure
+            while True:
+                try:
+                    with self.pool.connection() as conn:
+                        offset = conn.offset(remote_path)
+                        if offset > size:
+                            conn.abort(remote_path)  # left over from a different file
+                            offset = 0
+                        if offset != hashed:
+                            hasher, hashed = _sha256_of(f, offset), offset
+                        f.seek(offset)
+                        if size == 0:
+                            conn.write(remote_path, 0, b"")  # creates the empty upload
+                        while offset < size:
+                            chunk = f.read(min(self.chunk_size, size - offset))
+                            if not chunk:
+                                raise TransferError(f"{path} shrank during upload", retryable=False)
+                            hasher.update(chunk)
+                            hashed += len(chunk)
+                            offset = conn.write(remote_path, offset, chunk)
+                            result.bytes_sent += len(chunk)
+                        conn.complete(remote_path, size, hasher.hexdigest())
+                    result.files += 1
+                    result.bytes += size
+                    return
+                except (OSError, http.client.HTTPException, TransferError) as e:
+                    retryable = not isinstance(e, TransferError) or e.retryable
+                    if isinstance(e, ChecksumMismatch):
+                        restarts += 1
+                        failed_at = 0  # the target discarded the upload; it restarts from 0
+                    elif offset > failed_at:
+                        attempt = 0  # resumed past the previous failure
+                        failed_at = offset
+                    exhausted = attempt >= self.max_retries or restarts > self.max_retries
+                    if not retryable or exhausted or self._closing.is_set():
+                        raise
+                    attempt += 1
+                    result.retries += 1
+                    delay = min(self.backoff_max, self.backoff * 2 ** (attempt - 1))
+                    delay = delay / 2 + random.uniform(0, delay / 2)  # jitter spreads out retries of parallel uploads
+                    logger.warning(
+                        f"[MFT] Upload of {remote_path} failed ({e}); retry {attempt}/{self.max_retries} in {delay:.1f} s"
+                    )
+                    self._closing.wait(delay)
@@ -0,0 +1,246 @@
+"""
+schema_registry.py
+
+Process-wide registry of compiled schemas, so the schema.txt that most submissions of a
+sender share is parsed and compiled into a ValidationPlan once, not once per submission.
+
+schema.txt is fingerprinted by a SHA-256 of its bytes; a hit returns the cached plan without
+decoding or parsing the file. A miss parses it and fingerprints the canonical JSON of the
+column definitions as well, so schemas differing only in formatting or key order share one
+plan (including its compiled row matchers). Plans are kept in an in-process LRU of
+REGISTRY_MAX_PLANS entries and must be treated as read-only.
+
+With REGISTRY_DIR set, every newly seen schema is also written there as a small JSON entry,
+and warm_registry() compiles the most recently used ones at startup (in the main process
+and in each worker), so a restarted daemon has no cold schema setup for known senders.
+The folder is bounded to REGISTRY_MAX_PLANS entries, least recently used evicted first.
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from services.schema_validator import ValidationPlan, compile_schema
+from utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger()
+
+# Compiled plans kept in memory (and entries kept in REGISTRY_DIR)
+REGISTRY_MAX_PLANS = 64
+
+# Folder persisting schemas across restarts (None = in-process only)
+REGISTRY_DIR = None
+
+# Part of every persisted entry; bump when the entry layout changes
+REGISTRY_FORMAT_VERSION = 1
+
+# Delimiters whose row matchers are compiled by warm_registry (the pipeline validates ';' data)
+WARM_DELIMITERS = (";",)
+
+_lock = threading.Lock()
+_plans: "OrderedDict[str, ValidationPlan]" = OrderedDict()  # canonical fingerprint -> plan
+_aliases: "OrderedDict[str, str]" = OrderedDict()           # file fingerprint -> canonical fingerprint
+_touched = set()                                            # persisted entries whose mtime was refreshed
+stats = {"hits": 0, "misses": 0}
+
+def fingerprint(raw: bytes) -> str:
+    """SHA-256 hex digest of the raw schema.txt bytes."""
+    return hashlib.sha256(raw).hexdigest()
+
+def canonical_fingerprint(columns: List[Dict]) -> str:
+    """SHA-256 hex digest of the column definitions, independent of formatting and key order."""
+    canonical = json.dumps(columns, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def load_plan(schema_path: str) -> ValidationPlan:
+    """
+    Registry-backed replacement for schema_validator.load_schema.
+
+    Args:
+        schema_path: Path to schema.txt (JSON)
+
+    Returns:
+        Shared ValidationPlan for the schema (do not modify)
+    """
+    with open(schema_path, "rb") as f:
+        return plan_from_bytes(f.read())
+
+def plan_from_bytes(raw: bytes) -> ValidationPlan:
+    """
+    Returns the compiled plan for the raw contents of a schema.txt.
+
+    Raises:
+        UnicodeDecodeError, ValueError: If the schema is not valid UTF-8 JSON (as load_schema)
+    """
+    key = fingerprint(raw)
+    with _lock:
+        plan = _lookup_alias(key)
+    if plan is not None:
+        _touch_entry(key)
+        return plan
+
+    # Newlines translated as a text-mode read does, so parse error positions match load_schema
+    columns = json.loads(raw.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n"))
+    plan = _register(key, columns)
+    _persist(key, columns)
+    return plan
+
+def plan_for_columns(columns: List[Dict]) -> ValidationPlan:
+    """
+    Returns the compiled plan for already parsed column definitions (e.g. as shipped to
+    worker processes), compiling them only if no equal schema is registered.
+    """
+    key = canonical_fingerprint(columns)
+    with _lock:
+        plan = _plans.get(key)
+        if plan is not None:
+            _plans.move_to_end(key)
+            stats["hits"] += 1
+            return plan
+    return _register(None, columns)
+
+def warm_registry() -> int:
+    """
+    Compiles the most recently used schemas persisted in REGISTRY_DIR into the in-process
+    registry, including their row matchers for WARM_DELIMITERS. Unreadable entries are
+    skipped and deleted.
+
+    Returns:
+        Number of plans loaded
+    """
+    if not REGISTRY_DIR or not os.path.isdir(REGISTRY_DIR):
+        return 0
+
+    entries = []
+    with os.scandir(REGISTRY_DIR) as it:
+        for entry in it:
+            if entry.name.endswith(".json"):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.name[:-len(".json")], entry.path))
+                except FileNotFoundError:
+                    continue
+
+    loaded = 0
+    # Oldest first, so the most recently used entries end up most recently used in the LRU
+    for _, key, path in sorted(entries)[-REGISTRY_MAX_PLANS:]:
+        with _lock:
+            if _lookup_alias(key, count=False) is not None:
+                continue  # already compiled, e.g. inherited by a forked worker
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if entry.get("version") != REGISTRY_FORMAT_VERSION:
+                raise ValueError(f"format version {entry.get('version')}")
+            plan = _register(key, entry["columns"], count=False)
+            for delimiter in WARM_DELIMITERS:
+                plan.row_matcher(delimiter)
+            loaded += 1
+        except FileNotFoundError:
+            continue  # evicted by another process
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning(f"Dropping unreadable schema registry entry {path}: {e}")
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    if loaded:
+        logger.info(f"Schema registry: {loaded} compiled schemas loaded from {REGISTRY_DIR}")
+    return loaded
+
+def clear_registry():
+    """Forgets all in-process plans (persisted entries are kept)."""
+    with _lock:
+        _plans.clear()
+        _aliases.clear()
+        _touched.clear()
+        stats.update(hits=0, misses=0)
+
+def _lookup_alias(key: str, count: bool = True) -> Optional[ValidationPlan]:
+    """Plan registered for a file fingerprint, or None. Caller holds _lock."""
+    canonical = _aliases.get(key)
+    plan = _plans.get(canonical) if canonical else None
+    if plan is None:
+        return None
+    _aliases.move_to_end(key)
+    _plans.move_to_end(canonical)
+    if count:
+        stats["hits"] += 1
+    return plan
+
+def _register(key: Optional[str], columns: List[Dict], count: bool = True) -> ValidationPlan:
+    """
+    Adds a plan for columns (reusing an equal registered one) and maps the file
+    fingerprint key to it, evicting least recently used plans and aliases.
+    """
+    canonical = canonical_fingerprint(columns)
+    with _lock:
+        plan = _plans.get(canonical)
+        if plan is None:
+            plan = compile_schema(columns)
+            _plans[canonical] = plan
+        _plans.move_to_end(canonical)
+        if count:
+            stats["misses"] += 1
+        if key is not None:
+            _aliases[key] = canonical
+            _aliases.move_to_end(key)
+        while len(_plans) > REGISTRY_MAX_PLANS:
+            _plans.popitem(last=False)
+        while len(_aliases) > 4 * REGISTRY_MAX_PLANS:  # formatting variants of the kept plans
+            _aliases.popitem(last=False)
+        return plan
+
+def _entry_path(key: str) -> str:
+    return os.path.join(REGISTRY_DIR, f"{key}.json")
+
+def _persist(key: str, columns: List[Dict]):
+    """Writes a registry entry atomically, then evicts old ones. Failures are logged, never raised."""
+    if not REGISTRY_DIR:
+        return
+    try:
+        os.makedirs(REGISTRY_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=REGISTRY_DIR, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": REGISTRY_FORMAT_VERSION, "columns": columns}, f)
+            os.replace(tmp_path, _entry_path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        with _lock:
+            _touched.add(key)
+        _evict_entries()
+    except OSError as e:
+        logger.warning(f"Could not persist schema registry entry {key}: {e}")
+
+def _touch_entry(key: str):
+    """Marks a persisted entry as used (once per process, so hits stay free of I/O)."""
+    if not REGISTRY_DIR:
+        return
+    with _lock:
+        if key in _touched:
+            return
+        _touched.add(key)
+    try:
+        os.utime(_entry_path(key))
+    except FileNotFoundError:
+        pass  # registered before REGISTRY_DIR was set, or evicted
+
+def _evict_entries():
+    entries = []
+    with os.scandir(REGISTRY_DIR) as it:
+        for entry in it:
+            if entry.name.endswith(".json"):
+                try:
+                    entries.append((entry.stat().st_mtime, entry.path))
+                except FileNotFoundError:
+                    continue
+    for _, path in sorted(entries)[:-REGISTRY_MAX_PLANS]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # already evicted by another worker
@@ -11,26 +11,211 @@ Validation includes:
 Used by the feed_analyzer to enforce schema correctness.
 """
 
+import io
 import os
+import re
 import json
-from typing import List, Dict
+import codecs
+from contextlib import closing
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from services.error_accumulator import ErrorAccumulator
 from utils.logger import get_logger
 
 # Initialize logger
 logger = get_logger()
 
-def load_schema(schema_path: str) -> List[Dict]:
+# Size of each raw read when streaming a data file (bytes)
+READ_CHUNK_SIZE = 1024 * 1024
+
+# Row validation backend: "python" (row by row), "numpy" (columnar, see columnar_validator)
+# or "auto" (columnar for schemas with long/decimal columns when NumPy is installed)
+VALIDATION_BACKEND = "auto"
+
+# Error codes (see error_accumulator)
+EMPTY_FILE = "empty_file"
+HEADER_COLUMN_COUNT = "header_column_count"
+HEADER_NAME_MISMATCH = "header_name_mismatch"
+WRONG_VALUE_COUNT = "wrong_value_count"
+NOT_NULLABLE = "not_nullable"
+TYPE_MISMATCH = "type_mismatch"
+
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")  # basic YYYY-MM-DD
+BOOLEAN_VALUES = frozenset(["true", "false", "1", "0"])
+
+def _is_decimal(value: str) -> bool:
+    try:
+        float(value.replace(",", "."))  # supports comma as decimal
+        return True
+    except ValueError:
+        return False
+
+def _is_boolean(value: str) -> bool:
+    return value.lower() in BOOLEAN_VALUES
+
+def _is_unknown(value: str) -> bool:
+    return False  # unknown type
+
+# Per-type value checkers; None means every value is accepted
+TYPE_CHECKERS: Dict[str, Optional[Callable[[str], object]]] = {
+    "string": None,
+    "long": str.isdigit,
+    "decimal": _is_decimal,
+    "boolean": _is_boolean,
+    "date": DATE_PATTERN.match,
+}
+
+# Regex fragments for the whole-row fast path. Each fragment only accepts values its
+# checker also accepts (a strict subset), so a row matching the combined pattern is
+# guaranteed valid; anything else falls back to the per-cell checks for exact errors.
+# "{d}" is replaced by the escaped delimiter.
+TYPE_FAST_PATTERNS = {
+    "long": r"[0-9]+",
+    "decimal": r"[+-]?(?:[0-9]+(?:[.,][0-9]*)?|[.,][0-9]+)",
+    "boolean": r"[Tt][Rr][Uu][Ee]|[Ff][Aa][Ll][Ss][Ee]|[01]",
+    "date": r"[0-9]{4}-[0-9]{2}-[0-9]{2}[^{d}\"]*",
+}
+
+class ValidationPlan:
+    """
+    A schema compiled once into per-column checkers plus an optional whole-row regex.
+    Behaves like the list of column definitions it was built from (len, indexing,
+    iteration), so code written against the raw schema keeps working.
+    Plans are shared between submissions (see schema_registry), so never modify one.
     """
-    Loads column definitions from a JSON schema file.
+    __slots__ = ("columns", "header_names", "checks", "_row_matchers")
+
+    def __init__(self, columns: List[Dict]):
+        self.columns = columns
+        self.header_names = tuple(col_def["name"].upper() for col_def in columns)
+        # (name, nullable, checker, type) per column, in column order
+        self.checks: Tuple[Tuple[str, bool, Optional[Callable[[str], object]], str], ...] = tuple(
+            (col_def["name"], col_def.get("nullable", True), TYPE_CHECKERS.get(col_def["type"], _is_unknown), col_def["type"])
+            for col_def in columns
+        )
+        self._row_matchers: Dict[str, Optional[Callable[[str], object]]] = {}
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    def __getitem__(self, index):
+        return self.columns[index]
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def row_matcher(self, delimiter: str) -> Optional[Callable[[str], object]]:
+        """
+        Returns a fullmatch callable accepting stripped rows that are certainly valid,
+        or None when no fast path can be built for this schema/delimiter.
+        """
+        if delimiter not in self._row_matchers:
+            self._row_matchers[delimiter] = self._compile_row_pattern(delimiter)
+        return self._row_matchers[delimiter]
+
+    def _compile_row_pattern(self, delimiter: str) -> Optional[Callable[[str], object]]:
+        # The fragments use digits, letters and '"+-.,' literally; such delimiters
+        # would be matched inside a value, so they always take the slow path
+        if len(delimiter) != 1 or delimiter.isalnum() or delimiter in '"+-.,' or not self.checks:
+            return None
+
+        d = re.escape(delimiter)
+        fields = []
+        for _, nullable, _, type_name in self.checks:
+            if type_name == "string":
+                fields.append(f"[^{d}]*" if nullable else f'"*[^{d}"][^{d}]*')
+                continue
+            if type_name not in TYPE_FAST_PATTERNS:
+                if not nullable:
+                    return None  # no value can ever pass, always use the slow path
+                fields.append('"?"?')
+                continue
+            content = TYPE_FAST_PATTERNS[type_name].replace("{d}", d)
+            fields.append(f'"?(?:{content}){"?" if nullable else ""}"?')
+        return re.compile(d.join(f"(?:{field})" for field in fields)).fullmatch
+
+def compile_schema(columns: Union[List[Dict], ValidationPlan]) -> ValidationPlan:
+    """
+    Compiles column definitions into a ValidationPlan (no-op for an existing plan).
+
+    Args:
+        columns: Parsed schema definition or an already compiled plan
+
+    Returns:
+        ValidationPlan for the given columns
+    """
+    return columns if isinstance(columns, ValidationPlan) else ValidationPlan(columns)
+
+def load_schema(schema_path: str) -> ValidationPlan:
+    """
+    Loads column definitions from a JSON schema file and compiles them for validation.
 
     Args:
         schema_path: Path to schema.txt (JSON)
 
     Returns:
-        List of dictionaries with keys: name, nullable, type
+        ValidationPlan wrapping the list of dictionaries with keys: name, nullable, type
     """
     with open(schema_path, "r", encoding="utf-8") as f:
-        return json.load(f)
+        return compile_schema(json.load(f))
+
+def iter_chunks(stream: BinaryIO, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yields fixed-size byte chunks from a binary stream until it is exhausted.
+
+    Args:
+        stream: Binary file object opened for reading
+        chunk_size: Maximum number of bytes per chunk
+
+    Yields:
+        Raw byte chunks (the last one may be shorter)
+    """
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+def iter_lines(chunks: Iterable[bytes], utf8_decoder: Optional[codecs.IncrementalDecoder] = None) -> Iterator[str]:
+    """
+    Decodes UTF-8 byte chunks and yields complete lines without their line ending.
+    Newlines are normalised exactly like a text-mode read (\\n, \\r\\n and \\r),
+    so line numbering matches iterating over open(path, "r").
+
+    Args:
+        chunks: Iterable of raw byte chunks in file order
+        utf8_decoder: UTF-8 incremental decoder to use (default: a new one); passing one lets
+            a caller that stops iterating early check the remaining bytes from the same state
+
+    Yields:
+        One decoded line at a time
+    """
+    decoder = io.IncrementalNewlineDecoder(utf8_decoder or codecs.getincrementaldecoder("utf-8")(), translate=True)
+    pending = ""
+    for chunk in chunks:
+        lines = (pending + decoder.decode(chunk)).split("\n")
+        pending = lines.pop()
+        yield from lines
+
+    lines = (pending + decoder.decode(b"", final=True)).split("\n")
+    pending = lines.pop()
+    yield from lines
+    if pending:
+        yield pending
+
+def iter_data_lines(data_file: str, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Streams the lines of a data file using fixed-size buffered reads.
+    Memory use is bounded by the chunk size and the longest line, not the file size.
+
+    Args:
+        data_file: Path to the data file
+        chunk_size: Number of bytes read per chunk
+
+    Yields:
+        One decoded line at a time, without the line ending
+    """
+    with open(data_file, "rb", buffering=0) as f:
+        yield from iter_lines(iter_chunks(f, chunk_size))
 
 def validate_type(value: str, expected_type: str) -> bool:
     """
@@ -43,71 +228,161 @@ def validate_type(value: str, expected_type: str) -> bool:
     Returns:
         True if value matches expected type, else False
     """
-    if expected_type == "string":
-        return True  # any string is valid
-    elif expected_type == "long":
-        return value.isdigit()
-    elif expected_type == "decimal":
-        try:
-            float(value.replace(",", "."))  # supports comma as decimal
-            return True
-        except ValueError:
-            return False
-    elif expected_type == "boolean":
-        return value.lower() in ["true", "false", "1", "0"]
-    elif expected_type == "date":
-        import re
-        return bool(re.match(r"\d{4}-\d{2}-\d{2}", value))  # basic YYYY-MM-DD
-    return False  # unknown type
+    checker = TYPE_CHECKERS.get(expected_type, _is_unknown)
+    return checker is None or bool(checker(value))
 
-def validate_data_against_schema(data_file: str, schema: List[Dict], delimiter: str = ";") -> List[str]:
+def validate_data_against_schema(data_file: str, schema: Union[List[Dict], ValidationPlan], delimiter: str = ";") -> List[str]:
     """
     Validates a .data file against a schema definition.
 
     Args:
         data_file: Path to the data file
-        schema: Parsed schema definition
+        schema: Parsed schema definition or compiled ValidationPlan
         delimiter: Column delimiter in the data file (default: ;)
 
     Returns:
-        List of validation error messages
+        List of validation error messages, bounded by the error_accumulator limits
     """
-    errors = []
+    errors = ErrorAccumulator(data_file)
+
+    with closing(iter_data_lines(data_file)) as lines:
+        header_line = next(lines, None)
+        if header_line is None:
+            errors.add(EMPTY_FILE, "File is empty.")
+        else:
+            accumulate_errors(header_line, lines, schema, errors, delimiter)
+
+    return errors.messages()
+
+def accumulate_errors(header_line: str, lines: Iterable[str], schema: Union[List[Dict], ValidationPlan], errors: ErrorAccumulator, delimiter: str = ";", start: int = 2):
+    """
+    Validates the header line and the following data lines into an error accumulator.
+    Stops consuming lines early when the header makes row checks pointless or the
+    accumulator is in fail-fast mode and has seen an error.
+
+    Args:
+        header_line: First line of the file
+        lines: Remaining lines of the file, in order
+        schema: Parsed schema definition or compiled ValidationPlan
+        errors: Accumulator receiving the errors
+        delimiter: Column delimiter in the data file (default: ;)
+        start: Line number of the first line in lines
+    """
+    plan = compile_schema(schema)
+    header_errors, rows_checkable = check_header(header_line, plan, delimiter)
+    for code, column, message in header_errors:
+        errors.add(code, message, column=column)
+    if rows_checkable and not errors.stopped:
+        accumulate_row_errors(lines, plan, errors, delimiter, start)
+
+def accumulate_row_errors(lines: Iterable[str], plan: ValidationPlan, errors: ErrorAccumulator, delimiter: str = ";", start: int = 2):
+    """
+    Validates data rows into an error accumulator, stopping at the first error in fail-fast mode.
+    """
+    add = errors.add
+    for line_no, code, column, message in iter_row_problems(lines, plan, delimiter, start):
+        add(code, message, line_no, column)
+        if errors.fail_fast:
+            return
+
+def iter_row_errors(data_file: str, header_line: str, lines: Iterable[str], schema: Union[List[Dict], ValidationPlan], delimiter: str = ";") -> Iterator[str]:
+    """
+    Yields validation errors for the header line and every following data line.
+    Rows are consumed lazily so only one line is held in memory at a time.
+
+    Args:
+        data_file: Path of the data file (used in error messages)
+        header_line: First line of the file
+        lines: Remaining lines of the file, in order
+        schema: Parsed schema definition or compiled ValidationPlan
+        delimiter: Column delimiter in the data file (default: ;)
+
+    Yields:
+        Validation error messages in file order
+    """
+    plan = compile_schema(schema)
+    header_errors, rows_checkable = check_header(header_line, plan, delimiter)
+    for _, _, message in header_errors:
+        yield f"{data_file}: {message}"
+    if not rows_checkable:
+        return
 
-    with open(data_file, "r", encoding="utf-8") as f:
-        lines = f.readlines()
+    for line_no, _, _, problem in iter_row_problems(lines, plan, delimiter):
+        yield f"{data_file}, line {line_no}: {problem}"
 
-    if not lines:
-        errors.append(f"{data_file}: File is empty.")
-        return errors
+def check_header(header_line: str, plan: ValidationPlan, delimiter: str = ";") -> Tuple[List[Tuple[str, Optional[str], str]], bool]:
+    """
+    Checks the header line against the schema column names.
+
+    Args:
+        header_line: First line of the file
+        plan: Compiled schema
+        delimiter: Column delimiter in the data file (default: ;)
 
-    headers = lines[0].strip().split(delimiter)
+    Returns:
+        Tuple of ([(error code, column name or None, message)], whether data rows should be validated)
+    """
+    headers = header_line.strip().split(delimiter)
 
     # Check header count matches schema
-    if len(headers) != len(schema):
-        errors.append(f"{data_file}: Header column count does not match schema.")
-        return errors
+    if len(headers) != len(plan):
+        return [(HEADER_COLUMN_COUNT, None, "Header column count does not match schema.")], False
 
     # Check header names match schema
-    for i, col_def in enumerate(schema):
-        expected_name = col_def["name"]
+    errors = []
+    for i, (expected_upper, (expected_name, _, _, _)) in enumerate(zip(plan.header_names, plan.checks)):
         actual_name = headers[i].strip()
-        if expected_name.upper() != actual_name.upper():
-            errors.append(f"{data_file}: Column {i+1} mismatch: expected '{expected_name}', found '{actual_name}'.")
-
-    # Check each row of data
-    for line_no, line in enumerate(lines[1:], start=2):
-        values = line.strip().split(delimiter)
-        if len(values) != len(schema):
-            errors.append(f"{data_file}, line {line_no}: Wrong number of values.")
+        if expected_upper != actual_name.upper():
+            errors.append((HEADER_NAME_MISMATCH, expected_name, f"Column {i+1} mismatch: expected '{expected_name}', found '{actual_name}'."))
+    return errors, True
+
+def iter_row_problems(lines: Iterable[str], plan: ValidationPlan, delimiter: str = ";", start: int = 2) -> Iterator[Tuple[int, str, Optional[str], str]]:
+    """
+    Validates data rows and yields one (line number, error code, column name or None, message)
+    tuple per problem found. The message has no file/line prefix so callers that number lines
+    differently (e.g. chunk-parallel scans) can add it themselves.
+
+    Uses the NumPy columnar backend when VALIDATION_BACKEND allows it (see
+    columnar_validator), otherwise validates row by row; both yield identical results.
+
+    Args:
+        lines: Data lines (without the header), in order
+        plan: Compiled schema
+        delimiter: Column delimiter in the data file (default: ;)
+        start: Line number of the first line in lines
+
+    Yields:
+        (line number, error code, column, problem description) in line order
+    """
+    if VALIDATION_BACKEND != "python":
+        from services import columnar_validator  # imports this module, so loaded on first use
+        if columnar_validator.supports(plan, delimiter, numeric_only=VALIDATION_BACKEND == "auto"):
+            return columnar_validator.iter_columnar_row_problems(lines, plan, delimiter, start)
+    return iter_python_row_problems(lines, plan, delimiter, start)
+
+def iter_python_row_problems(lines: Iterable[str], plan: ValidationPlan, delimiter: str = ";", start: int = 2) -> Iterator[Tuple[int, str, Optional[str], str]]:
+    """
+    Pure-Python row-by-row implementation of iter_row_problems.
+    """
+    width = len(plan)
+    checks = plan.checks
+
+    # Rows accepted by the fast path skip the per-cell checks
+    row_match = plan.row_matcher(delimiter)
+    for line_no, line in enumerate(lines, start=start):
+        line = line.strip()
+        if row_match is not None and row_match(line) is not None:
             continue
 
-        for i, value in enumerate(values):
-            col_def = schema[i]
-            value = value.strip('"')
-            if not value and not col_def.get("nullable", True):
-                errors.append(f"{data_file}, line {line_no}: Column {col_def['name']} is not nullable but is empty.")
-            elif value and not validate_type(value, col_def["type"]):
-                errors.append(f"{data_file}, line {line_no}: Value '{value}' in column {col_def['name']} does not match type '{col_def['type']}'.")
+        values = line.split(delimiter)
+        if len(values) != width:
+            yield line_no, WRONG_VALUE_COUNT, None, "Wrong number of values."
+            continue
 
-    return errors
+        for value, (name, nullable, checker, type_name) in zip(values, checks):
+            value = value.strip('"')
+            if not value:
+                if not nullable:
+                    yield line_no, NOT_NULLABLE, name, f"Column {name} is not nullable but is empty."
+            elif checker is not None and not checker(value):
+                yield line_no, TYPE_MISMATCH, name, f"Value '{value}' in column {name} does not match type '{type_name}'."
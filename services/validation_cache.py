@@ -0,0 +1,155 @@
+"""
+validation_cache.py
+
+Persistent on-disk cache of validation verdicts, so an identical resubmission (a re-drop
+after a transient failure, or the same archive sent twice) is not validated again.
+
+Entries are keyed by a streaming SHA-256 of the submission archive together with the
+submission name (which appears in issue paths), the error reporting limits and CACHE_FORMAT_VERSION. The archive bytes
+cover the data files and the schema.txt shipped with them; bump CACHE_FORMAT_VERSION whenever
+the validation rules change so stale verdicts are never reused.
+
+Each entry is a small JSON file (verdict, issue list and the structured records written to
+the validation report). Entries are evicted least recently
+used first once the cache exceeds CACHE_MAX_BYTES, and unconditionally after CACHE_MAX_AGE
+seconds. Writes are atomic (temp file + rename), so concurrent workers never see partial entries.
+"""
+
+import os
+import json
+import time
+import hashlib
+import tempfile
+from typing import List, Optional, Tuple
+from services.error_accumulator import limits_signature
+from services.validation_report import IssueRecord
+from services.schema_validator import READ_CHUNK_SIZE
+from utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger()
+
+# Enable or disable the verdict cache
+CACHE_ENABLED = True
+
+# Folder holding one <key>.json file per cached verdict
+CACHE_DIR = "./cache/validation"
+
+# Total size of all entries before least recently used ones are evicted
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# Entries older than this (seconds since last use) are evicted
+CACHE_MAX_AGE = 7 * 24 * 3600
+
+# Part of every key; bump when validation rules or issue messages change
+CACHE_FORMAT_VERSION = 3
+
+def submission_key(tar_path: str, submission_name: str) -> str:
+    """
+    Computes the cache key of a submission archive.
+
+    Args:
+        tar_path: Path to the submission archive (plain or compressed)
+        submission_name: Submission base name the archive unpacks to
+
+    Returns:
+        Hex digest identifying the archive content, submission name, error limits and cache format
+    """
+    digest = hashlib.sha256(f"{CACHE_FORMAT_VERSION}\0{submission_name}\0{limits_signature()}\0".encode("utf-8"))
+    with open(tar_path, "rb", buffering=0) as f:
+        for chunk in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _entry_path(key: str) -> str:
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+def has_cached_verdict(key: str) -> bool:
+    """Cheap check whether a verdict is cached for key (it may still turn out expired)."""
+    return os.path.exists(_entry_path(key))
+
+def get_cached_verdict(key: str) -> Optional[Tuple[bool, List[str], int, List[IssueRecord]]]:
+    """
+    Looks up a cached verdict and marks it as recently used.
+
+    Args:
+        key: Key from submission_key
+
+    Returns:
+        Tuple of (passed, issues, issue count, issue records), or None on a miss or an unreadable/expired entry
+    """
+    path = _entry_path(key)
+    try:
+        if time.time() - os.path.getmtime(path) > CACHE_MAX_AGE:
+            os.remove(path)
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        os.utime(path)  # LRU: mtime is the last use
+        records = [tuple(record) for record in entry["records"]]
+        return bool(entry["passed"]), list(entry["issues"]), int(entry["issue_count"]), records
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring unreadable cache entry {path}: {e}")
+        return None
+
+def store_verdict(key: str, passed: bool, issues: List[str], issue_count: int, records: List[IssueRecord]):
+    """
+    Stores a verdict, then evicts old entries to honour CACHE_MAX_BYTES and CACHE_MAX_AGE.
+    Entries larger than the whole cache are not stored. Failures are logged, never raised.
+
+    Args:
+        key: Key from submission_key
+        passed: Validation result
+        issues: Issues reported for the submission
+        issue_count: Total number of issues, including errors only counted in summaries
+        records: Structured issues written to the validation report
+    """
+    entry = {
+        "passed": passed, "issues": issues, "issue_count": issue_count,
+        "records": records, "created": time.time(),
+    }
+    data = json.dumps(entry).encode("utf-8")
+    if len(data) > CACHE_MAX_BYTES:
+        return
+
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, _entry_path(key))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        evict_entries()
+    except OSError as e:
+        logger.warning(f"Could not store cached verdict {key}: {e}")
+
+def evict_entries():
+    """
+    Removes expired entries, then least recently used ones until the cache fits CACHE_MAX_BYTES.
+    """
+    entries = []
+    now = time.time()
+    with os.scandir(CACHE_DIR) as it:
+        for entry in it:
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                st = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    for mtime, size, path in sorted(entries):
+        if total <= CACHE_MAX_BYTES and now - mtime <= CACHE_MAX_AGE:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass  # already evicted by another worker
+        total -= size
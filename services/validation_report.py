@@ -0,0 +1,334 @@
+"""
+validation_report.py
+
+Compact structured validation reports, for dashboards that aggregate failures across many
+submissions without parsing feed_analysis.log.
+
+Every analyzed submission appends one block to the report file of the day it was analyzed
+(REPORT_DIR/validation-YYYY-MM-DD.bin): its verdict and one record per issue with the issue
+code, the file it concerns, line number, column and count. Kept error examples are records
+with count 1; errors only counted in summaries are one record per (code, column) without a
+line number, so the counts of a submission add up to its issue count. Messages are not
+stored; feed_analysis.log keeps them.
+
+Block layout (little-endian, struct-packed):
+    header   BLOCK_HEADER: magic b"LZVR", format version, flags (bit 0: passed), number of
+             strings, number of records, issue count, created (epoch seconds), payload size,
+             CRC-32 of the payload
+    payload  strings (u16 length + UTF-8 bytes each; string 0 is the submission name), then
+             records of RECORD: code, file and column string indexes (NO_STRING: none),
+             line (0: none), count
+
+A block is written with a single O_APPEND write, so worker processes can append to the same
+file concurrently. Readers skip torn or corrupted blocks (bad CRC) and resynchronise at the
+next magic.
+
+Query a day's reports from the command line (optionally exporting them to Parquet when
+pyarrow is installed):
+    python -m services.validation_report --day 2024-01-31 --by code,file
+    python -m services.validation_report --day 2024-01-31 --code type_mismatch --by submission,column
+    python -m services.validation_report --day 2024-01-31 --parquet reports/2024-01-31.parquet
+"""
+
+import os
+import sys
+import time
+import zlib
+import struct
+import fnmatch
+import argparse
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from utils.logger import get_logger
+
+# Initialize logger
+logger = get_logger()
+
+# Write a report block for every analyzed submission
+REPORT_ENABLED = True
+
+# Folder holding one validation-YYYY-MM-DD.bin file per day
+REPORT_DIR = "./reports"
+
+# Part of every block header; bump when the layout changes (readers skip other versions)
+REPORT_FORMAT_VERSION = 1
+
+BLOCK_MAGIC = b"LZVR"
+BLOCK_HEADER = struct.Struct("<4sBBHIIdII")
+RECORD = struct.Struct("<HHHII")
+NO_STRING = 0xFFFF
+FLAG_PASSED = 0x01
+
+# Report fields usable in query_reports(by=...) and as filters
+FIELDS = ("submission", "passed", "code", "file", "line", "column")
+
+IssueRecord = Tuple[str, str, Optional[int], Optional[str], int]  # (code, file, line number or None, column, count)
+
+@dataclass
+class SubmissionReport:
+    """One decoded report block."""
+    submission: str
+    passed: bool
+    issue_count: int
+    created: float
+    records: List[IssueRecord] = field(default_factory=list)
+
+def report_path(created: Optional[float] = None) -> str:
+    """Path of the report file for the (local) day of created (default: now)."""
+    day = time.strftime("%Y-%m-%d", time.localtime(created))
+    return os.path.join(REPORT_DIR, f"validation-{day}.bin")
+
+def encode_report(submission: str, passed: bool, issue_count: int, records: Sequence[IssueRecord], created: float) -> bytes:
+    """
+    Packs one submission's report into a self-contained block.
+
+    Raises:
+        ValueError: If the block has more than NO_STRING distinct strings or a field does not fit
+    """
+    strings: Dict[str, int] = {submission: 0}
+
+    def index(value: Optional[str]) -> int:
+        if value is None:
+            return NO_STRING
+        return strings.setdefault(value, len(strings))
+
+    packed_records = [
+        RECORD.pack(index(code), index(file), index(column), line or 0, count)
+        for code, file, line, column, count in records
+    ]
+    if len(strings) >= NO_STRING:
+        raise ValueError(f"Too many distinct strings in report of {submission}: {len(strings)}")
+
+    parts = []
+    for value in strings:  # insertion order = index order
+        data = value.encode("utf-8")
+        if len(data) > 0xFFFF:
+            raise ValueError(f"String too long for report of {submission}: {value[:50]}...")
+        parts.append(struct.pack("<H", len(data)))
+        parts.append(data)
+    payload = b"".join(parts) + b"".join(packed_records)
+    header = BLOCK_HEADER.pack(
+        BLOCK_MAGIC, REPORT_FORMAT_VERSION, FLAG_PASSED if passed else 0, len(strings), len(records),
+        issue_count, created, len(payload), zlib.crc32(payload),
+    )
+    return header + payload
+
+def append_report(submission: str, passed: bool, issue_count: int, records: Sequence[IssueRecord]) -> Optional[str]:
+    """
+    Appends a submission's report to today's report file. Failures are logged, never raised.
+
+    Args:
+        submission: Submission base name
+        passed: Validation result
+        issue_count: Total number of issues
+        records: Issue records (see IssueRecord)
+
+    Returns:
+        Path of the report file, or None if reporting is disabled or failed
+    """
+    if not REPORT_ENABLED:
+        return None
+    created = time.time()
+    path = report_path(created)
+    try:
+        block = encode_report(submission, passed, issue_count, records, created)
+        os.makedirs(REPORT_DIR, exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            written = os.write(fd, block)  # one write: concurrent appenders never interleave blocks
+        finally:
+            os.close(fd)
+        if written != len(block):
+            raise OSError(f"short write ({written} of {len(block)} bytes)")
+        return path
+    except (OSError, ValueError, struct.error) as e:
+        logger.warning(f"[{submission}] Could not write validation report to {path}: {e}")
+        return None
+
+def iter_reports(path: str) -> Iterator[SubmissionReport]:
+    """
+    Decodes all blocks of a report file in file order, skipping torn, corrupted and
+    other-version blocks.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    view = memoryview(data)
+    offset = 0
+    end = len(data)
+    while offset + BLOCK_HEADER.size <= end:
+        magic, version, flags, string_count, record_count, issue_count, created, payload_size, crc = (
+            BLOCK_HEADER.unpack_from(data, offset)
+        )
+        start = offset + BLOCK_HEADER.size
+        if (
+            magic != BLOCK_MAGIC
+            or start + payload_size > end
+            or zlib.crc32(view[start:start + payload_size]) != crc
+        ):
+            offset = data.find(BLOCK_MAGIC, offset + 1)  # resynchronise after a damaged block
+            if offset < 0:
+                return
+            continue
+        offset = start + payload_size
+        if version != REPORT_FORMAT_VERSION:
+            continue
+        report = _decode_payload(view[start:offset], string_count, record_count)
+        if report is None:
+            continue
+        submission, records = report
+        yield SubmissionReport(submission, bool(flags & FLAG_PASSED), issue_count, created, records)
+
+def _decode_payload(payload: memoryview, string_count: int, record_count: int) -> Optional[Tuple[str, List[IssueRecord]]]:
+    strings = []
+    position = 0
+    try:
+        for _ in range(string_count):
+            (length,) = struct.unpack_from("<H", payload, position)
+            position += 2
+            strings.append(bytes(payload[position:position + length]).decode("utf-8"))
+            position += length
+        if len(payload) - position != record_count * RECORD.size or not strings:
+            return None
+        records = [
+            (
+                None if code == NO_STRING else strings[code],
+                None if file == NO_STRING else strings[file],
+                line or None,
+                None if column == NO_STRING else strings[column],
+                count,
+            )
+            for code, file, column, line, count in RECORD.iter_unpack(payload[position:])
+        ]
+    except (struct.error, UnicodeDecodeError, IndexError):
+        return None
+    return strings[0], records
+
+def report_files(day: Optional[str] = None, report_dir: Optional[str] = None) -> List[str]:
+    """
+    Report files of one day (YYYY-MM-DD), or all report files, in report_dir (default: REPORT_DIR).
+    """
+    report_dir = report_dir or REPORT_DIR
+    pattern = f"validation-{day}.bin" if day else "validation-*.bin"
+    if not os.path.isdir(report_dir):
+        return []
+    return sorted(os.path.join(report_dir, name) for name in os.listdir(report_dir) if fnmatch.fnmatchcase(name, pattern))
+
+def query_reports(
+    paths: Iterable[str],
+    by: Sequence[str] = ("code",),
+    submission: Optional[str] = None,
+    code: Optional[str] = None,
+    file: Optional[str] = None,
+    failed_only: bool = False,
+) -> Tuple[Counter, int, int]:
+    """
+    Aggregates issue counts over report files.
+
+    Args:
+        paths: Report files to scan
+        by: Fields to group by (see FIELDS)
+        submission: Only submissions matching this fnmatch pattern
+        code: Only records with this issue code
+        file: Only records for files matching this fnmatch pattern
+        failed_only: Only submissions that failed validation
+
+    Returns:
+        Tuple of (summed counts keyed by tuples of the by fields, submissions scanned,
+        submissions that failed among them)
+    """
+    unknown = [name for name in by if name not in FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown report fields {unknown}; choose from {', '.join(FIELDS)}")
+    positions = [FIELDS.index(name) for name in by]
+    totals: Counter = Counter()
+    scanned = failed = 0
+    for path in paths:
+        for report in iter_reports(path):
+            if submission and not fnmatch.fnmatchcase(report.submission, submission):
+                continue
+            if failed_only and report.passed:
+                continue
+            scanned += 1
+            failed += not report.passed
+            for record_code, record_file, line, column, count in report.records:
+                if code and record_code != code:
+                    continue
+                if file and not fnmatch.fnmatchcase(record_file, file):
+                    continue
+                row = (report.submission, report.passed, record_code, record_file, line, column)
+                totals[tuple(row[i] for i in positions)] += count
+    return totals, scanned, failed
+
+def export_parquet(paths: Iterable[str], out_path: str) -> int:
+    """
+    Writes the records of report files as one Parquet table (one row per record; submissions
+    without issues get a row with empty code). Requires the optional 'pyarrow' package.
+
+    Returns:
+        Number of rows written
+    """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Parquet export requires the optional 'pyarrow' package") from None
+
+    columns = {name: [] for name in ("submission", "passed", "created", "code", "file", "line", "column", "count")}
+    for path in paths:
+        for report in iter_reports(path):
+            for record in report.records or [(None, None, None, None, 0)]:
+                record_code, record_file, line, column, count = record
+                for name, value in zip(
+                    columns, (report.submission, report.passed, report.created, record_code, record_file, line, column, count)
+                ):
+                    columns[name].append(value)
+    table = pyarrow.table(columns)
+    pyarrow.parquet.write_table(table, out_path)
+    return table.num_rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help="Report files (default: those of --day in --report-dir)")
+    parser.add_argument("--day", help="Day to query, YYYY-MM-DD (default: all days)")
+    parser.add_argument("--report-dir", default=REPORT_DIR, help=f"Folder with report files (default: {REPORT_DIR})")
+    parser.add_argument("--by", default="code", help=f"Comma-separated fields to group by: {', '.join(FIELDS)} (default: code)")
+    parser.add_argument("--code", help="Only this issue code")
+    parser.add_argument("--submission", help="Only submissions matching this pattern (e.g. 'hd*')")
+    parser.add_argument("--file", help="Only files matching this pattern (e.g. '*.U1.data')")
+    parser.add_argument("--failed", action="store_true", help="Only submissions that failed validation")
+    parser.add_argument("--top", type=int, default=50, help="Rows printed (default: 50, 0 = all)")
+    parser.add_argument("--parquet", metavar="OUT", help="Export the records to a Parquet file instead (needs pyarrow)")
+    args = parser.parse_args(argv)
+
+    paths = args.paths or report_files(args.day, args.report_dir)
+    if not paths:
+        print("No report files found.", file=sys.stderr)
+        sys.exit(1)
+
+    start = time.perf_counter()
+    if args.parquet:
+        try:
+            rows = export_parquet(paths, args.parquet)
+        except RuntimeError as e:
+            parser.error(str(e))
+        print(f"Wrote {rows:,} rows from {len(paths)} report files to {args.parquet} in {time.perf_counter() - start:.2f} s")
+        return
+
+    by = [name.strip() for name in args.by.split(",") if name.strip()]
+    try:
+        totals, scanned, failed = query_reports(paths, by, args.submission, args.code, args.file, args.failed)
+    except ValueError as e:
+        parser.error(str(e))
+    elapsed = time.perf_counter() - start
+
+    print(f"{'count':>12}  " + "  ".join(by))
+    for key, count in totals.most_common(args.top or None):
+        print(f"{count:>12,}  " + "  ".join("-" if value is None else str(value) for value in key))
+    print(
+        f"{scanned:,} submissions ({failed:,} failed), {sum(totals.values()):,} issues "
+        f"in {len(paths)} report files, scanned in {elapsed:.2f} s"
+    )
+
+if __name__ == "__main__":
+    main()
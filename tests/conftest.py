@@ -0,0 +1,29 @@
+"""
+conftest.py
+
+Shared pytest setup: makes the repository importable and runs the session in a scratch
+working directory, since the app writes logs/, reports/ and cache/ relative to it.
+
+Usage:
+    python -m pytest tests
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# Before any app module is imported: utils.logger creates logs/ in the working directory
+_WORKDIR = tempfile.mkdtemp(prefix="lz-tests-")
+_PREVIOUS_CWD = os.getcwd()
+os.chdir(_WORKDIR)
+
+@pytest.fixture(scope="session", autouse=True)
+def _scratch_workdir():
+    yield _WORKDIR
+    os.chdir(_PREVIOUS_CWD)
+    shutil.rmtree(_WORKDIR, ignore_errors=True)
@@ -0,0 +1,65 @@
+"""
+Tests for services/auto_fixer.py: prepend_line keeps the file's line ending and bytes, and
+leaves the original untouched when the copy fails.
+"""
+
+import os
+import stat
+import pytest
+from services import auto_fixer
+from services.auto_fixer import prepend_line
+from services.schema_validator import READ_CHUNK_SIZE
+
+def write(path, data: bytes) -> str:
+    with open(path, "wb") as f:
+        f.write(data)
+    return str(path)
+
+def read(path) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+@pytest.mark.parametrize("ending", [b"\n", b"\r\n", b"\r"])
+def test_line_ending_of_first_line_is_kept(tmp_path, ending):
+    original = ending.join([b"1;2", b"3;4", b""])
+    path = write(tmp_path / "feed.U1.data", original)
+
+    prepend_line(path, "COL1;COL2")
+
+    assert read(path) == b"COL1;COL2" + ending + original
+
+def test_file_without_line_ending_gets_newline(tmp_path):
+    path = write(tmp_path / "feed.U1.data", b"1;2")
+    prepend_line(path, "COL1;COL2")
+    assert read(path) == b"COL1;COL2\n1;2"
+
+def test_empty_file(tmp_path):
+    path = write(tmp_path / "feed.U1.data", b"")
+    prepend_line(path, "COL1;COL2")
+    assert read(path) == b"COL1;COL2\n"
+
+def test_large_file_is_copied_unchanged_with_its_mode(tmp_path):
+    original = b"\xc3\xa9;2\r\n" + os.urandom(3 * READ_CHUNK_SIZE + 17)  # past the first read
+    path = write(tmp_path / "feed.U1.data", original)
+    os.chmod(path, 0o640)
+
+    prepend_line(path, "COL1;COL2")
+
+    assert read(path) == b"COL1;COL2\r\n" + original
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o640
+    assert os.listdir(tmp_path) == ["feed.U1.data"]
+
+def test_original_untouched_if_copy_fails(tmp_path, monkeypatch):
+    original = b"1;2\n3;4\n" * 1000
+    path = write(tmp_path / "feed.U1.data", original)
+
+    def failing_copy(src, dst):
+        dst.write(src.read(100))
+        raise OSError(28, "No space left on device")
+    monkeypatch.setattr(auto_fixer, "copy_stream", failing_copy)
+
+    with pytest.raises(OSError):
+        prepend_line(path, "COL1;COL2")
+
+    assert read(path) == original
+    assert os.listdir(tmp_path) == ["feed.U1.data"]  # no temp file left behind
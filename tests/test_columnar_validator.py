@@ -0,0 +1,75 @@
+"""
+Tests for services/columnar_validator.py: the NumPy backend must yield exactly the problems
+(line numbers, codes, columns, messages, order) of schema_validator.iter_python_row_problems.
+"""
+
+import random
+import pytest
+from services.schema_validator import compile_schema, iter_python_row_problems
+
+pytest.importorskip("numpy")
+
+from services import columnar_validator
+from services.columnar_validator import iter_columnar_row_problems, supports
+
+SCHEMA = [
+    {"name": "ID", "nullable": False, "type": "long"},
+    {"name": "AMOUNT", "nullable": False, "type": "decimal"},
+    {"name": "PRICE", "nullable": True, "type": "decimal"},
+    {"name": "BOOKED", "nullable": True, "type": "date"},
+    {"name": "ACTIVE", "nullable": True, "type": "boolean"},
+    {"name": "REGION", "nullable": True, "type": "string"},
+]
+
+# Values per column type, valid and invalid, including the cases the vectorized checks
+# hand back to the per-cell checkers (signs, separators, quotes, whitespace, non-ASCII)
+VALUES = {
+    "long": ["0", "42", "0007", "123456789012345678901234", "-1", "+1", "1.0", "1e3", "x", "", '"12"', "١٢"],
+    "decimal": ["0", "1.5", "-2,25", "+.5", "3.", ".", "1.2.3", "1e3", "abc", "", '"1.5"', "--1", "١.٥"],
+    "date": ["2024-01-31", "2024-13-99", "2024-01-31T10:00", "24-01-31", "2024/01/31", "", "x"],
+    "boolean": ["true", "false", "TRUE", "0", "1", "yes", "", "maybe"],
+    "string": ["EU", "", "Zürich", '"quoted"', "with space"],
+}
+
+def make_lines(count: int, seed: int):
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.01:
+            lines.append("")
+        elif kind < 0.02:
+            lines.append("1;2.5")                              # wrong value count
+        else:
+            values = [rng.choice(VALUES[column["type"]]) for column in SCHEMA]
+            if kind < 0.05:
+                values[0] = f" {values[0]} "                   # surrounding whitespace
+            lines.append(";".join(values))
+    return lines
+
+@pytest.fixture
+def plan():
+    plan = compile_schema(SCHEMA)
+    assert supports(plan, ";", numeric_only=False)
+    return plan
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_columnar_matches_python(plan, seed):
+    lines = make_lines(5000, seed)
+
+    expected = list(iter_python_row_problems(lines, plan, ";", start=2))
+    assert expected
+    assert list(iter_columnar_row_problems(lines, plan, ";", start=2)) == expected
+
+def test_columnar_matches_python_across_small_blocks(plan, monkeypatch):
+    monkeypatch.setattr(columnar_validator, "BLOCK_ROWS", 37)
+    monkeypatch.setattr(columnar_validator, "BLOCK_CHARS", 1000)
+    lines = make_lines(2000, seed=4)
+
+    expected = list(iter_python_row_problems(lines, plan, ";", start=10))
+    assert list(iter_columnar_row_problems(lines, plan, ";", start=10)) == expected
+
+def test_columnar_matches_python_on_valid_rows(plan):
+    lines = [f"{i};{i}.5;;2024-01-31;true;EU" for i in range(3000)]
+
+    assert list(iter_columnar_row_problems(lines, plan, ";")) == list(iter_python_row_problems(lines, plan, ";")) == []
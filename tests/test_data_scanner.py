@@ -0,0 +1,171 @@
+"""
+Tests for services/data_scanner.py: the chunk-parallel scan (split_ranges, _scan_parallel)
+must give the same results as the serial scan_data_file, and LineCounter must count lines
+like a text-mode read however the bytes are chunked.
+"""
+
+import io
+import os
+import random
+import pytest
+from services import data_scanner, error_accumulator
+from services.data_scanner import LineCounter, scan_data_file, split_ranges
+
+SCHEMA = [
+    {"name": "ID", "nullable": False, "type": "long"},
+    {"name": "AMOUNT", "nullable": False, "type": "decimal"},
+    {"name": "REGION", "nullable": True, "type": "string"},
+]
+
+def make_rows(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        kind = rng.random()
+        if kind < 0.02:
+            rows.append(f"x{i};1.5;EU")              # type mismatch
+        elif kind < 0.04:
+            rows.append(f"{i};;EU")                  # not nullable
+        elif kind < 0.05:
+            rows.append(f"{i};1.5")                  # wrong value count
+        else:
+            rows.append(f"{i};{rng.randint(0, 999)}.{rng.randint(0, 99)};R{i % 7}")
+    return rows
+
+def write_file(path, rows, ending: str = "\n", header: str = "ID;AMOUNT;REGION") -> str:
+    with open(path, "wb") as f:
+        f.write((ending.join([header] + rows) + ending).encode("utf-8"))
+    return str(path)
+
+def assert_same_scan(serial, parallel):
+    assert parallel.error is None and serial.error is None
+    assert parallel.line_count == serial.line_count
+    assert parallel.first_line == serial.first_line
+    assert parallel.errors == serial.errors
+    assert parallel.accumulator.total == serial.accumulator.total
+    assert parallel.accumulator.records() == serial.accumulator.records()
+
+@pytest.fixture(autouse=True)
+def always_parallel(monkeypatch):
+    monkeypatch.setattr(data_scanner, "PARALLEL_SCAN_MIN_BYTES", 0)
+
+@pytest.mark.parametrize("ending", ["\n", "\r\n"])
+@pytest.mark.parametrize("workers", [2, 3])
+def test_parallel_scan_matches_serial(tmp_path, ending, workers):
+    path = write_file(tmp_path / "feed.U1.data", make_rows(20000), ending)
+
+    assert_same_scan(scan_data_file(path, SCHEMA), scan_data_file(path, SCHEMA, workers=workers))
+
+def test_parallel_scan_fail_fast_lists_first_error_only(tmp_path, monkeypatch):
+    monkeypatch.setattr(error_accumulator, "FAIL_FAST", True)
+    path = write_file(tmp_path / "feed.U1.data", make_rows(20000))
+
+    serial = scan_data_file(path, SCHEMA)
+    parallel = scan_data_file(path, SCHEMA, workers=3)
+
+    assert serial.accumulator.total == 1
+    assert_same_scan(serial, parallel)
+
+def test_parallel_scan_reports_header_mismatch_like_serial(tmp_path):
+    path = write_file(tmp_path / "feed.U1.data", make_rows(5000), header="ID;AMOUNT;COUNTRY")
+
+    assert_same_scan(scan_data_file(path, SCHEMA), scan_data_file(path, SCHEMA, workers=2))
+
+def test_parallel_scan_reports_decode_error_like_serial(tmp_path):
+    rows = make_rows(20000)
+    path = tmp_path / "feed.U1.data"
+    with open(path, "wb") as f:
+        f.write(("\n".join(["ID;AMOUNT;REGION"] + rows[:15000]) + "\n").encode("utf-8"))
+        f.write(b"15000;1.0;\xff\n")
+        f.write(("\n".join(rows[15000:]) + "\n").encode("utf-8"))
+
+    serial = scan_data_file(str(path), SCHEMA)
+    parallel = scan_data_file(str(path), SCHEMA, workers=3)
+
+    assert isinstance(serial.error, UnicodeDecodeError)
+    assert str(parallel.error) == str(serial.error)
+
+def test_parallel_scan_of_lone_cr_file_matches_serial(tmp_path):
+    path = write_file(tmp_path / "feed.U1.data", make_rows(5000), "\r")
+
+    serial = scan_data_file(path, SCHEMA)
+    parallel = scan_data_file(path, SCHEMA, workers=2)
+
+    assert parallel.line_count == serial.line_count == 5001
+    assert parallel.errors == serial.errors
+
+def test_split_ranges_start_after_newlines_and_cover_the_range(tmp_path):
+    path = write_file(tmp_path / "feed.U1.data", make_rows(20000), "\r\n")
+    with open(path, "rb") as f:
+        data = f.read()
+    start = data.index(b"\n") + 1
+
+    ranges = split_ranges(path, start, len(data), 8)
+
+    assert len(ranges) == 8
+    assert ranges[0][0] == start and ranges[-1][1] == len(data)
+    for (_, end), (next_start, _) in zip(ranges, ranges[1:]):
+        assert end == next_start
+        assert data[next_start - 1:next_start] == b"\n"
+
+def test_split_ranges_without_newlines_is_one_range(tmp_path):
+    path = write_file(tmp_path / "feed.U1.data", make_rows(5000), "\r")
+    size = os.path.getsize(path)
+
+    assert split_ranges(path, 0, size, 4) == [(0, size)]
+
+def text_mode_line_count(data: bytes) -> int:
+    return sum(1 for _ in io.TextIOWrapper(io.BytesIO(data), encoding="utf-8"))
+
+def count_lines(chunks) -> int:
+    counter = LineCounter()
+    for chunk in chunks:
+        counter.feed(chunk)
+    return counter.finish()
+
+LINE_COUNTER_CASES = [
+    b"",                          # empty input
+    b"a;1",                       # no final line ending
+    b"a;1\n",
+    b"a;1\nb;2",                  # missing final newline after several lines
+    b"a;1\r\nb;2\r\n",
+    b"a;1\rb;2\r",                # lone CR endings
+    b"a;1\r\rb;2",               # two lone CRs: an empty line between
+    b"a;1\r\n\r\nb;2\n\n",
+    b"\r", b"\n", b"\r\n", b"\n\r",
+    "\u00e9;\u20ac\r\n\u00fc".encode("utf-8"),  # multi-byte characters
+]
+
+@pytest.mark.parametrize("data", LINE_COUNTER_CASES)
+def test_line_counter_matches_text_mode_at_every_split(data):
+    expected = text_mode_line_count(data)
+
+    assert count_lines([data]) == expected
+    assert count_lines([data[i:i + 1] for i in range(len(data))]) == expected
+    for split in range(1, len(data)):  # includes CRLF and UTF-8 sequences split across chunks
+        assert count_lines([data[:split], data[split:]]) == expected, split
+
+def test_line_counter_counts_crlf_split_across_chunks_once():
+    assert count_lines([b"a;1\r", b"\nb;2\r", b"\n"]) == 2
+    assert count_lines([b"a;1\r", b"", b"\nb;2"]) == 2  # an empty chunk between the halves
+
+def test_line_counter_counts_lone_cr_at_chunk_end():
+    assert count_lines([b"a;1\r", b"b;2\r", b"c;3"]) == 3
+
+def test_line_counter_empty_input():
+    assert count_lines([]) == 0
+    assert count_lines([b"", b""]) == 0
+
+def test_line_counter_passthrough_counts_without_decoding():
+    counter = LineCounter()
+    chunks = [b"a;1\r", b"\nb;2\r", b"c;\xff"]  # invalid UTF-8 is left to the consumer
+    assert list(counter.passthrough(chunks)) == chunks
+    assert counter.line_endings == 2 and counter.last_byte == b"\xff"
+
+def test_line_counter_rejects_invalid_utf8():
+    with pytest.raises(UnicodeDecodeError):
+        count_lines([b"a;1\n", b"b;\xff\n"])
+
+def test_line_counter_rejects_utf8_sequence_cut_at_end():
+    with pytest.raises(UnicodeDecodeError):
+        count_lines(["a;\u20ac".encode("utf-8")[:-1]])
@@ -0,0 +1,93 @@
+"""
+Tests for handlers/feed_analyzer.py: after an auto-fix, _SubmissionChecks.invalidate makes
+collect_issues redo only the checks that depend on the changed files.
+"""
+
+import os
+import pytest
+from handlers import feed_analyzer
+from handlers.feed_analyzer import _SubmissionChecks, analyze_feed
+from services.auto_fixer import fix_submission
+
+NAME = "feed.20240101.S001.V1"
+SCHEMA = '[{"name": "COL1", "nullable": false, "type": "long"}, {"name": "COL2", "nullable": true, "type": "string"}]'
+
+@pytest.fixture
+def submission(tmp_path):
+    """Valid submission except for what a test changes: U1 lacks its header (auto-fixable)."""
+    folder = tmp_path / NAME
+    folder.mkdir()
+    files = {
+        f"{NAME}.U1.data": "1;2\n3;4\n",
+        f"{NAME}.U2.data": "COL1;COL2\n5;x\n6;y\n",
+        f"{NAME}.control": "",
+        f"{NAME}.audit.xml": (
+            f"<Audit><File><FileName>{NAME}.U1.data</FileName><RecordCount>2</RecordCount></File>"
+            f"<File><FileName>{NAME}.U2.data</FileName><RecordCount>2</RecordCount></File></Audit>"
+        ),
+        "schema.txt": SCHEMA,
+    }
+    for name, content in files.items():
+        (folder / name).write_text(content)
+    return str(folder)
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Records every data file scan, audit.xml parse and schema load the analyzer runs."""
+    recorded = []
+
+    def spy(kind, function):
+        def wrapper(path, *args, **kwargs):
+            recorded.append((kind, os.path.basename(path)))
+            return function(path, *args, **kwargs)
+        monkeypatch.setattr(feed_analyzer, function.__name__, wrapper)
+
+    spy("scan", feed_analyzer.scan_data_file)
+    spy("audit", feed_analyzer.scan_audit_xml)
+    spy("schema", feed_analyzer.load_plan)
+    return recorded
+
+def test_header_fix_rescans_only_the_fixed_file(submission, calls):
+    checks = _SubmissionChecks(submission)
+    assert checks.collect_issues()
+    assert sorted(calls) == sorted([("audit", f"{NAME}.audit.xml"), ("schema", "schema.txt"),
+                                    ("scan", f"{NAME}.U1.data"), ("scan", f"{NAME}.U2.data")])
+
+    changed = fix_submission(submission, NAME, checks.data_scans())
+    assert [os.path.basename(path) for path in changed] == [f"{NAME}.U1.data"]
+    calls.clear()
+    checks.invalidate(changed)
+
+    assert checks.collect_issues() == []
+    assert calls == [("scan", f"{NAME}.U1.data")]
+
+def test_control_fix_reruns_no_scans(submission, calls):
+    with open(os.path.join(submission, f"{NAME}.U1.data"), "w") as f:
+        f.write("COL1;COL2\n1;2\n3;4\n")
+    with open(os.path.join(submission, f"{NAME}.control"), "w") as f:
+        f.write("not empty")
+    checks = _SubmissionChecks(submission)
+    assert len(checks.collect_issues()) == 1
+
+    changed = fix_submission(submission, NAME, checks.data_scans())
+    calls.clear()
+    checks.invalidate(changed)
+
+    assert checks.collect_issues() == []
+    assert calls == []
+
+def test_schema_change_rescans_every_data_file(submission, calls):
+    checks = _SubmissionChecks(submission)
+    checks.collect_issues()
+    calls.clear()
+
+    checks.invalidate([os.path.join(submission, "schema.txt")])
+    checks.collect_issues()
+
+    assert sorted(calls) == sorted([("schema", "schema.txt"), ("scan", f"{NAME}.U1.data"), ("scan", f"{NAME}.U2.data")])
+
+def test_analyze_feed_revalidates_incrementally_after_auto_fix(submission, calls):
+    assert analyze_feed(submission)
+
+    assert sorted(calls) == sorted([("audit", f"{NAME}.audit.xml"), ("schema", "schema.txt"),
+                                    ("scan", f"{NAME}.U1.data"), ("scan", f"{NAME}.U1.data"), ("scan", f"{NAME}.U2.data")])
@@ -0,0 +1,127 @@
+"""
+Tests for services/mft_transfer.py: uploads against the stand-in MFT endpoint
+(services/mft_standin.py) with injected faults, covering resume, retries and checksum
+restarts.
+"""
+
+import os
+import random
+import pytest
+from services.mft_standin import start_standin
+from services.mft_transfer import (
+    ChecksumMismatch, HttpTransport, LocalConnection, LocalTransport, TransferEngine, TransferError
+)
+
+NAME = "feed.20240101.S001.V1"
+CHUNK_SIZE = 4096
+
+def make_submission(folder, sizes=(20 * CHUNK_SIZE + 123, 0, 3 * CHUNK_SIZE)) -> str:
+    """Submission folder with one file of random bytes per size."""
+    submission_dir = folder / NAME
+    submission_dir.mkdir()
+    rng = random.Random(7)
+    for i, size in enumerate(sizes):
+        (submission_dir / f"{NAME}.U{i + 1}.data").write_bytes(rng.randbytes(size))
+    return str(submission_dir)
+
+def assert_delivered(submission_dir: str, root: str):
+    for file_name in os.listdir(submission_dir):
+        with open(os.path.join(submission_dir, file_name), "rb") as sent:
+            with open(os.path.join(root, NAME, file_name), "rb") as received:
+                assert received.read() == sent.read(), file_name
+    assert not os.path.exists(os.path.join(root, ".partial", NAME))
+
+def upload(transport, submission_dir: str, max_retries: int = 3):
+    engine = TransferEngine(transport, workers=1, chunk_size=CHUNK_SIZE, max_retries=max_retries, backoff=0)
+    try:
+        return engine.upload_submission(submission_dir)
+    finally:
+        engine.close()
+
+@pytest.fixture
+def standin(tmp_path):
+    """Starts a stand-in server with the given faults; stopped after the test."""
+    servers = []
+
+    def _start(**faults):
+        server = start_standin(str(tmp_path / "outbox"), seed=3, **faults)
+        servers.append(server)
+        return server
+    yield _start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def test_upload_without_faults(tmp_path, standin):
+    submission_dir = make_submission(tmp_path)
+    server = standin()
+    result = upload(HttpTransport(server.url), submission_dir)
+    assert result.ok and result.files == 3 and result.retries == 0
+    assert result.bytes_sent == result.bytes
+    assert_delivered(submission_dir, str(tmp_path / "outbox"))
+
+def test_dropped_connections_resume(tmp_path, standin):
+    submission_dir = make_submission(tmp_path)
+    server = standin(drop_rate=0.2)
+    result = upload(HttpTransport(server.url), submission_dir)
+    assert result.ok, result.error
+    assert server.faults["dropped"] > 0 and result.retries > 0
+    # Resuming re-sends at most the cut-off chunks, never the whole file
+    assert result.bytes_sent <= result.bytes + server.faults["dropped"] * CHUNK_SIZE
+    assert_delivered(submission_dir, str(tmp_path / "outbox"))
+
+def test_server_errors_are_retried(tmp_path, standin):
+    submission_dir = make_submission(tmp_path)
+    server = standin(fail_rate=0.2)
+    result = upload(HttpTransport(server.url), submission_dir)
+    assert result.ok, result.error
+    assert result.retries == server.faults["failed"] > 0
+    assert_delivered(submission_dir, str(tmp_path / "outbox"))
+
+def test_corrupted_upload_restarts(tmp_path, standin):
+    submission_dir = make_submission(tmp_path)
+    server = standin(corrupt_rate=0.02)
+    result = upload(HttpTransport(server.url), submission_dir)
+    assert result.ok, result.error
+    assert server.faults["corrupted"] > 0
+    assert result.bytes_sent > result.bytes  # corrupted files were sent again from the start
+    assert_delivered(submission_dir, str(tmp_path / "outbox"))
+
+def test_persistent_server_errors_exhaust_retries(tmp_path, standin):
+    submission_dir = make_submission(tmp_path)
+    server = standin(fail_rate=1.0)
+    result = upload(HttpTransport(server.url), submission_dir, max_retries=2)
+    assert isinstance(result.error, TransferError)
+    assert result.retries == 2 and result.files == 0
+
+def test_persistent_corruption_exhausts_restarts(tmp_path, standin):
+    submission_dir = make_submission(tmp_path)
+    server = standin(corrupt_rate=1.0)
+    result = upload(HttpTransport(server.url), submission_dir, max_retries=2)
+    assert isinstance(result.error, ChecksumMismatch)
+    assert result.retries == 2 and result.files == 0
+
+class FlakyConnection(LocalConnection):
+    """Drops every second write after storing the chunk, so each retry makes progress."""
+
+    def __init__(self, root: str):
+        super().__init__(root)
+        self.writes = 0
+
+    def write(self, remote_path: str, offset: int, data: bytes) -> int:
+        new_offset = super().write(remote_path, offset, data)
+        self.writes += 1
+        if self.writes % 2 == 0:
+            raise ConnectionResetError("connection dropped")
+        return new_offset
+
+class FlakyTransport(LocalTransport):
+    def connect(self):
+        return FlakyConnection(self.root)
+
+def test_retries_reset_while_upload_progresses(tmp_path):
+    submission_dir = make_submission(tmp_path, sizes=(20 * CHUNK_SIZE,))
+    result = upload(FlakyTransport(str(tmp_path / "outbox")), submission_dir, max_retries=1)
+    assert result.ok, result.error
+    assert result.retries > 1  # more failures than max_retries, none of them consecutive
+    assert_delivered(submission_dir, str(tmp_path / "outbox"))
@@ -0,0 +1,150 @@
+"""
+Tests for handlers/submission_router.py: publishing and crash recovery from every
+journal state (copying, staged, published).
+"""
+
+import os
+import json
+import errno
+import pytest
+from handlers import submission_router
+from handlers.submission_router import STAGING_DIR_NAME, publish_submission, recover_routings
+
+NAME = "feed.20240101.S001.V1"
+
+def make_submission(folder: str, content: str) -> str:
+    os.makedirs(folder)
+    for file_name in (f"{NAME}.U1.data", f"{NAME}.audit.xml"):
+        with open(os.path.join(folder, file_name), "w") as f:
+            f.write(f"{content} {file_name}")
+    return folder
+
+def content_of(folder: str) -> str:
+    with open(os.path.join(folder, f"{NAME}.U1.data")) as f:
+        return f.read().split(" ")[0]
+
+@pytest.fixture
+def layout(tmp_path):
+    """Workspace submission ("new"), an earlier published one ("old") and the journal paths."""
+    target = tmp_path / "ready_for_mft"
+    staging = target / STAGING_DIR_NAME
+    staging.mkdir(parents=True)
+    paths = {
+        "target": str(target),
+        "source": make_submission(str(tmp_path / "workspace" / NAME), "new"),
+        "final": make_submission(str(target / NAME), "old"),
+        "old": str(staging / f"{NAME}.old"),
+        "journal": str(staging / f"{NAME}.route.json"),
+    }
+    return paths
+
+def write_journal(paths, state: str, staged: str):
+    with open(paths["journal"], "w") as f:
+        json.dump({
+            "source": paths["source"], "final": paths["final"], "old": paths["old"],
+            "staged": staged, "state": state,
+        }, f)
+
+def staging_dir(paths) -> str:
+    return os.path.join(paths["target"], STAGING_DIR_NAME)
+
+def test_publish_replaces_earlier_submission(layout):
+    final = publish_submission(layout["source"], layout["target"])
+
+    assert final == layout["final"]
+    assert content_of(final) == "new"
+    assert not os.path.exists(layout["source"])
+    assert not os.path.exists(staging_dir(layout))
+
+def test_publish_copies_when_rename_crosses_filesystems(layout, monkeypatch):
+    def no_cross_device_rename(source, target, _rename=os.rename):
+        if source == layout["source"]:
+            raise OSError(errno.EXDEV, "Invalid cross-device link")
+        _rename(source, target)
+
+    monkeypatch.setattr(submission_router.os, "rename", no_cross_device_rename)
+    final = publish_submission(layout["source"], layout["target"])
+
+    assert content_of(final) == "new"
+    assert not os.path.exists(layout["source"])
+    assert not os.path.exists(staging_dir(layout))
+
+def test_recover_copying_discards_partial_copy(layout):
+    staged = make_submission(os.path.join(staging_dir(layout), f"{NAME}.new"), "partial")
+    write_journal(layout, "copying", staged)
+
+    assert recover_routings(layout["target"]) == 1
+
+    assert content_of(layout["final"]) == "old"
+    assert content_of(layout["source"]) == "new"  # re-routed when its archive is processed again
+    assert not os.path.exists(staging_dir(layout))
+
+def test_recover_copying_restores_displaced_submission(layout):
+    os.rename(layout["final"], layout["old"])
+    write_journal(layout, "copying", os.path.join(staging_dir(layout), f"{NAME}.new"))
+
+    recover_routings(layout["target"])
+
+    assert content_of(layout["final"]) == "old"
+    assert not os.path.exists(layout["old"])
+
+def test_recover_staged_copy_is_published(layout):
+    staged = make_submission(os.path.join(staging_dir(layout), f"{NAME}.new"), "new")
+    write_journal(layout, "staged", staged)
+
+    recover_routings(layout["target"])
+
+    assert content_of(layout["final"]) == "new"
+    assert not os.path.exists(layout["source"])
+    assert not os.path.exists(staging_dir(layout))
+
+def test_recover_staged_rename_is_published(layout):
+    # Same filesystem: the workspace folder itself is the staged copy
+    write_journal(layout, "staged", layout["source"])
+
+    recover_routings(layout["target"])
+
+    assert content_of(layout["final"]) == "new"
+    assert not os.path.exists(layout["source"])
+    assert not os.path.exists(staging_dir(layout))
+
+def test_recover_staged_without_copy_keeps_previous_submission(layout):
+    os.rename(layout["final"], layout["old"])
+    write_journal(layout, "staged", os.path.join(staging_dir(layout), f"{NAME}.new"))
+
+    recover_routings(layout["target"])
+
+    assert content_of(layout["final"]) == "old"
+    assert not os.path.exists(layout["journal"])
+
+def test_recover_published_cleans_up(layout):
+    os.rename(layout["final"], layout["old"])
+    staged = os.path.join(staging_dir(layout), f"{NAME}.new")
+    make_submission(layout["final"], "new")
+    write_journal(layout, "published", staged)
+
+    recover_routings(layout["target"])
+
+    assert content_of(layout["final"]) == "new"
+    assert not os.path.exists(layout["old"])
+    assert not os.path.exists(layout["source"])  # the copy was published, so the workspace folder goes
+    assert not os.path.exists(staging_dir(layout))
+
+def test_recover_discards_unreadable_journal(layout):
+    with open(layout["journal"], "w") as f:
+        f.write("{not json")
+
+    assert recover_routings(layout["target"]) == 1
+
+    assert content_of(layout["final"]) == "old"
+    assert content_of(layout["source"]) == "new"
+    assert not os.path.exists(staging_dir(layout))
+
+def test_publish_settles_leftover_journal_first(layout):
+    staged = make_submission(os.path.join(staging_dir(layout), f"{NAME}.new"), "partial")
+    write_journal(layout, "copying", staged)
+
+    final = publish_submission(layout["source"], layout["target"])
+
+    assert content_of(final) == "new"
+    assert not os.path.exists(staging_dir(layout))
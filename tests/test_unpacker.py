@@ -0,0 +1,81 @@
+"""
+Tests for handlers/unpacker.py: stream_unpack_tar validates data members in-stream for
+plain and compressed archives, and does not write data members that fail validation.
+"""
+
+import io
+import os
+import tarfile
+import pytest
+from handlers import feed_analyzer, unpacker
+from handlers.feed_analyzer import CONTROL_NOT_EMPTY, _SubmissionChecks
+from handlers.unpacker import stream_unpack_tar
+
+NAME = "feed.20240101.S001.V1"
+DATA = f"{NAME}.U1.data"
+SCHEMA = b'[{"name": "ID", "nullable": false, "type": "long"}, {"name": "REGION", "nullable": true, "type": "string"}]'
+
+def make_archive(folder, rows, control=b"", compression=""):
+    """Archive with members in the usual alphabetical order (data before schema.txt)."""
+    data = "\n".join(rows).encode() + b"\n"
+    audit = f"<Audit><File><FileName>{DATA}</FileName><RecordCount>{len(rows) - 1}</RecordCount></File></Audit>"
+    members = [(DATA, data), (f"{NAME}.audit.xml", audit.encode()), (f"{NAME}.control", control), ("schema.txt", SCHEMA)]
+    suffix = f".tar.{compression}" if compression else ".tar"
+    path = str(folder / f"{NAME}{suffix}")
+    with tarfile.open(path, f"w:{compression}") as tar:
+        for name, content in members:
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    return path
+
+def unpack(tmp_path, *args, **kwargs):
+    submission_dir, scans, sizes = stream_unpack_tar(make_archive(tmp_path, *args, **kwargs), str(tmp_path / "workspace"))
+    assert submission_dir
+    return submission_dir, scans, sizes
+
+def issues_of(submission_dir, scans, sizes):
+    checks = _SubmissionChecks(submission_dir, scans, sizes)
+    return checks.collect_issues(), checks.records
+
+@pytest.mark.parametrize("compression", ["", "gz", "bz2", "xz"])
+def test_valid_submission_is_validated_in_stream(tmp_path, compression):
+    submission_dir, scans, sizes = unpack(tmp_path, ["ID;REGION", "1;north", "2;"], compression=compression)
+    assert sorted(os.listdir(submission_dir)) == sorted([DATA, f"{NAME}.audit.xml", f"{NAME}.control", "schema.txt"])
+    (scan,) = scans.values()
+    assert scan.schema_checked and scan.line_count == 3 and not scan.errors
+    assert issues_of(submission_dir, scans, sizes) == ([], [])
+
+@pytest.mark.parametrize("compression", ["", "gz"])
+def test_rejected_data_member_is_not_written(tmp_path, compression):
+    submission_dir, scans, sizes = unpack(tmp_path, ["ID;REGION", "1;north", "x;south"], compression=compression)
+    assert not os.path.exists(os.path.join(submission_dir, DATA))
+    issues, records = issues_of(submission_dir, scans, sizes)
+    assert len(issues) == 1 and "x" in issues[0]
+    assert [record[:2] for record in records] == [("type_mismatch", DATA)]
+
+def test_data_member_auto_fix_may_repair_is_written(tmp_path, monkeypatch):
+    rows = ["1;", "2;"]  # header missing (no letters in the first line): the auto-fixer adds one
+    submission_dir, scans, _ = unpack(tmp_path, rows)
+    assert os.path.exists(os.path.join(submission_dir, DATA))
+
+    monkeypatch.setattr(feed_analyzer, "AUTO_FIX_ENABLED", False)
+    submission_dir, scans, _ = unpack(tmp_path, rows)
+    assert not os.path.exists(os.path.join(submission_dir, DATA))
+
+def test_control_size_comes_from_tar_header(tmp_path):
+    submission_dir, scans, sizes = unpack(tmp_path, ["ID;REGION", "1;north"], control=b"abc")
+    control_path = os.path.normpath(os.path.join(submission_dir, f"{NAME}.control"))
+    assert sizes[control_path] == 3
+    open(control_path, "w").close()  # the header size is used, not the unpacked file
+    _, records = issues_of(submission_dir, scans, sizes)
+    assert [record[0] for record in records] == [CONTROL_NOT_EMPTY]
+
+def test_compressed_archive_without_prepass_is_validated_from_disk(tmp_path, monkeypatch):
+    monkeypatch.setattr(unpacker, "COMPRESSED_SCHEMA_PREPASS", False)
+    submission_dir, scans, sizes = unpack(tmp_path, ["ID;REGION", "1;north", "x;south"], compression="gz")
+    (scan,) = scans.values()
+    assert not scan.schema_checked
+    assert os.path.exists(os.path.join(submission_dir, DATA))
+    issues, _ = issues_of(submission_dir, scans, sizes)
+    assert len(issues) == 1
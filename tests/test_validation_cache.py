@@ -0,0 +1,113 @@
+"""
+Tests for services/validation_cache.py: keys follow the archive content, and the age and
+size caps evict entries.
+"""
+
+import os
+import time
+import pytest
+from services import validation_cache
+from services.validation_cache import evict_entries, get_cached_verdict, has_cached_verdict, store_verdict, submission_key
+
+NAME = "feed.20240101.S001.V1"
+RECORDS = [("type_mismatch", f"{NAME}.U1.data", 12, "AMOUNT", 1)]
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    folder = tmp_path / "cache"
+    monkeypatch.setattr(validation_cache, "CACHE_DIR", str(folder))
+    return folder
+
+def write_archive(path, content: bytes) -> str:
+    with open(path, "wb") as f:
+        f.write(content)
+    return str(path)
+
+def entry_path(key: str) -> str:
+    return os.path.join(validation_cache.CACHE_DIR, f"{key}.json")
+
+def set_last_use(key: str, seconds_ago: float):
+    stamp = time.time() - seconds_ago
+    os.utime(entry_path(key), (stamp, stamp))
+
+def test_verdict_roundtrip(tmp_path):
+    key = submission_key(write_archive(tmp_path / f"{NAME}.tar", b"archive"), NAME)
+    store_verdict(key, False, ["Row 12: bad AMOUNT"], 3, RECORDS)
+
+    assert has_cached_verdict(key)
+    assert get_cached_verdict(key) == (False, ["Row 12: bad AMOUNT"], 3, RECORDS)
+
+def test_changed_archive_misses_the_cache(tmp_path):
+    tar_path = write_archive(tmp_path / f"{NAME}.tar", b"archive v1" * 1000)
+    store_verdict(submission_key(tar_path, NAME), True, [], 0, [])
+
+    write_archive(tar_path, b"archive v2" * 1000)  # same name and size, different content
+    key = submission_key(tar_path, NAME)
+
+    assert not has_cached_verdict(key)
+    assert get_cached_verdict(key) is None
+
+def test_key_depends_on_name_and_format_version(tmp_path, monkeypatch):
+    tar_path = write_archive(tmp_path / f"{NAME}.tar", b"archive")
+    key = submission_key(tar_path, NAME)
+
+    assert submission_key(tar_path, NAME) == key
+    assert submission_key(tar_path, "feed.20240101.S002.V1") != key
+    monkeypatch.setattr(validation_cache, "CACHE_FORMAT_VERSION", validation_cache.CACHE_FORMAT_VERSION + 1)
+    assert submission_key(tar_path, NAME) != key
+
+def test_expired_entry_is_a_miss_and_removed(monkeypatch):
+    monkeypatch.setattr(validation_cache, "CACHE_MAX_AGE", 3600)
+    store_verdict("a" * 64, True, [], 0, [])
+    set_last_use("a" * 64, 7200)
+
+    assert get_cached_verdict("a" * 64) is None
+    assert not os.path.exists(entry_path("a" * 64))
+
+def test_storing_evicts_expired_entries(monkeypatch):
+    monkeypatch.setattr(validation_cache, "CACHE_MAX_AGE", 3600)
+    store_verdict("a" * 64, True, [], 0, [])
+    store_verdict("b" * 64, True, [], 0, [])
+    set_last_use("a" * 64, 7200)
+    set_last_use("b" * 64, 1800)
+
+    store_verdict("c" * 64, True, [], 0, [])
+
+    assert not has_cached_verdict("a" * 64)
+    assert has_cached_verdict("b" * 64) and has_cached_verdict("c" * 64)
+
+def test_size_cap_evicts_least_recently_used(monkeypatch):
+    store_verdict("a" * 64, False, ["issue"] * 10, 10, RECORDS)
+    entry_size = os.path.getsize(entry_path("a" * 64))
+    monkeypatch.setattr(validation_cache, "CACHE_MAX_BYTES", 3 * entry_size)
+    store_verdict("b" * 64, False, ["issue"] * 10, 10, RECORDS)
+    store_verdict("c" * 64, False, ["issue"] * 10, 10, RECORDS)
+    set_last_use("a" * 64, 300)
+    set_last_use("b" * 64, 200)
+    set_last_use("c" * 64, 100)
+    assert get_cached_verdict("a" * 64) is not None  # a lookup makes "a" the most recently used
+
+    store_verdict("d" * 64, False, ["issue"] * 10, 10, RECORDS)
+
+    assert not has_cached_verdict("b" * 64)
+    assert all(has_cached_verdict(key * 64) for key in "acd")
+    assert sum(os.path.getsize(entry_path(key * 64)) for key in "acd") <= validation_cache.CACHE_MAX_BYTES
+
+def test_entry_larger_than_the_cache_is_not_stored(monkeypatch):
+    monkeypatch.setattr(validation_cache, "CACHE_MAX_BYTES", 100)
+    store_verdict("a" * 64, False, ["a long issue message"] * 20, 20, RECORDS)
+
+    assert not has_cached_verdict("a" * 64)
+
+def test_unreadable_entry_is_a_miss(cache_dir):
+    cache_dir.mkdir()
+    (cache_dir / f"{'a' * 64}.json").write_text("{not json")
+
+    assert get_cached_verdict("a" * 64) is None
+
+def test_evict_entries_keeps_fresh_entries_within_the_cap():
+    for key in "abc":
+        store_verdict(key * 64, True, [], 0, [])
+    evict_entries()
+
+    assert all(has_cached_verdict(key * 64) for key in "abc")
@@ -0,0 +1,128 @@
+"""
+Tests for services/validation_report.py: report blocks written with append_report and
+encode_report read back unchanged, and iter_reports / query_reports recover every intact
+block of a file with torn, corrupted or foreign blocks.
+"""
+
+import struct
+import pytest
+from services import validation_report
+from services.validation_report import (
+    BLOCK_HEADER, BLOCK_MAGIC, append_report, encode_report, iter_reports, query_reports, report_files
+)
+
+CREATED = 1704103200.0  # 2024-01-01
+
+REPORTS = [
+    ("feed.20240101.S001.V1", True, 0, []),
+    ("feed.20240101.S002.V1", False, 7, [
+        ("type_mismatch", "feed.20240101.S002.V1.U1.data", 12, "AMOUNT", 1),
+        ("type_mismatch", "feed.20240101.S002.V1.U1.data", None, "AMOUNT", 4),  # beyond the listed examples
+        ("not_nullable", "feed.20240101.S002.V1.U2.data", 3, "ID", 1),
+        ("control_not_empty", "feed.20240101.S002.V1.control", None, None, 1),
+    ]),
+    ("feed.20240101.S003.V1", False, 2, [
+        ("type_mismatch", "feed.20240101.S003.V1.U1.data", 5, "ID", 1),
+        ("record_count_mismatch", "feed.20240101.S003.V1.U1.data", None, None, 1),
+    ]),
+]
+
+@pytest.fixture
+def report_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(validation_report, "REPORT_DIR", str(tmp_path))
+    monkeypatch.setattr(validation_report, "REPORT_ENABLED", True)
+    return tmp_path
+
+def blocks():
+    return [encode_report(*report, created=CREATED) for report in REPORTS]
+
+def write_blocks(path, parts) -> str:
+    with open(path, "wb") as f:
+        f.write(b"".join(parts))
+    return str(path)
+
+def decoded(path):
+    return [(r.submission, r.passed, r.issue_count, r.records) for r in iter_reports(path)]
+
+def test_append_report_roundtrip(report_dir):
+    paths = {append_report(*report) for report in REPORTS}
+
+    assert paths == set(report_files(report_dir=str(report_dir)))
+    (path,) = paths
+    assert decoded(path) == REPORTS
+
+def test_append_report_disabled_writes_nothing(report_dir, monkeypatch):
+    monkeypatch.setattr(validation_report, "REPORT_ENABLED", False)
+    assert append_report(*REPORTS[0]) is None
+    assert report_files(report_dir=str(report_dir)) == []
+
+def test_unencodable_report_is_logged_not_raised(report_dir):
+    too_long = "x" * 0x10000
+    assert append_report("feed.20240101.S004.V1", False, 1, [("schema_error", too_long, None, None, 1)]) is None
+
+@pytest.mark.parametrize("cut", [1, BLOCK_HEADER.size - 1, BLOCK_HEADER.size + 5])
+def test_torn_last_block_is_skipped(tmp_path, cut):
+    parts = blocks()
+    parts[-1] = parts[-1][:-cut] if cut < len(parts[-1]) else b""
+    path = write_blocks(tmp_path / "validation-2024-01-01.bin", parts)
+
+    assert decoded(path) == REPORTS[:2]
+
+def test_corrupted_payload_is_skipped_and_later_blocks_recovered(tmp_path):
+    parts = blocks()
+    damaged = bytearray(parts[1])
+    damaged[BLOCK_HEADER.size + 3] ^= 0x40  # fails the block's CRC
+    parts[1] = bytes(damaged)
+    path = write_blocks(tmp_path / "validation-2024-01-01.bin", parts)
+
+    assert decoded(path) == [REPORTS[0], REPORTS[2]]
+
+def test_torn_block_in_the_middle_resynchronises(tmp_path):
+    parts = blocks()
+    parts[1] = parts[1][:len(parts[1]) // 2]  # e.g. a crash during a write, then more appends
+    path = write_blocks(tmp_path / "validation-2024-01-01.bin", [parts[0], parts[1], b"\x00garbage", parts[2]])
+
+    assert decoded(path) == [REPORTS[0], REPORTS[2]]
+
+def test_corrupted_header_size_resynchronises(tmp_path):
+    parts = blocks()
+    damaged = bytearray(parts[0])
+    struct.pack_into("<I", damaged, BLOCK_HEADER.size - 8, 10 ** 9)  # payload_size beyond the file
+    path = write_blocks(tmp_path / "validation-2024-01-01.bin", [bytes(damaged)] + parts[1:])
+
+    assert decoded(path) == REPORTS[1:]
+
+def test_other_format_versions_are_skipped(tmp_path, monkeypatch):
+    monkeypatch.setattr(validation_report, "REPORT_FORMAT_VERSION", 99)
+    foreign = encode_report(*REPORTS[1], created=CREATED)
+    monkeypatch.undo()
+    parts = blocks()
+    path = write_blocks(tmp_path / "validation-2024-01-01.bin", [parts[0], foreign, parts[2]])
+
+    assert foreign.startswith(BLOCK_MAGIC)
+    assert decoded(path) == [REPORTS[0], REPORTS[2]]
+
+def test_query_reports_counts_only_intact_blocks(tmp_path):
+    parts = blocks()
+    intact = write_blocks(tmp_path / "validation-2024-01-01.bin", parts)
+    damaged = bytearray(parts[2])
+    damaged[-1] ^= 0x01
+    torn = write_blocks(tmp_path / "validation-2024-01-02.bin", parts[:2] + [bytes(damaged)])
+
+    counts, scanned, failed = query_reports([intact], by=("code",))
+    assert (scanned, failed) == (3, 2)
+    assert counts == {("type_mismatch",): 6, ("not_nullable",): 1, ("control_not_empty",): 1, ("record_count_mismatch",): 1}
+
+    counts, scanned, failed = query_reports([torn], by=("code", "column"), code="type_mismatch")
+    assert (scanned, failed) == (2, 1)
+    assert counts == {("type_mismatch", "AMOUNT"): 5}
+
+def test_query_reports_filters(tmp_path):
+    path = write_blocks(tmp_path / "validation-2024-01-01.bin", blocks())
+
+    counts, scanned, _ = query_reports([path], by=("submission",), failed_only=True, file="*.U1.data")
+    assert scanned == 2
+    assert counts == {("feed.20240101.S002.V1",): 5, ("feed.20240101.S003.V1",): 2}
+
+    with pytest.raises(ValueError):
+        query_reports([path], by=("sender",))
@@ -6,16 +6,43 @@ ready to be picked up by Grafana, Loki, FluentBit, or any structured log collect
 
 Each line represents a single event. These logs can be used for monitoring feed
 validation status and triggering alerts/tickets (e.g., in ServiceNow).
+
+Events are written by a single long-lived EventSink per process: it keeps the file open,
+batches lines and flushes them from a background thread (on batch size, on a time
+interval and at interpreter exit), rotating the file once it exceeds a size limit.
+Worker processes forward their events through a queue to the parent's sink.
 """
 
 import os
 import json
+import atexit
+import threading
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Dict, List, Optional
+from utils.logger import get_logger
 
 # Path to JSONL log file for Grafana ingestion
 GRAFANA_LOG_PATH = "./logs/grafana_feed_events.jsonl"
 
+# Flush once this many events are pending ...
+EVENT_BATCH_SIZE = 100
+# ... or at least this often (seconds)
+EVENT_FLUSH_INTERVAL = 1.0
+
+# Rotate the JSONL file when it would grow beyond this size; keep this many old files (.1, .2, ...)
+EVENT_LOG_MAX_BYTES = 50 * 1024 * 1024
+EVENT_LOG_BACKUP_COUNT = 5
+
+# When set (in worker processes), events are sent to the parent instead of written here
+_event_queue = None
+
+# Process-wide sink, created on first use
+_sink = None
+_sink_lock = threading.Lock()
+
+# Callbacks receiving every event written by this process (see add_event_observer)
+_event_observers: List[Callable[[Dict], None]] = []
+
 def log_event(
     event: str,
     submission: str,
@@ -24,7 +51,8 @@ def log_event(
     critical: bool = False,
     recommended_action: Optional[str] = None,
     contact: Optional[str] = "datafeeds-support@example.com",
-    source_system: str = "HDR LZ Validator"
+    source_system: str = "HDR LZ Validator",
+    metrics: Optional[Dict] = None
 ):
     """
     Logs a structured event in JSONL format for observability.
@@ -38,6 +66,7 @@ def log_event(
         recommended_action: Optional suggestion for feed sender
         contact: Email or team responsible for support
         source_system: Name of the system emitting the event
+        metrics: Optional numeric measurements (e.g. stage timings), added as a "metrics" field
     """
     log_entry = {
         "event": event,
@@ -50,7 +79,185 @@ def log_event(
         "source_system": source_system,
         "contact": contact
     }
+    if metrics is not None:
+        log_entry["metrics"] = metrics
+
+    if _event_queue is not None:
+        _event_queue.put(log_entry)
+    else:
+        get_event_sink().emit(log_entry)
+
+class EventSink:
+    """
+    Buffered, size-rotated JSONL writer with a background flush thread.
+
+    Args:
+        path: JSONL file to append to
+        batch_size: Pending events that trigger an immediate flush
+        flush_interval: Maximum seconds an event waits in the buffer
+        max_bytes: Rotate before the file would exceed this size (0 = never rotate)
+        backup_count: Rotated files to keep (0 = truncate instead of keeping a backup)
+    """
+
+    def __init__(
+        self,
+        path: str = GRAFANA_LOG_PATH,
+        batch_size: int = EVENT_BATCH_SIZE,
+        flush_interval: float = EVENT_FLUSH_INTERVAL,
+        max_bytes: int = EVENT_LOG_MAX_BYTES,
+        backup_count: int = EVENT_LOG_BACKUP_COUNT
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._pending: List[bytes] = []
+        self._pending_lock = threading.Lock()  # guards _pending
+        self._write_lock = threading.Lock()    # guards the file handle; held while a batch is written
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._file = None
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._run, name="grafana-event-sink", daemon=True)
+        self._thread.start()
+
+    def emit(self, log_entry: Dict):
+        """Queues one event; it is written on the next flush."""
+        for observer in _event_observers:
+            try:
+                observer(log_entry)
+            except Exception as e:
+                get_logger().error(f"Event observer {observer!r} failed: {e}")
+        line = (json.dumps(log_entry) + "\n").encode("utf-8")
+        with self._pending_lock:
+            self._pending.append(line)
+            flush_now = len(self._pending) >= self.batch_size or self._closed
+        if flush_now:
+            if self._closed:
+                self.flush()
+            else:
+                self._wakeup.set()
+
+    def flush(self):
+        """Writes all pending events to the file, in emit order."""
+        with self._write_lock:
+            with self._pending_lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return
+            data = b"".join(batch)
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                self._file = open(self.path, "ab")
+            if self.max_bytes and self._file.tell() and self._file.tell() + len(data) > self.max_bytes:
+                self._rotate()
+            self._file.write(data)
+            self._file.flush()
+
+    def close(self):
+        """Flushes pending events, stops the flush thread and closes the file."""
+        if self._pid != os.getpid() or self._closed:
+            return  # a forked child must not flush the parent's buffer
+        self._closed = True
+        self._wakeup.set()
+        self._thread.join()
+        self.flush()
+        with self._write_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _rotate(self):
+        """Shifts path -> path.1 -> path.2 ... and reopens an empty file (caller holds _write_lock)."""
+        self._file.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                source = f"{self.path}.{i}"
+                if os.path.exists(source):
+                    os.replace(source, f"{self.path}.{i + 1}")
+            os.replace(self.path, f"{self.path}.1")
+            self._file = open(self.path, "ab")
+        else:
+            self._file = open(self.path, "wb")
+
+    def _run(self):
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                get_logger().error(f"Failed to write Grafana events to {self.path}: {e}")
+
+def get_event_sink() -> EventSink:
+    """
+    Returns this process's EventSink, creating it (and its exit-time flush) on first use.
+    """
+    global _sink
+    with _sink_lock:
+        if _sink is None:
+            _sink = EventSink()
+            atexit.register(_sink.close)
+        return _sink
+
+def add_event_observer(observer: Callable[[Dict], None]):
+    """
+    Registers a callback for every event this process writes, including events forwarded
+    by worker processes (e.g. to aggregate metrics in the parent).
+
+    Args:
+        observer: Called with each event dict before it is queued for writing
+    """
+    _event_observers.append(observer)
+
+def flush_events():
+    """Writes all buffered events now (e.g. before handing the JSONL file to another tool)."""
+    if _sink is not None:
+        _sink.flush()
+
+def _reset_sink_after_fork():
+    # The inherited sink's thread does not exist in the child and its buffer belongs to the parent
+    global _sink, _sink_lock
+    _sink = None
+    _sink_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_reset_sink_after_fork)
+
+def set_event_queue(event_queue):
+    """
+    Sends all events emitted by this process to a queue instead of the JSONL file.
+    Used by worker processes so that only the parent writes the file.
+
+    Args:
+        event_queue: multiprocessing queue read by EventQueueListener in the parent
+    """
+    global _event_queue
+    _event_queue = event_queue
+
+class EventQueueListener:
+    """
+    Background thread in the parent process that passes events received from
+    worker processes to this process's EventSink, making it the file's single writer.
+    """
+
+    _STOP = None
+
+    def __init__(self, event_queue):
+        self.event_queue = event_queue
+        self._thread = threading.Thread(target=self._run, name="grafana-event-listener", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Hands all queued events to the sink and stops the listener thread."""
+        self.event_queue.put(self._STOP)
+        self._thread.join()
 
-    os.makedirs(os.path.dirname(GRAFANA_LOG_PATH), exist_ok=True)
-    with open(GRAFANA_LOG_PATH, "a") as f:
-        f.write(json.dumps(log_entry) + "\n")
+    def _run(self):
+        while True:
+            log_entry = self.event_queue.get()
+            if log_entry is self._STOP:
+                return
+            get_event_sink().emit(log_entry)
@@ -9,25 +9,65 @@ Used by all modules for consistent logging output.
 import logging
 import os
 
+# Set once the handlers are installed; later get_logger() calls only look the logger up
+_configured = False
+
 def get_logger():
     """
     Returns a configured logger instance for the app.
     Logs are written to logs/app.log and also displayed in the console.
+    The handlers are set up by the first call only (modules call this at import time).
     
     Returns:
         logging.Logger instance
     """
-    log_dir = "logs"
-    os.makedirs(log_dir, exist_ok=True)
-    log_path = os.path.join(log_dir, "app.log")
-
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(levelname)s - %(message)s",
-        handlers=[
-            logging.FileHandler(log_path),       # Log to file
-            logging.StreamHandler()              # Log to stdout
-        ]
-    )
+    global _configured
+    if not _configured:
+        _configured = True
+        log_dir = "logs"
+        os.makedirs(log_dir, exist_ok=True)
+        log_path = os.path.join(log_dir, "app.log")
+
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s - %(levelname)s - %(message)s",
+            handlers=[
+                logging.FileHandler(log_path),       # Log to file
+                logging.StreamHandler()              # Log to stdout
+            ]
+        )
 
     return logging.getLogger("landingzone")
+
+def start_log_listener(log_queue) -> "logging.handlers.QueueListener":
+    """
+    Starts a listener in the parent process that writes records sent by worker
+    processes through the app's configured handlers, so only one process ever
+    writes to logs/app.log.
+
+    Args:
+        log_queue: multiprocessing queue shared with the workers
+
+    Returns:
+        Running QueueListener; call stop() once all workers have finished
+    """
+    import logging.handlers  # socket/pickle heavy; only needed with worker processes
+
+    get_logger()
+    listener = logging.handlers.QueueListener(log_queue, *logging.getLogger().handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+def configure_worker_logging(log_queue):
+    """
+    Routes all logging in a worker process to the parent's listener.
+    Replaces any handlers inherited from the parent (e.g. the app.log file handler).
+
+    Args:
+        log_queue: multiprocessing queue read by start_log_listener() in the parent
+    """
+    import logging.handlers
+
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(logging.INFO)
@@ -0,0 +1,198 @@
+"""
+metrics.py
+
+Per-stage timing of the validation pipeline.
+
+Every stage of every submission (hashing, unpacking, audit parsing, record counting,
+schema validation, auto-fix, reporting the verdict, routing and MFT hand-off) runs inside stage(),
+which measures its wall time together with the bytes and rows it processed and emits them
+as a "stage_completed" event in the Grafana JSONL stream (with a numeric "metrics" field).
+
+The process that writes the JSONL file (the parent, when workers forward their events)
+also aggregates those events into a Prometheus text-format file: a latency histogram and
+byte/row counters per stage, ready for node_exporter's textfile collector, so Grafana can
+chart per-stage percentiles and throughput over time.
+
+With PROFILE_DIR set (--profile DIR), profile_submission() additionally runs cProfile over
+each submission and writes <submission>.prof into that folder (view with pstats or snakeviz).
+"""
+
+import os
+import time
+import atexit
+import cProfile
+import tempfile
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, List
+from utils.logger import get_logger
+from utils.grafana_logger import add_event_observer, log_event
+
+# Initialize logger
+logger = get_logger()
+
+# Enable or disable stage_completed events and the Prometheus file
+METRICS_ENABLED = True
+
+# Prometheus text-format file rewritten after every routed submission and at exit
+PROMETHEUS_PATH = "./logs/pipeline_metrics.prom"
+
+# Upper bounds (seconds) of the stage duration histogram buckets
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+
+# Folder receiving one cProfile dump per submission (None = profiling off)
+PROFILE_DIR = None
+
+METRIC_PREFIX = "landing_zone_stage"
+
+@dataclass
+class StageTiming:
+    """
+    Measurement of one stage of one submission. Code inside stage() may update
+    bytes and rows once it knows how much it processed.
+
+    Attributes:
+        submission: Submission base name
+        stage: Stage name (e.g. unpack, schema_validation)
+        bytes: Bytes read or moved by the stage
+        rows: Rows (lines or entries) processed by the stage
+        seconds: Wall time, set when the stage ends
+    """
+    submission: str
+    stage: str
+    bytes: int = 0
+    rows: int = 0
+    seconds: float = 0.0
+
+@contextmanager
+def stage(submission: str, name: str, bytes: int = 0, rows: int = 0) -> Iterator[StageTiming]:
+    """
+    Times the enclosed block as one stage of a submission and emits a stage_completed event.
+    The event is emitted even if the block raises, so failing stages show up too.
+
+    Args:
+        submission: Submission base name
+        name: Stage name
+        bytes: Bytes processed, if known up front
+        rows: Rows processed, if known up front
+
+    Yields:
+        StageTiming whose bytes and rows may be updated inside the block
+    """
+    timing = StageTiming(submission, name, bytes, rows)
+    start = time.perf_counter()
+    try:
+        yield timing
+    finally:
+        timing.seconds = time.perf_counter() - start
+        if METRICS_ENABLED:
+            log_event(
+                "stage_completed",
+                submission,
+                "stage_metrics",
+                f"{name} took {timing.seconds:.3f} s ({timing.bytes:,} bytes, {timing.rows:,} rows)",
+                metrics={"stage": name, "seconds": timing.seconds, "bytes": timing.bytes, "rows": timing.rows},
+            )
+
+@contextmanager
+def profile_submission(submission: str) -> Iterator[None]:
+    """
+    Runs cProfile over the enclosed block and writes PROFILE_DIR/<submission>.prof.
+    Does nothing while PROFILE_DIR is None. Only this thread is profiled, not scan workers.
+    """
+    if not PROFILE_DIR:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            profiler.dump_stats(os.path.join(PROFILE_DIR, f"{submission}.prof"))
+        except OSError as e:
+            logger.warning(f"[{submission}] Could not write profile to {PROFILE_DIR}: {e}")
+
+class _StageStats:
+    """Aggregated measurements of one stage."""
+
+    def __init__(self):
+        self.bucket_counts = [0] * len(DURATION_BUCKETS)
+        self.count = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self.rows = 0
+
+    def observe(self, seconds: float, bytes: int, rows: int):
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+        self.count += 1
+        self.seconds += seconds
+        self.bytes += bytes
+        self.rows += rows
+
+_stats: Dict[str, _StageStats] = {}
+_stats_lock = threading.Lock()
+_pid = os.getpid()
+
+def _observe(log_entry: Dict):
+    """Event observer: aggregates stage_completed events written by this process."""
+    metrics = log_entry.get("metrics")
+    if log_entry.get("event") != "stage_completed" or not metrics:
+        return
+    with _stats_lock:
+        if not _stats:
+            atexit.register(write_prometheus_file)
+        _stats.setdefault(metrics["stage"], _StageStats()).observe(metrics["seconds"], metrics["bytes"], metrics["rows"])
+
+add_event_observer(_observe)
+
+def render_prometheus() -> str:
+    """Aggregated stage metrics in the Prometheus text exposition format."""
+    with _stats_lock:
+        stats = sorted(_stats.items())
+        lines: List[str] = [
+            f"# HELP {METRIC_PREFIX}_duration_seconds Wall time of pipeline stages per submission.",
+            f"# TYPE {METRIC_PREFIX}_duration_seconds histogram",
+        ]
+        for name, stage_stats in stats:
+            for bound, count in zip(DURATION_BUCKETS, stage_stats.bucket_counts):
+                lines.append(f'{METRIC_PREFIX}_duration_seconds_bucket{{stage="{name}",le="{bound}"}} {count}')
+            lines.append(f'{METRIC_PREFIX}_duration_seconds_bucket{{stage="{name}",le="+Inf"}} {stage_stats.count}')
+            lines.append(f'{METRIC_PREFIX}_duration_seconds_sum{{stage="{name}"}} {stage_stats.seconds}')
+            lines.append(f'{METRIC_PREFIX}_duration_seconds_count{{stage="{name}"}} {stage_stats.count}')
+        for metric, attribute, help_text in (
+            ("bytes_total", "bytes", "Bytes processed by pipeline stages."),
+            ("rows_total", "rows", "Rows processed by pipeline stages."),
+        ):
+            lines.append(f"# HELP {METRIC_PREFIX}_{metric} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}_{metric} counter")
+            for name, stage_stats in stats:
+                lines.append(f'{METRIC_PREFIX}_{metric}{{stage="{name}"}} {getattr(stage_stats, attribute)}')
+    return "\n".join(lines) + "\n"
+
+def write_prometheus_file():
+    """
+    Atomically rewrites PROMETHEUS_PATH with the stages observed so far (nothing is written
+    before the first observation). Failures are logged, never raised.
+    """
+    if not METRICS_ENABLED or not _stats or os.getpid() != _pid:
+        return  # a forked child must not overwrite the parent's file with its inherited copy
+    try:
+        directory = os.path.dirname(PROMETHEUS_PATH) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(render_prometheus())
+            os.chmod(tmp_path, 0o644)  # textfile collectors often run as another user
+            os.replace(tmp_path, PROMETHEUS_PATH)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    except OSError as e:
+        logger.warning(f"Could not write stage metrics to {PROMETHEUS_PATH}: {e}")